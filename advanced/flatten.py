@@ -0,0 +1,98 @@
+"""Panic exit: cancel every open order, then close every position at market.
+
+Orders go first, one ``DELETE /fapi/v1/allOpenOrders`` per symbol (weight 1
+however many orders it holds), so nothing left resting can reopen a position
+after it is closed. Positions are read once the cancels are done and closed with
+MARKET orders through batchOrders. The async versions send every symbol's cancel
+at once; cancels never wait on the new-order reserve of the rate limiter.
+"""
+from __future__ import annotations
+import asyncio
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+from src.ratelimit import RateLimitError, error_code
+from src.utils import AsyncBinanceClient, BinanceClient, Logger
+
+
+def _failed(e: Exception) -> Dict[str, Any]:
+    if isinstance(e, httpx.HTTPStatusError):
+        return {"code": error_code(e.response), "msg": e.response.text}
+    return {"error": repr(e)}
+
+
+def _open_symbols(orders: List[Dict[str, Any]]) -> List[str]:
+    return sorted({o["symbol"] for o in orders})
+
+
+def _close_params(positions: List[Dict[str, Any]], symbols: Optional[Iterable[str]]) -> List[Dict[str, Any]]:
+    wanted = {s.upper() for s in symbols} if symbols else None
+    orders = []
+    for p in positions:
+        amt = Decimal(p["positionAmt"])
+        if not amt or (wanted is not None and p["symbol"] not in wanted):
+            continue
+        params: Dict[str, Any] = {"symbol": p["symbol"], "side": "SELL" if amt > 0 else "BUY", "type": "MARKET", "quantity": str(abs(amt))}
+        # hedge mode closes by positionSide and rejects reduceOnly
+        if p.get("positionSide", "BOTH") == "BOTH":
+            params["reduceOnly"] = True
+        else:
+            params["positionSide"] = p["positionSide"]
+        orders.append(params)
+    return orders
+
+
+def _closed(orders: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    out = []
+    for o, r in zip(orders, results):
+        row = {"symbol": o["symbol"], "side": o["side"], "qty": o["quantity"]}
+        row.update({"orderId": r["orderId"], "status": r.get("status")} if "orderId" in r else {"code": r.get("code"), "msg": r.get("msg")})
+        out.append(row)
+    return out
+
+
+def cancel_all(client: BinanceClient, logger: Logger, symbols: Iterable[str]) -> Dict[str, Any]:
+    """Cancel every open order of each symbol; one symbol failing does not stop the rest."""
+    res: Dict[str, Any] = {}
+    for s in symbols:
+        try:
+            res[s.upper()] = client.cancel_all_orders(s)
+        except (httpx.HTTPError, RateLimitError) as e:
+            res[s.upper()] = _failed(e)
+    logger.info(action="cancel_all", result=res)
+    return res
+
+
+async def cancel_all_async(client: AsyncBinanceClient, logger: Logger, symbols: Iterable[str]) -> Dict[str, Any]:
+    """Async :func:`cancel_all`; every symbol's cancel is in flight at once."""
+    symbols = [s.upper() for s in symbols]
+    results = await asyncio.gather(*(client.cancel_all_orders(s) for s in symbols), return_exceptions=True)
+    res: Dict[str, Any] = {}
+    for s, r in zip(symbols, results):
+        if isinstance(r, (httpx.HTTPError, RateLimitError)):
+            r = _failed(r)
+        elif isinstance(r, BaseException):
+            raise r
+        res[s] = r
+    logger.info(action="cancel_all", result=res)
+    return res
+
+
+def flatten(client: BinanceClient, logger: Logger, *, symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Cancel all open orders and close all positions, of ``symbols`` or of the whole account."""
+    canceled = cancel_all(client, logger, symbols or _open_symbols(client.open_orders()))
+    orders = _close_params(client.position_risk(), symbols)
+    closed = _closed(orders, client.place_orders_batch(orders)) if orders else []
+    logger.info(action="flatten", canceled=list(canceled), closed=closed)
+    return {"canceled": canceled, "closed": closed}
+
+
+async def flatten_async(client: AsyncBinanceClient, logger: Logger, *, symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Async :func:`flatten`; the cancels, and the closing batches, go out concurrently."""
+    canceled = await cancel_all_async(client, logger, symbols or _open_symbols(await client.open_orders()))
+    orders = _close_params(await client.position_risk(), symbols)
+    closed = _closed(orders, await client.place_orders_batch(orders)) if orders else []
+    logger.info(action="flatten", canceled=list(canceled), closed=closed)
+    return {"canceled": canceled, "closed": closed}
@@ -1,7 +1,16 @@
+"""Grid ladder: LIMIT orders at evenly spaced prices, placed in batches (:func:`run_grid`, :func:`run_grid_async`)."""
 from __future__ import annotations
-from typing import Optional
-from src.utils import Logger, BinanceClient
-from src.orders import limit_order
+import asyncio
+from typing import Any, Dict, List, Optional
+from src.plan import Plan, ladder_plan
+from src.utils import Logger, AsyncBinanceClient, BinanceClient
+
+
+def _grid_orders(logger: Logger, plan: Plan, *, symbol: str, side: str, tif: str, reduce_only: bool, position_side: Optional[str]) -> List[Dict[str, Any]]:
+    orders = plan.params(symbol=symbol, side=side, tif=tif, reduce_only=reduce_only, position_side=position_side)
+    for i, o in enumerate(orders):
+        logger.info(action="grid_order", idx=i + 1, levels=len(orders), price=o["price"])
+    return orders
 
 
 def run_grid(
@@ -17,11 +26,42 @@ def run_grid(
     tif: str = "GTC",
     reduce_only: bool = False,
     position_side: Optional[str] = None,
-) -> None:
-    if levels < 2:
-        raise ValueError("levels must be >= 2")
-    step = (upper - lower) / (levels - 1)
-    for i in range(levels):
-        price = lower + i * step
-        logger.info(action="grid_order", idx=i + 1, levels=levels, price=price)
-        limit_order(client, logger, symbol=symbol, side=side, quantity=qty, price=price, tif=tif, reduce_only=reduce_only, position_side=position_side)
+    batch: bool = True,
+) -> Optional[List[Dict[str, Any]]]:
+    # every level is checked before the first order goes out
+    plan = ladder_plan(client.symbol_filters(symbol), levels=levels, lower=lower, upper=upper, qty=qty)
+    orders = _grid_orders(logger, plan, symbol=symbol, side=side, tif=tif, reduce_only=reduce_only, position_side=position_side)
+    if batch:
+        logger.info(action="place_order", kind="grid_batch", count=len(orders))
+        return client.place_orders_batch(orders)
+    for params in orders:
+        logger.info(action="place_order", kind="limit", params=params)
+        client.place_order(**params)
+    return None
+
+
+async def run_grid_async(
+    client: AsyncBinanceClient,
+    logger: Logger,
+    *,
+    symbol: str,
+    side: str,
+    levels: int,
+    lower: float,
+    upper: float,
+    qty: float,
+    tif: str = "GTC",
+    reduce_only: bool = False,
+    position_side: Optional[str] = None,
+    batch: bool = True,
+) -> List[Dict[str, Any]]:
+    """Place the whole ladder concurrently; wall time is roughly one round-trip."""
+    # fetching filters first also warms the cache so levels don't race to fetch it
+    plan = ladder_plan(await client.symbol_filters(symbol), levels=levels, lower=lower, upper=upper, qty=qty)
+    orders = _grid_orders(logger, plan, symbol=symbol, side=side, tif=tif, reduce_only=reduce_only, position_side=position_side)
+    if batch:
+        logger.info(action="place_order", kind="grid_batch", count=len(orders))
+        return await client.place_orders_batch(orders)
+    for params in orders:
+        logger.info(action="place_order", kind="limit", params=params)
+    return await asyncio.gather(*(client.place_order(**params) for params in orders))
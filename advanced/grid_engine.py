@@ -0,0 +1,367 @@
+"""Self-rebalancing two-sided grid, maintained from user-data-stream fills.
+
+    engine = GridEngine(client, stream, logger, symbol="BTCUSDT", levels=200, lower=60000, upper=80000, qty=0.001)
+    await engine.start(price=70000)       # or pass ``market=`` and let the mark decide
+    await engine.run()                    # until stop(); follows the mark when ``trail`` is set
+
+The ladder is a desired state rather than a list of orders: every level below
+the anchor (the level of the last fill) wants a BUY, every level above it a
+SELL, the anchor itself nothing. After each fill, or when ``trail`` slides the
+window after the price, :meth:`GridEngine.reconcile` diffs that state against
+the live orders and sends only the difference:
+
+- an order on the wrong side or outside the window is amended to a level that
+  wants an order on its side (PUT batchOrders), or else cancelled
+  (DELETE batchOrders, 10 per request);
+- a level that wants an order and has none gets one (POST batchOrders).
+
+A fill therefore costs one placement (the level it came from is now the anchor
+and the old anchor flips side) instead of a rebuild of the ladder.
+"""
+from __future__ import annotations
+import asyncio
+import itertools
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+
+import httpx
+
+from src.market_data import MarketData
+from src.orders import limit_params
+from src.ratelimit import error_code
+from src.ticks import ROUND_DOWN, ROUND_UP
+from src.user_stream import FINAL_STATUSES, UserDataStream
+from src.utils import BATCH_CANCEL_MAX, BATCH_ORDERS_MAX, AsyncBinanceClient, Logger, validate_order
+
+# slot states on top of "is it on the book"
+PENDING = "PENDING"    # placement sent, no response yet
+LIVE = "LIVE"
+
+
+class Slot:
+    __slots__ = ("level", "side", "client_id", "order_id", "filled", "state")
+
+    def __init__(self, level: int, side: str, client_id: str) -> None:
+        self.level = level
+        self.side = side
+        self.client_id = client_id
+        self.order_id: Optional[int] = None
+        self.filled = Decimal(0)
+        self.state = PENDING
+
+
+class GridEngine:
+    def __init__(
+        self,
+        client: AsyncBinanceClient,
+        stream: UserDataStream,
+        logger: Logger,
+        *,
+        symbol: str,
+        levels: int,
+        lower: float,
+        upper: float,
+        qty: float,
+        tif: str = "GTC",
+        position_side: Optional[str] = None,
+        market: Optional[MarketData] = None,
+        trail: bool = False,
+        poll: float = 1.0,
+    ) -> None:
+        if levels < 3:
+            raise ValueError("levels must be >= 3")
+        if trail and market is None:
+            raise ValueError("trail needs a market-data stream to follow")
+        self.client = client
+        self.stream = stream
+        self.logger = logger
+        self.symbol = symbol.upper()
+        self.levels = levels
+        self.lower, self.upper = lower, upper
+        self.qty = qty
+        self.tif = tif
+        self.position_side = position_side
+        self.market = market
+        self.trail = trail
+        self.poll = poll
+        self.id = f"grid-{uuid.uuid4().hex[:8]}"
+        # set by start() from the symbol filters
+        self.tick: Any = None
+        self.qty_s = ""
+        # level k is priced base + k * step ticks; the window is levels lo .. lo + levels - 1
+        self.base = self.step = 0
+        self.lo = 0
+        self.anchor = 0
+        self.slots: Dict[str, Slot] = {}
+        self.by_level: Dict[int, Slot] = {}
+        # levels the exchange rejected; left empty until the anchor moves
+        self.rejected: set = set()
+        # placements whose request failed without saying whether they exist
+        self.unknown: List[Slot] = []
+        self.stats = {"fills": 0, "placed": 0, "amended": 0, "canceled": 0, "requests": 0, "weight": 0}
+        self.state = "NEW"
+        self._ids = itertools.count(1)
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = asyncio.Event()
+        stream.on("ORDER_TRADE_UPDATE", self.on_order_update)
+
+    # Ladder geometry
+    def price_of(self, level: int) -> str:
+        return self.tick.format(self.base + level * self.step)
+
+    def level_of(self, price: Any) -> int:
+        """Nearest ladder level to ``price`` (may lie outside the window)."""
+        d = self.tick.units(price) - self.base
+        return (2 * d + self.step) // (2 * self.step)
+
+    def desired(self) -> Dict[int, str]:
+        return {k: "BUY" if k < self.anchor else "SELL" for k in range(self.lo, self.lo + self.levels) if k != self.anchor and k not in self.rejected}
+
+    def _set_anchor(self, level: int) -> None:
+        if level != self.anchor:
+            self.anchor = level
+            self.rejected.clear()
+
+    # Entry points
+    async def start(self, price: Optional[float] = None) -> None:
+        """Lay out the ladder around ``price`` (default: the current mark) and place it."""
+        filters = await self.client.symbol_filters(self.symbol)
+        self.tick = filters.quantizer.price
+        self.qty_s, _ = validate_order(filters, qty=self.qty, price=None)
+        lo, hi = self.tick.units(self.lower, ROUND_UP), self.tick.units(self.upper, ROUND_DOWN)
+        # evenly spaced, so a trailing window stays on the same grid
+        self.step = (hi - lo) // (self.levels - 1)
+        if self.step < 1:
+            raise ValueError(f"range {self.lower}-{self.upper} too narrow for {self.levels} levels at tickSize {self.tick.format(1)}")
+        self.base = lo
+        if price is None and self.market is not None:
+            price = self.market.mark(self.symbol)
+        if price is None:
+            raise ValueError("a reference price (or market data with a mark price) is needed to split the ladder into BUYs and SELLs")
+        # outside the range every level is on one side
+        self.anchor = min(max(self.level_of(price), -1), self.levels)
+        self.state = "RUNNING"
+        self.logger.info(action="grid_engine", gridId=self.id, event="start", symbol=self.symbol, levels=self.levels, step=self.tick.format(self.step), anchor=self.price_of(self.anchor))
+        self._kick()
+        await self.settled()
+
+    async def run(self) -> None:
+        """Follow the mark (with ``trail``) until :meth:`stop`."""
+        while not self._stopped.is_set():
+            if self.market is not None:
+                mark = self.market.mark(self.symbol)
+                if mark is not None:
+                    self.on_price(mark)
+            try:
+                await asyncio.wait_for(self._stopped.wait(), self.poll)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self, cancel: bool = True) -> Dict[str, Any]:
+        """Stop maintaining the ladder; with ``cancel``, take every order down."""
+        self._stopped.set()
+        self.state = "STOPPING"
+        await self.settled()
+        if cancel:
+            await self._cancel([s for s in self.by_level.values() if s.order_id is not None])
+        self.state = "STOPPED"
+        self.logger.info(action="grid_engine", gridId=self.id, event="stop", **self.stats)
+        return self.progress()
+
+    async def settled(self) -> None:
+        """Wait until no reconcile is running or due."""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    def on_order_update(self, ev: Dict[str, Any]) -> None:
+        o = ev["o"]
+        slot = self.slots.get(o.get("c") or "")
+        if slot is None:
+            return
+        if slot.order_id is None:
+            slot.order_id = o["i"]
+            slot.state = LIVE
+        slot.filled = max(slot.filled, Decimal(o["z"]))
+        if o["X"] not in FINAL_STATUSES:
+            return
+        self._drop(slot)
+        if o["X"] == "FILLED":
+            # the price came to this level; an amended order fills at its new price
+            self.stats["fills"] += 1
+            self._set_anchor(self.level_of(o["p"]))
+            self.logger.info(action="grid_fill", gridId=self.id, side=o["S"], price=o["p"], anchor=self.price_of(self.anchor))
+        self._kick()
+
+    def on_price(self, price: float) -> None:
+        """Slide the window to centre on ``price`` once it leaves it (``trail`` only)."""
+        if not self.trail or self.state != "RUNNING":
+            return
+        k = self.level_of(price)
+        if self.lo <= k < self.lo + self.levels:
+            return
+        self.lo = k - self.levels // 2
+        self._set_anchor(k)
+        self.logger.info(action="grid_trail", gridId=self.id, low=self.price_of(self.lo), high=self.price_of(self.lo + self.levels - 1))
+        self._kick()
+
+    def progress(self) -> Dict[str, Any]:
+        sides = [s.side for s in self.by_level.values()]
+        return {
+            "id": self.id, "symbol": self.symbol, "state": self.state, "anchor": self.price_of(self.anchor) if self.step else None,
+            "low": self.price_of(self.lo) if self.step else None, "high": self.price_of(self.lo + self.levels - 1) if self.step else None,
+            "buys": sides.count("BUY"), "sells": sides.count("SELL"), **self.stats,
+        }
+
+    # Reconcile
+    def _kick(self) -> None:
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._reconcile_loop())
+
+    async def _reconcile_loop(self) -> None:
+        # one reconcile at a time; events during one trigger exactly one more
+        while self._dirty and self.state == "RUNNING":
+            self._dirty = False
+            try:
+                await self.reconcile()
+            except Exception as e:
+                self.logger.error(action="grid_engine", gridId=self.id, event="reconcile", error=repr(e))
+                self._dirty = True
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), self.poll)
+                except asyncio.TimeoutError:
+                    pass
+
+    def diff(self) -> Tuple[List[Slot], List[Tuple[Slot, int]], List[Tuple[int, str]]]:
+        """``(cancel, amend, place)`` turning the live orders into :meth:`desired`."""
+        want = self.desired()
+        stale = [s for s in self.by_level.values() if s.state == LIVE and want.get(s.level) != s.side]
+        missing = [(k, side) for k, side in want.items() if k not in self.by_level]
+        cancel: List[Slot] = []
+        amend: List[Tuple[Slot, int]] = []
+        place: List[Tuple[int, str]] = []
+        for side in ("BUY", "SELL"):
+            olds = [s for s in stale if s.side == side]
+            news = [k for k, sd in missing if sd == side]
+            # partly filled orders are not resized; they are cancelled
+            movable = [s for s in olds if not s.filled]
+            n = min(len(movable), len(news))
+            amend.extend(zip(movable[:n], news[:n]))
+            cancel.extend(s for s in olds if s not in movable[:n])
+            place.extend((k, side) for k in news[n:])
+        return cancel, amend, place
+
+    async def reconcile(self) -> None:
+        if self.unknown:
+            await self._resolve()
+        cancel, amend, place = self.diff()
+        if not (cancel or amend or place):
+            return
+        self.logger.info(action="grid_reconcile", gridId=self.id, cancel=len(cancel), amend=len(amend), place=len(place), anchor=self.price_of(self.anchor))
+        if cancel:
+            await self._cancel(cancel)
+        await asyncio.gather(self._amend(amend), self._place(place))
+
+    def _count(self, n: int, per_request: int, weight: int) -> None:
+        requests = -(-n // per_request)
+        self.stats["requests"] += requests
+        self.stats["weight"] += requests * weight
+
+    def _drop(self, slot: Slot) -> None:
+        if self.slots.pop(slot.client_id, None) is not None and self.by_level.get(slot.level) is slot:
+            del self.by_level[slot.level]
+
+    async def _resolve(self) -> None:
+        """Look up unconfirmed placements by clientOrderId before diffing around them."""
+        for slot in list(self.unknown):
+            if slot.state == PENDING and self.slots.get(slot.client_id) is slot:
+                try:
+                    r = await self.client.get_order(self.symbol, client_order_id=slot.client_id)
+                except httpx.HTTPStatusError as e:
+                    if error_code(e.response) != -2013:
+                        raise
+                    self._drop(slot)
+                else:
+                    slot.order_id = r["orderId"]
+                    slot.state = LIVE
+                    if r["status"] in FINAL_STATUSES:
+                        # its fill (if any) went by while we were not listening; re-anchor from it
+                        self._drop(slot)
+                        if r["status"] == "FILLED":
+                            self._set_anchor(self.level_of(r["price"]))
+            self.unknown.remove(slot)
+
+    async def _cancel(self, slots: List[Slot]) -> None:
+        if not slots:
+            return
+        self._count(len(slots), BATCH_CANCEL_MAX, 1)
+        results = await self.client.cancel_orders_batch(self.symbol, [s.order_id for s in slots])
+        for slot, r in zip(slots, results):
+            if "orderId" in r:
+                self.stats["canceled"] += 1
+                self._drop(slot)
+            elif r.get("code") == -2011:
+                # already filled or cancelled; its event says which
+                self._drop(slot)
+            else:
+                self.logger.error(action="grid_cancel", gridId=self.id, price=self.price_of(slot.level), code=r.get("code"), msg=r.get("msg"))
+
+    async def _amend(self, moves: List[Tuple[Slot, int]]) -> None:
+        if not moves:
+            return
+        self._count(len(moves), BATCH_ORDERS_MAX, 5)
+        params = [{"symbol": self.symbol, "orderId": s.order_id, "side": s.side, "quantity": self.qty_s, "price": self.price_of(k)} for s, k in moves]
+        results = await self.client.modify_orders_batch(params)
+        for (slot, k), r in zip(moves, results):
+            if "orderId" in r:
+                self.stats["amended"] += 1
+                if self.slots.get(slot.client_id) is slot:
+                    del self.by_level[slot.level]
+                    slot.level = k
+                    self.by_level[k] = slot
+            elif r.get("code") == -2013:
+                self._drop(slot)
+            else:
+                self.logger.error(action="grid_amend", gridId=self.id, price=self.price_of(k), code=r.get("code"), msg=r.get("msg"))
+
+    async def _place(self, levels: List[Tuple[int, str]]) -> None:
+        if not levels:
+            return
+        self._count(len(levels), BATCH_ORDERS_MAX, 5)
+        slots, params = [], []
+        for k, side in levels:
+            slot = Slot(k, side, f"{self.id}-{next(self._ids):x}")
+            # indexed before sending: the stream event can beat the response
+            self.slots[slot.client_id] = slot
+            self.by_level[k] = slot
+            slots.append(slot)
+            p = limit_params(symbol=self.symbol, side=side, quantity=self.qty_s, price=self.price_of(k), tif=self.tif, reduce_only=False, position_side=self.position_side)
+            p["newClientOrderId"] = slot.client_id
+            params.append(p)
+        try:
+            results = await self.client.place_orders_batch(params)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                self.unknown.extend(slots)
+            else:
+                # refused as a whole: nothing was placed
+                for slot in slots:
+                    self._drop(slot)
+            raise
+        except Exception:
+            self.unknown.extend(slots)
+            raise
+        for slot, r in zip(slots, results):
+            if "orderId" in r:
+                self.stats["placed"] += 1
+                slot.order_id = r["orderId"]
+                if self.slots.get(slot.client_id) is slot:
+                    slot.state = LIVE
+                    self.stream.track(self.symbol, slot.order_id)
+            else:
+                self._drop(slot)
+                self.rejected.add(slot.level)
+                self.logger.error(action="grid_place", gridId=self.id, price=self.price_of(slot.level), side=slot.side, code=r.get("code"), msg=r.get("msg"))
@@ -1,7 +1,36 @@
 from __future__ import annotations
-import time
-from typing import Any, Dict, Optional
-from src.utils import BinanceClient, Logger, get_symbol_filters, validate_order
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+from src.utils import AsyncBinanceClient, BinanceClient, Logger, SymbolFilters, validate_order
+
+
+def _oco_legs(
+    filters: SymbolFilters,
+    *,
+    symbol: str,
+    side: str,
+    quantity: float,
+    take_profit: float,
+    stop: float,
+    stop_limit: float,
+    tif: str,
+    reduce_only: bool,
+    position_side: Optional[str],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    qty, tp_px = validate_order(filters, qty=quantity, price=take_profit)
+    _, sl_px = validate_order(filters, qty=quantity, price=stop_limit)
+    # the trigger only has to be on the tick grid; snap rather than reject
+    stop_px = filters.quantizer.price_str(stop)
+
+    base_params = {"symbol": symbol.upper(), "side": side.upper(), "timeInForce": tif, "quantity": qty, "reduceOnly": reduce_only}
+    if position_side:
+        base_params["positionSide"] = position_side
+
+    # Take Profit LIMIT
+    tp_params = {**base_params, "type": "LIMIT", "price": tp_px}
+    # Stop-Limit
+    sl_params = {**base_params, "type": "STOP", "price": sl_px, "stopPrice": stop_px, "workingType": "CONTRACT_PRICE"}
+    return tp_params, sl_params
 
 
 def place_oco(
@@ -17,31 +46,54 @@ def place_oco(
     tif: str = "GTC",
     reduce_only: bool = True,
     position_side: Optional[str] = None,
+    batch: bool = True,
 ) -> Dict[str, Any]:
     """Emulate OCO on Futures by placing TP limit and SL stop-limit.
 
     Note: Futures API does not have native OCO like Spot; we place two orders and
-    periodically check if one fills, then cancel the other. This function submits
-    both and returns their IDs. The caller may run an external watcher; here we
-    do a short, best-effort watch for demonstration.
-    """
-    info = client.exchange_info(symbol)
-    filters = get_symbol_filters(info)
-    validate_order(filters, qty=quantity, price=take_profit)
-    validate_order(filters, qty=quantity, price=stop_limit)
+    cancel the other once one fills. This function submits both and returns their
+    IDs; fills are pushed by :class:`src.user_stream.UserDataStream`.
 
-    base_params = {"symbol": symbol.upper(), "side": side.upper(), "timeInForce": tif, "quantity": quantity, "reduceOnly": reduce_only}
-    if position_side:
-        base_params["positionSide"] = position_side
+    With ``batch`` (the default) both legs go out in a single batchOrders request.
+    """
+    filters = client.symbol_filters(symbol)
+    tp_params, sl_params = _oco_legs(filters, symbol=symbol, side=side, quantity=quantity, take_profit=take_profit, stop=stop, stop_limit=stop_limit, tif=tif, reduce_only=reduce_only, position_side=position_side)
 
-    # Take Profit LIMIT
-    tp_params = {**base_params, "type": "LIMIT", "price": take_profit}
     logger.info(action="place_order", kind="oco_tp", params=tp_params)
-    tp_res = client.place_order(**tp_params)
+    logger.info(action="place_order", kind="oco_sl", params=sl_params)
+    if batch:
+        tp_res, sl_res = client.place_orders_batch([tp_params, sl_params])
+    else:
+        tp_res = client.place_order(**tp_params)
+        sl_res = client.place_order(**sl_params)
 
-    # Stop-Limit
-    sl_params = {**base_params, "type": "STOP", "price": stop_limit, "stopPrice": stop, "workingType": "CONTRACT_PRICE"}
+    return {"tp": tp_res, "sl": sl_res}
+
+
+async def place_oco_async(
+    client: AsyncBinanceClient,
+    logger: Logger,
+    *,
+    symbol: str,
+    side: str,
+    quantity: float,
+    take_profit: float,
+    stop: float,
+    stop_limit: float,
+    tif: str = "GTC",
+    reduce_only: bool = True,
+    position_side: Optional[str] = None,
+    batch: bool = True,
+) -> Dict[str, Any]:
+    """Like :func:`place_oco`, but without ``batch`` the two legs are sent concurrently."""
+    filters = await client.symbol_filters(symbol)
+    tp_params, sl_params = _oco_legs(filters, symbol=symbol, side=side, quantity=quantity, take_profit=take_profit, stop=stop, stop_limit=stop_limit, tif=tif, reduce_only=reduce_only, position_side=position_side)
+
+    logger.info(action="place_order", kind="oco_tp", params=tp_params)
     logger.info(action="place_order", kind="oco_sl", params=sl_params)
-    sl_res = client.place_order(**sl_params)
+    if batch:
+        tp_res, sl_res = await client.place_orders_batch([tp_params, sl_params])
+    else:
+        tp_res, sl_res = await asyncio.gather(client.place_order(**tp_params), client.place_order(**sl_params))
 
     return {"tp": tp_res, "sl": sl_res}
@@ -0,0 +1,362 @@
+"""Supervise many OCO brackets from user-data-stream events.
+
+A bracket is a take-profit LIMIT leg and a STOP leg over the same quantity.
+Every leg is indexed by orderId and by its deterministic clientOrderId, so an
+event is matched in O(1) even when it arrives before the placement response.
+Events only update leg state; :meth:`OcoManager._reconcile` then drives the
+bracket towards "open quantity on each live leg == bracket qty - total filled":
+
+- a leg filled completely -> the sibling is cancelled;
+- a partial fill -> the sibling is cancelled and re-placed at the remaining qty
+  (STOP orders cannot be amended in place);
+- a leg cancelled or rejected from outside -> the sibling is cancelled too.
+
+Bracket state is written to SQLite on every change, and :meth:`OcoManager.recover`
+reloads open brackets and re-reads their legs over REST after a restart.
+"""
+from __future__ import annotations
+import asyncio
+import sqlite3
+import time
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import orjson
+
+from src.ratelimit import error_code
+from src.user_stream import FINAL_STATUSES, UserDataStream
+from src.utils import AsyncBinanceClient, Logger
+from advanced.oco import _oco_legs
+
+DEFAULT_STATE_DB = "oco_brackets.db"
+# leg statuses on top of Binance's order statuses
+PENDING = "PENDING"        # persisted, not yet sent
+CANCELING = "CANCELING"    # cancel sent by us for the bracket's own reasons
+REPLACING = "REPLACING"    # cancel sent by us to re-place at a smaller qty
+# seconds before a reconcile that failed (e.g. the exchange was unreachable) runs again
+RETRY_DELAY = 2.0
+
+
+class Leg:
+    __slots__ = ("name", "params", "client_id", "order_id", "qty", "filled", "status", "gen")
+
+    def __init__(self, name: str, params: Dict[str, Any], client_id: str, qty: str, gen: int = 0) -> None:
+        self.name = name
+        self.params = params
+        self.client_id = client_id
+        self.order_id: Optional[int] = None
+        self.qty = Decimal(qty)
+        self.filled = Decimal(0)
+        self.status = PENDING
+        self.gen = gen
+
+    @property
+    def live(self) -> bool:
+        return self.status not in FINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "params": self.params, "clientId": self.client_id, "orderId": self.order_id,
+            "qty": str(self.qty), "filled": str(self.filled), "status": self.status, "gen": self.gen,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Leg":
+        leg = cls(d["name"], d["params"], d["clientId"], d["qty"], d["gen"])
+        leg.order_id = d["orderId"]
+        leg.filled = Decimal(d["filled"])
+        leg.status = d["status"]
+        return leg
+
+
+class Bracket:
+    __slots__ = ("id", "symbol", "qty", "done_filled", "legs", "state", "lock")
+
+    def __init__(self, bid: str, symbol: str, qty: str, legs: Dict[str, Leg]) -> None:
+        self.id = bid
+        self.symbol = symbol
+        self.qty = Decimal(qty)
+        # fills of leg incarnations that were replaced
+        self.done_filled = Decimal(0)
+        self.legs = legs
+        self.state = "OPEN"
+        self.lock = asyncio.Lock()
+
+    @property
+    def filled(self) -> Decimal:
+        return self.done_filled + sum((leg.filled for leg in self.legs.values()), Decimal(0))
+
+    @property
+    def remaining(self) -> Decimal:
+        return max(Decimal(0), self.qty - self.filled)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "symbol": self.symbol, "qty": str(self.qty), "doneFilled": str(self.done_filled),
+            "state": self.state, "legs": {k: leg.to_dict() for k, leg in self.legs.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Bracket":
+        b = cls(d["id"], d["symbol"], d["qty"], {k: Leg.from_dict(v) for k, v in d["legs"].items()})
+        b.done_filled = Decimal(d["doneFilled"])
+        b.state = d["state"]
+        return b
+
+
+class BracketStore:
+    """One row per bracket, rewritten on every change."""
+
+    def __init__(self, path: str = DEFAULT_STATE_DB) -> None:
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS brackets (id TEXT PRIMARY KEY, state TEXT, updated REAL, body BLOB)")
+
+    def save(self, b: Bracket) -> None:
+        self.db.execute("INSERT OR REPLACE INTO brackets VALUES (?, ?, ?, ?)", (b.id, b.state, time.time(), orjson.dumps(b.to_dict())))
+        self.db.commit()
+
+    def load_open(self) -> List[Bracket]:
+        return [Bracket.from_dict(orjson.loads(body)) for (body,) in self.db.execute("SELECT body FROM brackets WHERE state = 'OPEN'")]
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class OcoManager:
+    def __init__(self, client: AsyncBinanceClient, stream: UserDataStream, logger: Logger, store: Optional[BracketStore] = None) -> None:
+        self.client = client
+        self.stream = stream
+        self.logger = logger
+        self.store = store or BracketStore()
+        self.brackets: Dict[str, Bracket] = {}
+        self.by_order_id: Dict[int, Tuple[Bracket, Leg]] = {}
+        self.by_client_id: Dict[str, Tuple[Bracket, Leg]] = {}
+        self._tasks: set = set()
+        # bracket id -> scheduled retry of a failed reconcile
+        self._retries: Dict[str, asyncio.TimerHandle] = {}
+        stream.on("ORDER_TRADE_UPDATE", self.on_order_update)
+
+    # Index
+    def _index(self, b: Bracket) -> None:
+        self.brackets[b.id] = b
+        for leg in b.legs.values():
+            self.by_client_id[leg.client_id] = (b, leg)
+            if leg.order_id is not None:
+                self.by_order_id[leg.order_id] = (b, leg)
+
+    def _unindex_leg(self, leg: Leg) -> None:
+        self.by_client_id.pop(leg.client_id, None)
+        if leg.order_id is not None:
+            self.by_order_id.pop(leg.order_id, None)
+
+    def _finish(self, b: Bracket, state: str) -> None:
+        b.state = state
+        for leg in b.legs.values():
+            self._unindex_leg(leg)
+        self.brackets.pop(b.id, None)
+        self.logger.info(action="oco_bracket", bracketId=b.id, state=state, filled=str(b.filled))
+
+    # Entry points
+    async def open(
+        self,
+        *,
+        symbol: str,
+        side: str,
+        quantity: float,
+        take_profit: float,
+        stop: float,
+        stop_limit: float,
+        tif: str = "GTC",
+        reduce_only: bool = True,
+        position_side: Optional[str] = None,
+    ) -> Bracket:
+        """Persist a new bracket, then place both legs in one batch."""
+        filters = await self.client.symbol_filters(symbol)
+        tp, sl = _oco_legs(filters, symbol=symbol, side=side, quantity=quantity, take_profit=take_profit, stop=stop, stop_limit=stop_limit, tif=tif, reduce_only=reduce_only, position_side=position_side)
+        bid = uuid.uuid4().hex[:12]
+        b = Bracket(bid, symbol.upper(), tp["quantity"], {
+            "tp": Leg("tp", tp, f"oco-{bid}-tp-0", tp["quantity"]),
+            "sl": Leg("sl", sl, f"oco-{bid}-sl-0", sl["quantity"]),
+        })
+        self._index(b)
+        self.store.save(b)
+        self.logger.info(action="oco_bracket", bracketId=bid, state="OPEN", tp=tp, sl=sl)
+        await self._locked_reconcile(b)
+        return b
+
+    async def recover(self) -> int:
+        """Reload open brackets after a restart and re-read their legs; returns how many."""
+        brackets = self.store.load_open()
+        for b in brackets:
+            self._index(b)
+            for leg in list(b.legs.values()):
+                try:
+                    r = await self.client.get_order(b.symbol, client_order_id=leg.client_id)
+                except httpx.HTTPStatusError as e:
+                    # a PENDING leg may legitimately never have reached the exchange
+                    if leg.status != PENDING:
+                        self.logger.error(action="oco_recover", bracketId=b.id, leg=leg.name, code=error_code(e.response))
+                        # Binance forgets cancelled/expired orders without fills after a few days
+                        if error_code(e.response) == -2013:
+                            leg.status = "CANCELED"
+                    continue
+                replacing = leg.status == REPLACING
+                leg.status = PENDING if leg.status == PENDING else "NEW"
+                self._apply(b, leg, r["orderId"], r["status"], r["executedQty"])
+                if replacing and leg.status == "CANCELED":
+                    # crashed between cancelling the old size and placing the new one
+                    self._replace_leg(b, leg)
+        await asyncio.gather(*(self._locked_reconcile(b) for b in brackets))
+        return len(brackets)
+
+    def on_order_update(self, ev: Dict[str, Any]) -> None:
+        o = ev["o"]
+        hit = self.by_order_id.get(o["i"]) or self.by_client_id.get(o.get("c") or "")
+        if hit is None:
+            return
+        b, leg = hit
+        self._apply(b, leg, o["i"], o["X"], o["z"])
+        # reconcile off the dispatch path so one slow REST call never delays other brackets
+        self._spawn(b)
+
+    def _spawn(self, b: Bracket) -> None:
+        t = asyncio.get_running_loop().create_task(self._locked_reconcile(b))
+        self._tasks.add(t)
+        t.add_done_callback(self._tasks.discard)
+
+    def _retry(self, b: Bracket) -> None:
+        if b.id not in self._retries:
+            def fire() -> None:
+                del self._retries[b.id]
+                self._spawn(b)
+            self._retries[b.id] = asyncio.get_running_loop().call_later(RETRY_DELAY, fire)
+
+    def _apply(self, b: Bracket, leg: Leg, order_id: int, status: str, executed: str) -> None:
+        if leg.order_id is None:
+            leg.order_id = order_id
+            self.by_order_id[order_id] = (b, leg)
+        leg.filled = max(leg.filled, Decimal(executed))
+        # while our own cancel is in flight, its response decides the final status
+        if leg.status not in (CANCELING, REPLACING):
+            leg.status = status
+
+    async def _locked_reconcile(self, b: Bracket) -> None:
+        async with b.lock:
+            if b.state != "OPEN":
+                return
+            try:
+                await self._reconcile(b)
+            except Exception as e:
+                # nothing awaits a reconcile task: log and try again rather than leave the bracket half-handled
+                self.logger.error(action="oco_reconcile", bracketId=b.id, error=repr(e))
+                self._retry(b)
+            finally:
+                self.store.save(b)
+
+    async def _reconcile(self, b: Bracket) -> None:
+        remaining = b.remaining
+        pending = [leg for leg in b.legs.values() if leg.status == PENDING]
+        if pending and remaining > 0:
+            await self._place(b, pending, remaining)
+        for leg in b.legs.values():
+            if leg.status in ("CANCELED", "EXPIRED", "REJECTED") and remaining > 0:
+                # cancelled from outside (or never accepted): the bracket is broken
+                await self._cancel_all(b)
+                self._finish(b, "CANCELED")
+                return
+        if remaining <= 0:
+            await self._cancel_all(b)
+            self._finish(b, "DONE")
+            return
+        for leg in list(b.legs.values()):
+            if leg.live and leg.status != PENDING and leg.qty - leg.filled > remaining:
+                await self._resize(b, leg)
+
+    async def _place(self, b: Bracket, legs: List[Leg], qty: Decimal) -> None:
+        params = []
+        for leg in legs:
+            leg.qty = qty
+            leg.params = {**leg.params, "quantity": format(qty, "f"), "newClientOrderId": leg.client_id}
+            params.append(leg.params)
+        self.store.save(b)
+        results = await self.client.place_orders_batch(params)
+        for leg, r in zip(legs, results):
+            if "orderId" in r:
+                self._apply(b, leg, r["orderId"], r.get("status", "NEW"), r.get("executedQty", "0"))
+            else:
+                leg.status = "REJECTED"
+                self.logger.error(action="oco_place", bracketId=b.id, leg=leg.name, code=r.get("code"), msg=r.get("msg"))
+        for leg in legs:
+            if leg.order_id is not None:
+                self.stream.track(b.symbol, leg.order_id)
+
+    async def _cancel(self, b: Bracket, leg: Leg, marker: str) -> None:
+        """Cancel ``leg``; on failure its status is restored and the error re-raised, so the bracket is retried."""
+        prev, leg.status = leg.status, marker
+        try:
+            r = await self.client.cancel_order(b.symbol, order_id=leg.order_id, client_order_id=None if leg.order_id else leg.client_id)
+            leg.filled = max(leg.filled, Decimal(r.get("executedQty", "0")))
+            leg.status = r.get("status", "CANCELED")
+            return
+        except httpx.HTTPStatusError as e:
+            code = error_code(e.response)
+            if code != -2011:
+                leg.status = prev
+                self.logger.error(action="oco_cancel", bracketId=b.id, leg=leg.name, code=code, status=e.response.status_code)
+                raise
+        except httpx.HTTPError as e:
+            leg.status = prev
+            self.logger.error(action="oco_cancel", bracketId=b.id, leg=leg.name, error=repr(e))
+            raise
+        # -2011: already gone (filled or cancelled); learn its final state
+        try:
+            r = await self.client.get_order(b.symbol, client_order_id=leg.client_id)
+        except httpx.HTTPError as e:
+            leg.status = prev
+            self.logger.error(action="oco_cancel_lookup", bracketId=b.id, leg=leg.name, error=repr(e))
+            raise
+        leg.filled = max(leg.filled, Decimal(r["executedQty"]))
+        leg.status = r["status"]
+        if leg.status == "FILLED":
+            self.logger.error(action="oco_overfill", bracketId=b.id, leg=leg.name, code=code, filled=str(b.filled), qty=str(b.qty))
+
+    async def _cancel_all(self, b: Bracket) -> None:
+        live = [leg for leg in b.legs.values() if leg.live and leg.status != PENDING]
+        # every cancel runs to completion before a failure propagates
+        errors = [r for r in await asyncio.gather(*(self._cancel(b, leg, CANCELING) for leg in live), return_exceptions=True) if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+        for leg in b.legs.values():
+            if leg.status == PENDING:
+                leg.status = "CANCELED"
+
+    def _replace_leg(self, b: Bracket, leg: Leg) -> Leg:
+        """Retire a cancelled leg and put a PENDING successor for the remaining qty in its place."""
+        self._unindex_leg(leg)
+        b.done_filled += leg.filled
+        gen = leg.gen + 1
+        new = Leg(leg.name, leg.params, f"oco-{b.id}-{leg.name}-{gen}", format(b.remaining, "f"), gen)
+        b.legs[leg.name] = new
+        self.by_client_id[new.client_id] = (b, new)
+        self.logger.info(action="oco_resize", bracketId=b.id, leg=leg.name, qty=str(new.qty))
+        return new
+
+    async def _resize(self, b: Bracket, leg: Leg) -> None:
+        await self._cancel(b, leg, REPLACING)
+        if leg.status == "FILLED":
+            return
+        new = self._replace_leg(b, leg)
+        if b.remaining > 0:
+            await self._place(b, [new], b.remaining)
+
+    async def drain(self) -> None:
+        """Wait for in-flight reconciles (e.g. before shutdown); pending retries are dropped, :meth:`recover` redoes them."""
+        for h in self._retries.values():
+            h.cancel()
+        self._retries.clear()
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
@@ -1,25 +1,10 @@
 from __future__ import annotations
 from typing import Any, Dict, Optional
-from src.utils import BinanceClient, Logger, get_symbol_filters, validate_order
+from src.ticks import Number
+from src.utils import AsyncBinanceClient, BinanceClient, Logger, validate_order
 
 
-def place_stop_limit(
-    client: BinanceClient,
-    logger: Logger,
-    *,
-    symbol: str,
-    side: str,
-    quantity: float,
-    stop_price: float,
-    limit_price: float,
-    tif: str = "GTC",
-    reduce_only: bool = False,
-    position_side: Optional[str] = None,
-) -> Dict[str, Any]:
-    info = client.exchange_info(symbol)
-    filters = get_symbol_filters(info)
-    validate_order(filters, qty=quantity, price=limit_price)
-
+def _stop_limit_params(*, symbol: str, side: str, quantity: Number, stop_price: Number, limit_price: Number, tif: str, reduce_only: bool, position_side: Optional[str]) -> Dict[str, Any]:
     params: Dict[str, Any] = {
         "symbol": symbol.upper(),
         "side": side.upper(),
@@ -34,6 +19,49 @@ def place_stop_limit(
     }
     if position_side:
         params["positionSide"] = position_side
+    return params
+
+
+def place_stop_limit(
+    client: BinanceClient,
+    logger: Logger,
+    *,
+    symbol: str,
+    side: str,
+    quantity: float,
+    stop_price: float,
+    limit_price: float,
+    tif: str = "GTC",
+    reduce_only: bool = False,
+    position_side: Optional[str] = None,
+) -> Dict[str, Any]:
+    filters = client.symbol_filters(symbol)
+    quantity, limit_price = validate_order(filters, qty=quantity, price=limit_price)
+    # the trigger only has to be on the tick grid; snap rather than reject
+    stop_price = filters.quantizer.price_str(stop_price)
 
+    params = _stop_limit_params(symbol=symbol, side=side, quantity=quantity, stop_price=stop_price, limit_price=limit_price, tif=tif, reduce_only=reduce_only, position_side=position_side)
     logger.info(action="place_order", kind="stop_limit", params=params)
     return client.place_order(**params)
+
+
+async def place_stop_limit_async(
+    client: AsyncBinanceClient,
+    logger: Logger,
+    *,
+    symbol: str,
+    side: str,
+    quantity: float,
+    stop_price: float,
+    limit_price: float,
+    tif: str = "GTC",
+    reduce_only: bool = False,
+    position_side: Optional[str] = None,
+) -> Dict[str, Any]:
+    filters = await client.symbol_filters(symbol)
+    quantity, limit_price = validate_order(filters, qty=quantity, price=limit_price)
+    stop_price = filters.quantizer.price_str(stop_price)
+
+    params = _stop_limit_params(symbol=symbol, side=side, quantity=quantity, stop_price=stop_price, limit_price=limit_price, tif=tif, reduce_only=reduce_only, position_side=position_side)
+    logger.info(action="place_order", kind="stop_limit", params=params)
+    return await client.place_order(**params)
@@ -1,8 +1,55 @@
+"""TWAP execution: split a parent order into step-aligned slices on a fixed schedule.
+
+Slice ``i`` is due at ``start + i * interval`` on the monotonic clock, so request
+latency delays a slice but never shifts the ones after it. A slice that is still
+waiting when the next one is already due is handled by the ``late`` policy:
+
+- ``catch_up`` (default): send it immediately, followed by the next one;
+- ``skip``: drop it (its quantity is not executed) and move on; the last slice
+  is always sent.
+
+:class:`TwapEngine` runs any number of parent orders concurrently in one event
+loop; each returns a :class:`TwapJob` that can be cancelled and reports progress.
+
+LIMIT slices without a ``price`` join the touch (best bid to buy, best ask to sell)
+read from a running :class:`~src.market_data.MarketData` passed as ``market``.
+"""
 from __future__ import annotations
+import asyncio
+import itertools
 import time
-from typing import Optional
-from src.utils import Logger, BinanceClient
-from src.orders import market_order, limit_order
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from src.plan import twap_plan
+from src.utils import Logger, AsyncBinanceClient, BinanceClient
+from src.orders import market_order, limit_order, market_order_async, limit_order_async
+
+if TYPE_CHECKING:
+    from src.market_data import MarketData
+
+CATCH_UP = "catch_up"
+SKIP = "skip"
+LATE_POLICIES = (CATCH_UP, SKIP)
+
+
+def _check(order_type: str, price: Optional[float], late: str, market: Optional["MarketData"]) -> None:
+    if order_type.upper() != "MARKET" and price is None and market is None:
+        raise ValueError("price or market data required for LIMIT twap")
+    if late not in LATE_POLICIES:
+        raise ValueError(f"late must be one of {LATE_POLICIES}")
+
+
+def _slice_price(symbol: str, side: str, price: Optional[float], market: Optional["MarketData"]) -> float:
+    if price is not None:
+        return price
+    px = market.touch(symbol, side)
+    if px is None:
+        raise ValueError(f"no book ticker for {symbol} yet")
+    return px
+
+
+def _skip(late: str, now: float, due: float, interval: float, i: int, slices: int) -> bool:
+    return late == SKIP and i != slices - 1 and now >= due + interval
 
 
 def run_twap(
@@ -19,15 +66,190 @@ def run_twap(
     tif: str = "GTC",
     reduce_only: bool = False,
     position_side: Optional[str] = None,
-) -> None:
-    per = qty / slices
-    for i in range(slices):
-        logger.info(action="twap_tick", idx=i + 1, slices=slices, perQty=per)
-        if order_type.upper() == "MARKET":
-            market_order(client, logger, symbol=symbol, side=side, quantity=per, reduce_only=reduce_only, position_side=position_side)
-        else:
-            if price is None:
-                raise ValueError("price required for LIMIT twap")
-            limit_order(client, logger, symbol=symbol, side=side, quantity=per, price=price, tif=tif, reduce_only=reduce_only, position_side=position_side)
-        if i != slices - 1:
-            time.sleep(interval)
+    late: str = CATCH_UP,
+    market: Optional["MarketData"] = None,
+) -> Dict[str, Any]:
+    """Blocking TWAP for a single parent; returns counts like :meth:`TwapJob.progress`.
+
+    As in :class:`TwapEngine`, a failed slice is logged and counted in ``errors``
+    and the schedule carries on.
+    """
+    _check(order_type, price, late, market)
+    # step-aligned slices, rounding remainder on the last one; all checked before the first is sent
+    sizes = twap_plan(client.symbol_filters(symbol), qty=qty, slices=slices, price=price).quantities
+    done = {"slices": len(sizes), "sent": 0, "skipped": 0, "errors": 0}
+    start = time.monotonic()
+    for i, per in enumerate(sizes):
+        due = start + i * interval
+        now = time.monotonic()
+        if now < due:
+            time.sleep(due - now)
+        elif _skip(late, now, due, interval, i, slices):
+            done["skipped"] += 1
+            logger.info(action="twap_skip", idx=i + 1, slices=slices, perQty=per, lagMs=int((now - due) * 1000))
+            continue
+        logger.info(action="twap_tick", idx=i + 1, slices=slices, perQty=per, lagMs=int(max(0.0, time.monotonic() - due) * 1000))
+        try:
+            if order_type.upper() == "MARKET":
+                market_order(client, logger, symbol=symbol, side=side, quantity=per, reduce_only=reduce_only, position_side=position_side)
+            else:
+                px = _slice_price(symbol, side, price, market)
+                limit_order(client, logger, symbol=symbol, side=side, quantity=per, price=px, tif=tif, reduce_only=reduce_only, position_side=position_side)
+        except Exception as e:
+            # one failed slice does not abandon the parent
+            done["errors"] += 1
+            logger.error(action="twap_slice", idx=i + 1, error=repr(e))
+            continue
+        done["sent"] += 1
+    return done
+
+
+class TwapJob:
+    """One parent order; created by :meth:`TwapEngine.submit`."""
+
+    def __init__(self, job_id: str, symbol: str, side: str, sizes: List[str], interval: float, late: str) -> None:
+        self.id = job_id
+        self.symbol = symbol
+        self.side = side
+        self.sizes = sizes
+        self.interval = interval
+        self.late = late
+        self.state = "RUNNING"
+        self.sent = 0
+        self.skipped = 0
+        self.errors = 0
+        self.sent_qty = Decimal(0)
+        self.skipped_qty = Decimal(0)
+        self.max_lag = 0.0
+        self.task: Optional[asyncio.Task] = None
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """Stop before the next slice; slices already sent are not touched."""
+        if self.task is not None and not self.task.done():
+            self._cancelled = True
+            self.task.cancel()
+
+    async def wait(self) -> Dict[str, Any]:
+        if self.task is not None:
+            await asyncio.wait({self.task})
+        return self.progress()
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "symbol": self.symbol, "side": self.side, "state": self.state,
+            "slices": len(self.sizes), "sent": self.sent, "skipped": self.skipped, "errors": self.errors,
+            "sentQty": str(self.sent_qty), "skippedQty": str(self.skipped_qty),
+            "totalQty": str(sum((Decimal(s) for s in self.sizes), Decimal(0))), "maxLagMs": round(self.max_lag * 1000, 3),
+        }
+
+
+class TwapEngine:
+    """Run many TWAP parents on one event loop."""
+
+    def __init__(self, client: AsyncBinanceClient, logger: Logger) -> None:
+        self.client = client
+        self.logger = logger
+        self.jobs: Dict[str, TwapJob] = {}
+        self._ids = itertools.count(1)
+
+    async def submit(
+        self,
+        *,
+        symbol: str,
+        side: str,
+        qty: float,
+        slices: int,
+        interval: float,
+        order_type: str = "MARKET",
+        price: Optional[float] = None,
+        tif: str = "GTC",
+        reduce_only: bool = False,
+        position_side: Optional[str] = None,
+        late: str = CATCH_UP,
+        start: Optional[float] = None,
+        market: Optional["MarketData"] = None,
+    ) -> TwapJob:
+        """Schedule a parent order; ``start`` is a ``time.monotonic()`` value (default: now)."""
+        _check(order_type, price, late, market)
+        sizes = twap_plan(await self.client.symbol_filters(symbol), qty=qty, slices=slices, price=price).quantities
+        job = TwapJob(f"twap-{next(self._ids)}", symbol.upper(), side.upper(), sizes, interval, late)
+        self.jobs[job.id] = job
+
+        async def send(per: str) -> None:
+            if order_type.upper() == "MARKET":
+                await market_order_async(self.client, self.logger, symbol=symbol, side=side, quantity=per, reduce_only=reduce_only, position_side=position_side)
+            else:
+                px = _slice_price(symbol, side, price, market)
+                await limit_order_async(self.client, self.logger, symbol=symbol, side=side, quantity=per, price=px, tif=tif, reduce_only=reduce_only, position_side=position_side)
+
+        job.task = asyncio.create_task(self._run(job, send, time.monotonic() if start is None else start))
+        return job
+
+    async def _run(self, job: TwapJob, send: Any, start: float) -> None:
+        n = len(job.sizes)
+        try:
+            for i, per in enumerate(job.sizes):
+                due = start + i * job.interval
+                now = time.monotonic()
+                if now < due:
+                    await asyncio.sleep(due - now)
+                elif _skip(job.late, now, due, job.interval, i, n):
+                    job.skipped += 1
+                    job.skipped_qty += Decimal(per)
+                    self.logger.info(action="twap_skip", twapId=job.id, idx=i + 1, slices=n, perQty=per, lagMs=int((now - due) * 1000))
+                    continue
+                lag = max(0.0, time.monotonic() - due)
+                job.max_lag = max(job.max_lag, lag)
+                self.logger.info(action="twap_tick", twapId=job.id, idx=i + 1, slices=n, perQty=per, lagMs=int(lag * 1000))
+                try:
+                    await send(per)
+                except Exception as e:
+                    # one failed slice does not abandon the parent
+                    job.errors += 1
+                    self.logger.error(action="twap_slice", twapId=job.id, idx=i + 1, error=repr(e))
+                    continue
+                job.sent += 1
+                job.sent_qty += Decimal(per)
+            job.state = "DONE"
+        except asyncio.CancelledError:
+            job.state = "CANCELED"
+            self.logger.info(action="twap_cancel", **job.progress())
+            if not job._cancelled:
+                raise
+
+    def cancel(self, job_id: str) -> None:
+        self.jobs[job_id].cancel()
+
+    def progress(self) -> List[Dict[str, Any]]:
+        return [j.progress() for j in self.jobs.values()]
+
+    async def join(self) -> List[Dict[str, Any]]:
+        """Wait for every submitted job to finish or be cancelled."""
+        await asyncio.gather(*(j.wait() for j in self.jobs.values()))
+        return self.progress()
+
+
+async def run_twap_async(
+    client: AsyncBinanceClient,
+    logger: Logger,
+    *,
+    symbol: str,
+    side: str,
+    qty: float,
+    slices: int,
+    interval: float,
+    order_type: str = "MARKET",
+    price: Optional[float] = None,
+    tif: str = "GTC",
+    reduce_only: bool = False,
+    position_side: Optional[str] = None,
+    late: str = CATCH_UP,
+    market: Optional["MarketData"] = None,
+) -> Dict[str, Any]:
+    """Non-blocking TWAP for a single parent; returns its final progress."""
+    job = await TwapEngine(client, logger).submit(
+        symbol=symbol, side=side, qty=qty, slices=slices, interval=interval, order_type=order_type,
+        price=price, tif=tif, reduce_only=reduce_only, position_side=position_side, late=late, market=market,
+    )
+    return await job.wait()
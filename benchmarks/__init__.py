@@ -0,0 +1 @@
+"""Performance benchmarks for the order hot path and strategies."""
@@ -0,0 +1,276 @@
+"""Hot-path and strategy benchmarks with JSON output and baseline comparison.
+
+    python -m benchmarks.bench run [--out results.json] [--save-baseline]
+    python -m benchmarks.bench compare [results.json] [--baseline benchmarks/baseline.json] [--threshold 0.15]
+    python -m benchmarks.bench startup [--budget help=80] [--budget order.dry_run=700]
+
+All network I/O goes through an in-process ``httpx.MockTransport``, so numbers
+measure the bot's own overhead (signing, validation, logging, serialization).
+``startup`` times fresh CLI processes instead and fails when the median of one
+exceeds its budget of milliseconds on top of a bare ``python -c pass``.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+SYMBOL = "BTCUSDT"
+EXCHANGE_INFO = {
+    "symbols": [{
+        "symbol": SYMBOL, "pricePrecision": 2, "quantityPrecision": 3,
+        "filters": [
+            {"filterType": "PRICE_FILTER", "tickSize": "0.10"},
+            {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001"},
+            {"filterType": "MIN_NOTIONAL", "notional": "100"},
+        ],
+    }]
+}
+
+
+def measure(fn: Callable[[], Any], number: int, repeat: int = 5) -> Dict[str, Any]:
+    """Run ``fn`` ``number`` times per round; report per-call microseconds over ``repeat`` rounds."""
+    rounds: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter_ns() - t0) / number / 1000)
+    return {"median_us": round(statistics.median(rounds), 3), "min_us": round(min(rounds), 3), "n": number, "repeat": repeat}
+
+
+class StubExchange:
+    """Mock transport answering exchangeInfo, time and order endpoints; records call times."""
+
+    def __init__(self) -> None:
+        self.calls: List[float] = []
+        self._oid = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(time.perf_counter())
+        path = request.url.path
+        if path.endswith("/exchangeInfo"):
+            return httpx.Response(200, json=EXCHANGE_INFO)
+        if path.endswith("/time"):
+            return httpx.Response(200, json={"serverTime": int(time.time() * 1000)})
+        if path.endswith("/batchOrders"):
+            n = request.url.params["batchOrders"].count("{")
+            return httpx.Response(200, json=[{"orderId": self._next(), "status": "NEW"} for _ in range(n)])
+        return httpx.Response(200, json={"orderId": self._next(), "status": "NEW"})
+
+    def _next(self) -> int:
+        self._oid += 1
+        return self._oid
+
+
+def make_client(tmp: str, stub: StubExchange) -> Any:
+    from src.utils import BinanceClient, Logger
+    from src.ratelimit import RateLimiter
+
+    logger = Logger(os.path.join(tmp, "bench.log"))
+    client = BinanceClient("key", "secret", False, logger)
+    client.client = httpx.Client(base_url=client.base_url, transport=httpx.MockTransport(stub))
+    # measure client overhead, not exchange pacing
+    client.rate_limiter = RateLimiter(weight_1m=10**9, orders_10s=10**9, orders_1m=10**9)
+    return client
+
+
+def run() -> Dict[str, Any]:
+    tmp = tempfile.mkdtemp(prefix="bot-bench-")
+    os.environ["BINANCE_EXCHANGE_INFO_CACHE"] = os.path.join(tmp, "exchange_info.bin")
+    os.environ["BOT_ORDER_JOURNAL"] = os.path.join(tmp, "orders.db")
+    sys.path.insert(0, ROOT)
+    from src.utils import Logger, get_symbol_filters, validate_order
+    from src.orders import limit_order, market_order
+    from advanced.grid import run_grid
+    from advanced.twap import run_twap
+
+    stub = StubExchange()
+    client = make_client(tmp, stub)
+    logger = client.logger
+    filters = client.symbol_filters(SYMBOL)
+    params = {"symbol": SYMBOL, "side": "BUY", "type": "LIMIT", "timeInForce": "GTC", "quantity": "0.001", "price": "70000.1", "reduceOnly": False, "timestamp": 1, "recvWindow": 5000}
+    buffered = Logger(os.path.join(tmp, "bench-buffered.log"), buffered=True)
+
+    results: Dict[str, Any] = {}
+    results["sign"] = measure(lambda: client._sign(dict(params)), 20000)
+    results["get_symbol_filters"] = measure(lambda: get_symbol_filters(EXCHANGE_INFO), 20000)
+    results["client.symbol_filters"] = measure(lambda: client.symbol_filters(SYMBOL), 20000)
+    results["validate_order"] = measure(lambda: validate_order(filters, 0.003, 70000.1), 20000)
+    results["logger.info"] = measure(lambda: logger.info(action="bench", params=params), 2000)
+    results["logger.info.buffered"] = measure(lambda: buffered.info(action="bench", params=params), 20000)
+    buffered.flush()
+    results["market_order"] = measure(lambda: market_order(client, logger, symbol=SYMBOL, side="BUY", quantity=0.001), 500)
+    results["limit_order"] = measure(lambda: limit_order(client, logger, symbol=SYMBOL, side="BUY", quantity=0.001, price=70000.1), 500)
+    for levels in (10, 100, 1000):
+        results[f"run_grid[{levels}]"] = measure(
+            lambda: run_grid(client, logger, symbol=SYMBOL, side="BUY", levels=levels, lower=60000, upper=69990, qty=0.002),
+            max(1, 1000 // levels), repeat=3,
+        )
+
+    # TWAP scheduling accuracy: how far each slice lands from its ideal start time
+    slices, interval = 20, 0.02
+    stub.calls.clear()
+    t0 = time.perf_counter()
+    run_twap(client, logger, symbol=SYMBOL, side="BUY", qty=0.02, slices=slices, interval=interval)
+    drift = [(t - t0 - i * interval) * 1000 for i, t in enumerate(stub.calls)]
+    results["run_twap.schedule"] = {
+        "median_drift_ms": round(statistics.median(drift), 3),
+        "max_drift_ms": round(max(drift), 3),
+        "final_drift_ms": round(drift[-1], 3),
+        "slices": slices,
+        "interval_s": interval,
+    }
+    return {"meta": _meta(), "results": results}
+
+
+def _meta() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {"python": platform.python_version(), "platform": platform.platform(), "commit": commit, "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+
+# ms a CLI invocation may add to bare interpreter start-up: about twice what a
+# developer laptop measures (help ~25ms, a dry-run order ~320ms), for slower CI hosts
+STARTUP_BUDGETS = {"help": 80.0, "order.dry_run": 700.0}
+
+
+def startup(repeat: int = 7) -> Dict[str, Any]:
+    """Median wall time of CLI invocations in fresh interpreters over ``repeat`` rounds.
+
+    ``overhead_ms`` is the median, per round, of a case minus the bare ``python -c pass`` run next to it.
+    """
+    sys.path.insert(0, ROOT)
+    from src.exchange_cache import ExchangeInfoCache
+
+    tmp = tempfile.mkdtemp(prefix="bot-startup-")
+    cache = os.path.join(tmp, "exchange_info.bin")
+    # a warm filters cache, so the dry-run order never touches the network
+    ExchangeInfoCache(cache).store(EXCHANGE_INFO)
+    env = dict(os.environ, PYTHONPATH=ROOT, BINANCE_EXCHANGE_INFO_CACHE=cache, BINANCE_API_KEY="key", BINANCE_API_SECRET="secret")
+    env.pop("BOT_DAEMON_SOCKET", None)
+    cli = [sys.executable, "-m", "src.cli"]
+    cases = {
+        "python": [sys.executable, "-c", "pass"],
+        "help": cli + ["--help"],
+        "order.dry_run": cli + ["order", "--symbol", SYMBOL, "--side", "BUY", "--type", "MARKET", "--qty", "0.001", "--dry-run"],
+    }
+
+    def timed(argv: List[str]) -> float:
+        t0 = time.perf_counter()
+        subprocess.run(argv, cwd=tmp, env=env, stdout=subprocess.DEVNULL, check=True)
+        return (time.perf_counter() - t0) * 1000
+
+    # an untimed warm-up writes bytecode caches and pulls the modules into the page cache
+    for argv in cases.values():
+        timed(argv)
+    runs: Dict[str, List[float]] = {name: [] for name in cases}
+    # rounds interleave the cases, so a burst of load on the machine hits the baseline as well
+    for _ in range(repeat):
+        for name, argv in cases.items():
+            runs[name].append(timed(argv))
+    base = runs["python"]
+    results = {
+        name: {
+            "median_ms": round(statistics.median(r), 3),
+            "overhead_ms": round(statistics.median(t - b for t, b in zip(r, base)), 3),
+            "repeat": repeat,
+        }
+        for name, r in runs.items() if name != "python"
+    }
+    return {"meta": _meta(), "python_ms": round(statistics.median(base), 3), "results": results}
+
+
+# lower is better for every metric we compare
+COMPARED = ("median_us", "median_drift_ms", "max_drift_ms")
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float) -> List[str]:
+    """Return human-readable regressions where ``new`` is slower than ``base`` by more than ``threshold``."""
+    out = []
+    for name, b in base["results"].items():
+        n = new["results"].get(name)
+        if n is None:
+            continue
+        for key in COMPARED:
+            if key in b and key in n and b[key] > 0:
+                ratio = n[key] / b[key]
+                if ratio > 1 + threshold:
+                    out.append(f"{name}.{key}: {b[key]} -> {n[key]} ({ratio:.2f}x)")
+    return out
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(prog="benchmarks.bench")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    pr = sub.add_parser("run")
+    pr.add_argument("--out", default=None, help="write results JSON here (default: stdout)")
+    pr.add_argument("--save-baseline", action="store_true", help=f"also store results as {DEFAULT_BASELINE}")
+    pc = sub.add_parser("compare")
+    pc.add_argument("results", nargs="?", default=None, help="results JSON (default: run now)")
+    pc.add_argument("--baseline", default=DEFAULT_BASELINE)
+    pc.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown ratio before flagging")
+    ps = sub.add_parser("startup")
+    ps.add_argument("--budget", action="append", default=[], metavar="NAME=MS", help=f"override a budget (defaults: {STARTUP_BUDGETS})")
+    ps.add_argument("--repeat", type=int, default=7)
+    a = ap.parse_args(argv)
+
+    if a.cmd == "startup":
+        budgets = dict(STARTUP_BUDGETS)
+        for b in a.budget:
+            name, _, ms = b.partition("=")
+            budgets[name] = float(ms)
+        res = startup(a.repeat)
+        print(json.dumps(res, indent=2))
+        over = [f"{name}: {r['overhead_ms']}ms > {budgets[name]}ms" for name, r in res["results"].items() if name in budgets and r["overhead_ms"] > budgets[name]]
+        for o in over:
+            print(f"OVER BUDGET {o}")
+        return 1 if over else 0
+
+    if a.cmd == "run":
+        res = run()
+        text = json.dumps(res, indent=2)
+        if a.out:
+            with open(a.out, "w", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            print(text)
+        if a.save_baseline:
+            with open(DEFAULT_BASELINE, "w", encoding="utf-8") as f:
+                f.write(text)
+        return 0
+
+    if not os.path.exists(a.baseline):
+        print(f"No baseline at {a.baseline}; create one with: python -m benchmarks.bench run --save-baseline")
+        return 1
+    with open(a.baseline, encoding="utf-8") as f:
+        base = json.load(f)
+    if a.results:
+        with open(a.results, encoding="utf-8") as f:
+            new = json.load(f)
+    else:
+        new = run()
+    regressions = compare(base, new, a.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r}")
+    if regressions:
+        return 1
+    print(f"No regressions beyond {a.threshold:.0%} against {a.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,48 +1,412 @@
 #!/usr/bin/env python3
+"""Build report.pdf from bot.log: activity aggregates plus the most recent entries.
+
+    python scripts/make_report.py [--log bot.log] [--archives] [--out report.pdf] [--tail 24]
+
+The log is read once, front to back, a line at a time; aggregates are
+constant-size per endpoint and per minute (latencies go into the same
+log-linear histograms as ``src/metrics.py``), so any size of log fits in
+memory. The recent entries are read backwards from the end of the file in
+blocks. ``--archives`` also reads the rotated ``bot.log.N.gz`` files, oldest
+first.
+"""
+import argparse
+import glob
+import gzip
 import os
-import json
+import sys
+from collections import Counter, deque
 from datetime import datetime, UTC
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import orjson
 from fpdf import FPDF
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from src.metrics import Histogram  # noqa: E402
+
 LOG_PATH = os.path.join(ROOT, "bot.log")
 OUT_PATH = os.path.join(ROOT, "report.pdf")
 REPO_URL = "https://github.com/vikramkode/Vikram_binance_bot"
 
+ORDER_PATHS = ("/fapi/v1/order", "/fapi/v1/batchOrders")
+# points per sparkline; minutes are summed into this many buckets
+SPARK_POINTS = 120
+# TWAP parents and rebalancing grids listed in the per-job tables
+RECENT_JOBS = 15
+
 
 def _truncate(s: str, max_len: int = 200) -> str:
     return s if len(s) <= max_len else s[: max_len - 3] + "..."
 
 
-def read_recent_logs(max_lines: int = 30):
-    lines = []
-    if not os.path.exists(LOG_PATH):
-        return lines
+def tail_lines(path: str, max_lines: int, block: int = 64 * 1024) -> List[bytes]:
+    """Last ``max_lines`` lines of ``path``, read backwards in ``block``-sized reads."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        # one line more than needed, so the first kept line is known to be whole
+        while pos > 0 and buf.count(b"\n") <= max_lines:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = [ln for ln in buf.split(b"\n") if ln.strip()]
+    return lines[-max_lines:] if max_lines else []
+
+
+def read_recent_logs(path: str = LOG_PATH, max_lines: int = 30) -> List[str]:
+    if not os.path.exists(path):
+        return []
     try:
-        with open(LOG_PATH, "r", encoding="utf-8") as f:
-            for line in f.readlines()[-max_lines:]:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line)
-                    # keep only a few fields to keep it tidy and remove sensitive/long bits
-                    keep = {k: obj.get(k) for k in ("ts", "level", "action", "method", "path", "status", "latencyMs", "params", "reqId") if k in obj}
-                    if isinstance(keep.get("params"), dict):
-                        p = dict(keep["params"])  # copy
-                        # drop long/sensitive values
-                        p.pop("signature", None)
-                        keep["params"] = p
-                    lines.append(_truncate(json.dumps(keep)))
-                except Exception:
-                    # non-JSON or corrupted line, include as-is
-                    lines.append(_truncate(line))
-    except Exception as e:
-        lines.append(f"<error reading log: {e}>")
+        raw = tail_lines(path, max_lines)
+    except OSError as e:
+        return [f"<error reading log: {e}>"]
+    lines = []
+    for line in raw:
+        try:
+            obj = orjson.loads(line)
+            # keep only a few fields to keep it tidy and remove sensitive/long bits
+            keep = {k: obj.get(k) for k in ("ts", "level", "action", "method", "path", "status", "latencyMs", "params", "reqId") if k in obj}
+            if isinstance(keep.get("params"), dict):
+                p = dict(keep["params"])  # copy
+                # drop long/sensitive values
+                p.pop("signature", None)
+                keep["params"] = p
+            lines.append(_truncate(orjson.dumps(keep).decode()))
+        except Exception:
+            # non-JSON or corrupted line, include as-is
+            lines.append(_truncate(line.decode("utf-8", "replace")))
     return lines
 
 
-def build_report():
+def log_files(path: str, archives: bool) -> List[str]:
+    """``path``, preceded by its rotated archives (oldest first) when ``archives``."""
+    files = []
+    if archives:
+        rotated = glob.glob(glob.escape(path) + ".*.gz")
+        files = sorted(rotated, key=lambda p: int(p.rsplit(".", 2)[1]) if p.rsplit(".", 2)[1].isdigit() else 0, reverse=True)
+    return files + ([path] if os.path.exists(path) else [])
+
+
+def iter_records(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for p in paths:
+        with (gzip.open(p, "rb") if p.endswith(".gz") else open(p, "rb")) as f:
+            for line in f:
+                try:
+                    obj = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                if isinstance(obj, dict):
+                    yield obj
+
+
+def _error_code(obj: Dict[str, Any]) -> Any:
+    if "code" in obj:
+        return obj["code"]
+    body = obj.get("body")
+    if isinstance(body, str) and body.startswith("{"):
+        try:
+            return orjson.loads(body).get("code")
+        except (orjson.JSONDecodeError, AttributeError):
+            return None
+    return None
+
+
+class Endpoint:
+    __slots__ = ("count", "errors", "dry_run", "latency")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.dry_run = 0
+        self.latency = Histogram()
+
+
+class TwapRun:
+    __slots__ = ("id", "start", "slices", "last_idx", "sent", "skipped", "errors", "state")
+
+    def __init__(self, job_id: str, start: str, slices: int) -> None:
+        self.id = job_id
+        self.start = start
+        self.slices = slices
+        self.last_idx = 0
+        self.sent = 0
+        self.skipped = 0
+        self.errors = 0
+        self.state = "RUNNING"
+
+
+class LogStats:
+    """Aggregates over log records, fed one at a time; memory does not grow with the number of lines."""
+
+    def __init__(self) -> None:
+        self.lines = 0
+        self.first_ts: Optional[str] = None
+        self.last_ts: Optional[str] = None
+        self.levels: Counter = Counter()
+        self.endpoints: Dict[Tuple[str, str], Endpoint] = {}
+        self.orders_per_min: Counter = Counter()
+        self.errors_per_min: Counter = Counter()
+        self.error_kinds: Counter = Counter()
+        # TWAP parents: open ones by id, finished ones (most recent) plus totals
+        self.twaps: Dict[str, TwapRun] = {}
+        self.twaps_done: Deque[TwapRun] = deque(maxlen=RECENT_JOBS)
+        self.twap_totals: Counter = Counter()
+        # run_grid ladders and rebalancing grids
+        self.ladder_totals: Counter = Counter()
+        self.grids: Dict[str, Dict[str, Any]] = {}
+        self.grids_done: Deque[Dict[str, Any]] = deque(maxlen=RECENT_JOBS)
+        self.grid_totals: Counter = Counter()
+
+    def add(self, obj: Dict[str, Any]) -> None:
+        self.lines += 1
+        ts = str(obj.get("ts", ""))
+        if ts:
+            self.first_ts = self.first_ts or ts
+            self.last_ts = ts
+        minute = ts[:16]
+        level = obj.get("level")
+        self.levels[level] += 1
+        action = obj.get("action")
+        if action in ("http", "http-dryrun"):
+            self._http(obj, action, minute)
+        elif action in ("twap_tick", "twap_skip", "twap_slice", "twap_cancel"):
+            self._twap(obj, action, ts)
+        elif action == "grid_order":
+            if obj.get("idx") == 1:
+                self.ladder_totals["ladders"] += 1
+                self.ladder_totals["levels"] += int(obj.get("levels") or 0)
+        elif action in ("grid_engine", "grid_fill", "grid_place", "grid_amend", "grid_cancel"):
+            self._grid(obj, action, ts)
+        if level == "ERROR":
+            self.errors_per_min[minute] += 1
+            if action != "http":
+                self.error_kinds[(action, "", _error_code(obj))] += 1
+            if action == "batch_order":
+                self.ladder_totals["rejected"] += 1
+
+    def _http(self, obj: Dict[str, Any], action: str, minute: str) -> None:
+        method, path = str(obj.get("method", "")), str(obj.get("path", ""))
+        ep = self.endpoints.get((method, path))
+        if ep is None:
+            ep = self.endpoints[(method, path)] = Endpoint()
+        ep.count += 1
+        status = obj.get("status")
+        if action == "http-dryrun":
+            ep.dry_run += 1
+        elif isinstance(status, int) and status >= 400:
+            ep.errors += 1
+            self.error_kinds[(f"{method} {path}", status, _error_code(obj))] += 1
+        if isinstance(obj.get("latencyMs"), (int, float)):
+            ep.latency.record(obj["latencyMs"] / 1000)
+        if method == "POST" and path in ORDER_PATHS and (action == "http-dryrun" or (isinstance(status, int) and status < 400)):
+            params = obj.get("params")
+            n = 1
+            if path.endswith("batchOrders") and isinstance(params, dict):
+                n = str(params.get("batchOrders", "")).count('"symbol"') or 1
+            self.orders_per_min[minute] += n
+
+    def _twap(self, obj: Dict[str, Any], action: str, ts: str) -> None:
+        key = str(obj.get("twapId") or obj.get("id") or "run_twap")
+        idx = int(obj.get("idx") or 0)
+        run = self.twaps.get(key)
+        if action in ("twap_tick", "twap_skip"):
+            # ids restart with every process and run_twap logs none, so a slice number that does not move on starts a new parent
+            if run is None or idx <= run.last_idx:
+                if run is not None:
+                    self._twap_done(key)
+                run = self.twaps[key] = TwapRun(key, ts, int(obj.get("slices") or 0))
+            run.last_idx = idx
+            if action == "twap_tick":
+                run.sent += 1
+            else:
+                run.skipped += 1
+            if idx >= run.slices:
+                self._twap_done(key)
+        elif action == "twap_slice":
+            # the failed slice was counted as sent with its tick; the parent may already be closed
+            if run is None:
+                self.twap_totals["sent"] -= 1
+                self.twap_totals["errors"] += 1
+                run = next((r for r in reversed(self.twaps_done) if r.id == key), None)
+            if run is not None:
+                run.sent -= 1
+                run.errors += 1
+        elif run is not None:
+            run.state = "CANCELED"
+            self._twap_done(key)
+
+    def _twap_done(self, key: str) -> None:
+        run = self.twaps.pop(key)
+        if run.state == "RUNNING":
+            run.state = "DONE" if run.last_idx >= run.slices else "INCOMPLETE"
+        self.twaps_done.append(run)
+        t = self.twap_totals
+        t["parents"] += 1
+        t[run.state] += 1
+        t["slices"] += run.slices
+        t["sent"] += run.sent
+        t["skipped"] += run.skipped
+        t["errors"] += run.errors
+
+    def _grid(self, obj: Dict[str, Any], action: str, ts: str) -> None:
+        key = str(obj.get("gridId", ""))
+        if action == "grid_engine" and obj.get("event") == "start":
+            self.grids[key] = {"id": key, "start": ts, "symbol": obj.get("symbol"), "levels": obj.get("levels"), "fills": 0, "errors": 0, "state": "RUNNING"}
+            self.grid_totals["grids"] += 1
+            return
+        g = self.grids.get(key)
+        if g is None:
+            return
+        if action == "grid_fill":
+            g["fills"] += 1
+            self.grid_totals["fills"] += 1
+        elif action in ("grid_place", "grid_amend", "grid_cancel") or obj.get("level") == "ERROR":
+            g["errors"] += 1
+            self.grid_totals["errors"] += 1
+        elif obj.get("event") == "stop":
+            g.update(state="STOPPED", placed=obj.get("placed"), amended=obj.get("amended"), canceled=obj.get("canceled"), requests=obj.get("requests"))
+            self.grid_totals["stopped"] += 1
+            self.grids_done.append(self.grids.pop(key))
+
+    def finish(self) -> None:
+        """Close TWAP parents still open at the end of the log (their last slices may still be due)."""
+        for key in list(self.twaps):
+            self._twap_done(key)
+
+
+def scan(paths: List[str]) -> LogStats:
+    stats = LogStats()
+    for obj in iter_records(paths):
+        stats.add(obj)
+    stats.finish()
+    return stats
+
+
+def _series(per_min: Counter, first: Optional[str], last: Optional[str], points: int = SPARK_POINTS) -> Tuple[List[int], int]:
+    """Per-minute counts from ``first`` to ``last`` summed into at most ``points`` buckets; also minutes per bucket."""
+    if not per_min or not first or not last:
+        return [], 1
+    try:
+        t0 = datetime.fromisoformat(first[:16]).timestamp()
+        t1 = datetime.fromisoformat(last[:16]).timestamp()
+    except ValueError:
+        return [], 1
+    span = max(1, int((t1 - t0) // 60) + 1)
+    width = -(-span // points)
+    out = [0] * -(-span // width)
+    for minute, c in per_min.items():
+        try:
+            m = int((datetime.fromisoformat(minute).timestamp() - t0) // 60)
+        except ValueError:
+            continue
+        if 0 <= m < span:
+            out[m // width] += c
+    return out, width
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}"
+
+
+def _heading(pdf: FPDF, epw: float, text: str) -> None:
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.cell(epw, 8, text, ln=True)
+    pdf.set_font("Helvetica", size=9)
+
+
+def _table(pdf: FPDF, header: List[str], rows: List[List[Any]], widths: List[float]) -> None:
+    pdf.set_font("Helvetica", "B", 8)
+    for h, w in zip(header, widths):
+        pdf.cell(w, 5, h, border="B")
+    pdf.ln()
+    pdf.set_font("Helvetica", size=8)
+    for row in rows:
+        for i, (v, w) in enumerate(zip(row, widths)):
+            s = str(v)
+            while s and pdf.get_string_width(s) > w - 1:
+                s = s[:-1]
+            pdf.cell(w, 5, s, align="L" if i == 0 else "R")
+        pdf.ln()
+    pdf.ln(2)
+
+
+def _sparkline(pdf: FPDF, label: str, values: List[int], w: float, h: float = 12) -> None:
+    """``label`` with total and peak, then a polyline of ``values`` scaled to ``w`` x ``h``."""
+    pdf.set_font("Helvetica", size=9)
+    peak = max(values) if values else 0
+    pdf.cell(w, 5, f"{label}: total {sum(values)}, peak {peak}", ln=True)
+    x0, y0 = pdf.get_x(), pdf.get_y()
+    pdf.set_draw_color(200, 200, 200)
+    pdf.line(x0, y0 + h, x0 + w, y0 + h)
+    if len(values) > 1 and peak:
+        pdf.set_draw_color(30, 90, 180)
+        step = w / (len(values) - 1)
+        pdf.polyline([(x0 + i * step, y0 + h - v / peak * h) for i, v in enumerate(values)])
+    pdf.set_draw_color(0, 0, 0)
+    pdf.set_y(y0 + h + 3)
+
+
+def _activity(pdf: FPDF, epw: float, stats: LogStats) -> None:
+    _heading(pdf, epw, "Activity")
+    levels = ", ".join(f"{k}: {v}" for k, v in stats.levels.most_common())
+    pdf.multi_cell(epw, 5, f"{stats.lines} records from {stats.first_ts or '-'} to {stats.last_ts or '-'} ({levels or 'none'})")
+    pdf.ln(1)
+    orders, width = _series(stats.orders_per_min, stats.first_ts, stats.last_ts)
+    errors, _ = _series(stats.errors_per_min, stats.first_ts, stats.last_ts)
+    _sparkline(pdf, f"Orders sent per {width} min", orders, epw)
+    _sparkline(pdf, f"Errors per {width} min", errors, epw)
+    if stats.orders_per_min:
+        busiest = stats.orders_per_min.most_common(1)[0]
+        minutes = len(stats.orders_per_min)
+        pdf.multi_cell(epw, 5, f"Orders per active minute: mean {sum(stats.orders_per_min.values()) / minutes:.1f}, max {busiest[1]} at {busiest[0]}")
+        pdf.ln(1)
+
+    _heading(pdf, epw, "Latency per endpoint (ms)")
+    rows = []
+    for (method, path), ep in sorted(stats.endpoints.items(), key=lambda kv: -kv[1].count):
+        h = ep.latency
+        lat = [_ms(h.quantile(q)) for q in (0.5, 0.9, 0.99)] + [_ms(h.max_us / 1e6)] if h.count else ["-"] * 4
+        rows.append([f"{method} {path}", ep.count, ep.dry_run, ep.errors, f"{ep.errors / max(1, ep.count - ep.dry_run):.1%}", *lat])
+    if rows:
+        _table(pdf, ["endpoint", "count", "dry-run", "errors", "error %", "p50", "p90", "p99", "max"], rows, [62, 16, 16, 14, 16, 14, 14, 14, 14])
+    else:
+        pdf.multi_cell(epw, 5, "No HTTP requests logged.")
+
+    _heading(pdf, epw, "Errors")
+    if stats.error_kinds:
+        rows = [[src, status, code if code is not None else "", n] for (src, status, code), n in stats.error_kinds.most_common(15)]
+        _table(pdf, ["source", "status", "code", "count"], rows, [100, 25, 30, 25])
+    else:
+        pdf.multi_cell(epw, 5, "No errors.")
+
+    _heading(pdf, epw, "TWAP completion")
+    t = stats.twap_totals
+    if t["parents"]:
+        pdf.multi_cell(epw, 5, f"{t['parents']} parents ({t['DONE']} done, {t['CANCELED']} canceled, {t['INCOMPLETE']} incomplete); slices: {t['sent']} sent, {t['skipped']} skipped, {t['errors']} failed of {t['slices']}")
+        rows = [[r.id, r.start, r.state, r.slices, r.sent, r.skipped, r.errors, f"{r.sent / max(1, r.slices):.0%}"] for r in stats.twaps_done]
+        _table(pdf, ["parent", "start", "state", "slices", "sent", "skipped", "failed", "done"], rows, [26, 44, 26, 16, 16, 18, 16, 16])
+    else:
+        pdf.multi_cell(epw, 5, "No TWAP runs.")
+
+    _heading(pdf, epw, "Grid completion")
+    lt, gt = stats.ladder_totals, stats.grid_totals
+    if not lt["ladders"] and not gt["grids"]:
+        pdf.multi_cell(epw, 5, "No grid runs.")
+    if lt["ladders"]:
+        pdf.multi_cell(epw, 5, f"{lt['ladders']} ladders, {lt['levels']} levels, {lt['rejected']} rejected by the exchange ({(lt['levels'] - lt['rejected']) / max(1, lt['levels']):.1%} placed)")
+        pdf.ln(1)
+    if gt["grids"]:
+        pdf.multi_cell(epw, 5, f"{gt['grids']} rebalancing grids ({gt['stopped']} stopped), {gt['fills']} fills, {gt['errors']} order errors")
+        rows = [[g["id"], g["start"], g.get("symbol"), g["state"], g.get("levels"), g["fills"], g.get("placed", ""), g.get("amended", ""), g["errors"]] for g in list(stats.grids_done) + list(stats.grids.values())]
+        _table(pdf, ["grid", "start", "symbol", "state", "levels", "fills", "placed", "amended", "errors"], rows[-RECENT_JOBS:], [22, 42, 22, 20, 14, 14, 14, 16, 14])
+
+
+def build_report(log_path: str = LOG_PATH, out_path: str = OUT_PATH, archives: bool = False, tail: int = 24) -> None:
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.set_margins(15, 15, 15)
@@ -88,20 +452,28 @@ def build_report():
         pdf.multi_cell(epw, 6, line)
     pdf.ln(2)
 
+    _activity(pdf, epw, scan(log_files(log_path, archives)))
+
     # Recent logs
     pdf.set_font("Helvetica", "B", 14)
-    pdf.cell(epw, 8, "Recent bot.log entries", ln=True)
+    pdf.cell(epw, 8, f"Recent {os.path.basename(log_path)} entries", ln=True)
     pdf.set_font("Helvetica", size=9)
-    logs = read_recent_logs(24)
+    logs = read_recent_logs(log_path, tail)
     if not logs:
         pdf.multi_cell(epw, 5, "No log entries found.")
     else:
         for ln in logs:
             pdf.multi_cell(epw, 5, ln)
 
-    pdf.output(OUT_PATH)
-    print(f"Wrote {OUT_PATH}")
+    pdf.output(out_path)
+    print(f"Wrote {out_path}")
 
 
 if __name__ == "__main__":
-    build_report()
+    ap = argparse.ArgumentParser(description="Build a PDF report from bot.log")
+    ap.add_argument("--log", default=LOG_PATH)
+    ap.add_argument("--out", default=OUT_PATH)
+    ap.add_argument("--archives", action="store_true", help="include rotated <log>.N.gz files")
+    ap.add_argument("--tail", type=int, default=24, help="recent entries to list")
+    a = ap.parse_args()
+    build_report(a.log, a.out, archives=a.archives, tail=a.tail)
@@ -1,19 +1,44 @@
+"""Command-line entry point.
+
+Only ``argparse`` is imported up front. Each subcommand imports the client and
+strategy modules it uses, so ``--help`` and commands forwarded to a daemon never
+load ``httpx`` or the strategies, and ``rich`` is only loaded to print to a
+terminal; piped output is one JSON document per result.
+"""
 from __future__ import annotations
 import argparse
+import json
 import os
 import sys
-from typing import Optional
-from rich import print as rprint
+import time
+from typing import TYPE_CHECKING, Any, List, NoReturn, Optional
+
+if TYPE_CHECKING:
+    from .utils import AsyncBinanceClient, BinanceClient
 
-from .utils import Logger, BinanceClient, get_env_flag
-from .orders import market_order, limit_order
-from advanced.stop_limit import place_stop_limit
-from advanced.oco import place_oco
-from advanced.twap import run_twap
-from advanced.grid import run_grid
+
+def rprint(obj: Any) -> None:
+    if sys.stdout.isatty():
+        from rich import print as rich_print
+        rich_print(obj)
+    elif isinstance(obj, str):
+        print(obj)
+    else:
+        print(json.dumps(obj, default=str))
+
+
+def fail(msg: str) -> NoReturn:
+    if sys.stdout.isatty():
+        rprint(f"[red]{msg}[/red]")
+    else:
+        print(msg, file=sys.stderr)
+    sys.exit(1)
 
 
 def make_client(args) -> BinanceClient:
+    from .utils import BinanceClient, Logger
+    if getattr(args, "base_url", None):
+        os.environ["BINANCE_FAPI_URL"] = args.base_url
     logger = Logger()
     # If --testnet provided, force mainnet False; otherwise use --mainnet flag
     mainnet = False
@@ -25,9 +50,36 @@ def make_client(args) -> BinanceClient:
     return client
 
 
-def cmd_order(args) -> None:
+def make_async_client(args) -> AsyncBinanceClient:
+    from .utils import AsyncBinanceClient, Logger
+    if getattr(args, "base_url", None):
+        os.environ["BINANCE_FAPI_URL"] = args.base_url
     logger = Logger()
+    mainnet = False if getattr(args, "testnet", False) else bool(getattr(args, "mainnet", False))
+    return AsyncBinanceClient(api_key=os.getenv("BINANCE_API_KEY"), api_secret=os.getenv("BINANCE_API_SECRET"), mainnet=mainnet, logger=logger, dry_run=args.dry_run)
+
+
+def report_metrics(args) -> None:
+    from .metrics import REGISTRY
+    if getattr(args, "metrics_file", None):
+        REGISTRY.write_prometheus(args.metrics_file)
+    if not getattr(args, "metrics", False):
+        return
+    from rich import print as rich_print
+    from rich.table import Table
+    cols = ("method", "path", "count", "errors", "retries", "timeouts", "dry_run", "p50Ms", "p90Ms", "p99Ms", "maxMs")
+    table = Table(title="Request metrics")
+    for c in cols:
+        table.add_column(c)
+    for row in REGISTRY.summary():
+        table.add_row(*(str(row.get(c, "")) for c in cols))
+    rich_print(table)
+
+
+def cmd_order(args) -> None:
+    from .orders import market_order, limit_order
     client = make_client(args)
+    logger = client.logger
     # correlate logs for this command
     import uuid
     client.current_req_id = str(uuid.uuid4())
@@ -39,19 +91,18 @@ def cmd_order(args) -> None:
         res = market_order(client, logger, symbol=args.symbol, side=args.side, quantity=args.qty, reduce_only=args.reduce_only, position_side=args.position_side)
     elif args.type.upper() == "LIMIT":
         if args.price is None:
-            rprint("[red]--price is required for LIMIT orders[/red]")
-            sys.exit(1)
+            fail("--price is required for LIMIT orders")
         res = limit_order(client, logger, symbol=args.symbol, side=args.side, quantity=args.qty, price=args.price, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side)
     else:
-        rprint(f"[red]Unsupported type: {args.type}[/red]")
-        sys.exit(1)
+        fail(f"Unsupported type: {args.type}")
 
     rprint({k: res.get(k) for k in ("orderId", "symbol", "status", "price", "origQty", "type", "side") if k in res})
 
 
 def cmd_stop_limit(args) -> None:
-    logger = Logger()
+    from advanced.stop_limit import place_stop_limit
     client = make_client(args)
+    logger = client.logger
     import uuid
     client.current_req_id = str(uuid.uuid4())
     if args.leverage:
@@ -61,35 +112,335 @@ def cmd_stop_limit(args) -> None:
 
 
 def cmd_oco(args) -> None:
-    logger = Logger()
+    import asyncio
+    if args.watch:
+        return asyncio.run(_cmd_oco_watch(args))
+    if args.concurrent:
+        return asyncio.run(_cmd_oco_async(args))
+    from advanced.oco import place_oco
     client = make_client(args)
+    logger = client.logger
     import uuid
     client.current_req_id = str(uuid.uuid4())
     if args.leverage:
         client.set_leverage(args.symbol, args.leverage)
-    res = place_oco(client, logger, symbol=args.symbol, side=args.side, quantity=args.qty, take_profit=args.take_profit, stop=args.stop, stop_limit=args.stop_limit, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side)
+    res = place_oco(client, logger, symbol=args.symbol, side=args.side, quantity=args.qty, take_profit=args.take_profit, stop=args.stop, stop_limit=args.stop_limit, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side, batch=args.batch)
+    rprint(res)
+
+
+async def _cmd_oco_async(args) -> None:
+    import uuid
+    from advanced.oco import place_oco_async
+    async with make_async_client(args) as client:
+        client.current_req_id = str(uuid.uuid4())
+        if args.leverage:
+            await client.set_leverage(args.symbol, args.leverage)
+        res = await place_oco_async(client, client.logger, symbol=args.symbol, side=args.side, quantity=args.qty, take_profit=args.take_profit, stop=args.stop, stop_limit=args.stop_limit, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side, batch=args.batch)
     rprint(res)
 
 
+async def _cmd_oco_watch(args) -> None:
+    import asyncio
+    from src.user_stream import UserDataStream
+    from advanced.oco_manager import BracketStore, OcoManager
+    async with make_async_client(args) as client:
+        if args.leverage:
+            await client.set_leverage(args.symbol, args.leverage)
+        stream = UserDataStream(client)
+        manager = OcoManager(client, stream, client.logger, BracketStore(args.state_db))
+        task = asyncio.create_task(stream.run())
+        try:
+            await stream.wait_connected()
+            # also finish any brackets a previous run left open
+            recovered = await manager.recover()
+            if recovered:
+                rprint(f"recovered {recovered} open bracket(s)")
+            b = await manager.open(symbol=args.symbol, side=args.side, quantity=args.qty, take_profit=args.take_profit, stop=args.stop, stop_limit=args.stop_limit, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side)
+            rprint({"bracketId": b.id, **{k: leg.order_id for k, leg in b.legs.items()}})
+            while manager.brackets:
+                await asyncio.sleep(0.5)
+            await manager.drain()
+            rprint({"bracketId": b.id, "state": b.state, "filled": str(b.filled)})
+        finally:
+            await stream.close()
+            await task
+
+
 def cmd_twap(args) -> None:
-    logger = Logger()
+    from advanced.twap import run_twap
     client = make_client(args)
+    logger = client.logger
     import uuid
     client.current_req_id = str(uuid.uuid4())
     if args.leverage:
         client.set_leverage(args.symbol, args.leverage)
-    run_twap(client, logger, symbol=args.symbol, side=args.side, qty=args.qty, slices=args.slices, interval=args.interval, order_type=args.type, price=args.price, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side)
+    market = None
+    if args.type == "LIMIT" and args.price is None:
+        # no fixed price: each slice joins the current touch
+        from .market_data import MarketData
+        market = MarketData(client, [args.symbol], depth=False)
+        market.start_in_thread()
+        if not market.connected.wait(10):
+            fail("market data stream did not connect")
+        for _ in range(100):
+            if market.touch(args.symbol, args.side) is not None:
+                break
+            time.sleep(0.05)
+    try:
+        res = run_twap(client, logger, symbol=args.symbol, side=args.side, qty=args.qty, slices=args.slices, interval=args.interval, order_type=args.type, price=args.price, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side, late=args.late, market=market)
+    except ValueError as e:
+        fail(str(e))
+    finally:
+        if market is not None:
+            market.stop()
+    if res["errors"]:
+        fail(f"{res['errors']} of {res['slices']} twap slices failed (see the log)")
+    report_metrics(args)
 
 
 def cmd_grid(args) -> None:
-    logger = Logger()
-    client = make_client(args)
+    if args.rebalance:
+        import asyncio
+        asyncio.run(_cmd_grid_rebalance(args))
+        return report_metrics(args)
+    if args.side is None:
+        fail("--side is required unless --rebalance")
+    try:
+        if args.concurrent:
+            import asyncio
+            asyncio.run(_cmd_grid_async(args))
+            return report_metrics(args)
+        from advanced.grid import run_grid
+        client = make_client(args)
+        logger = client.logger
+        import uuid
+        client.current_req_id = str(uuid.uuid4())
+        if args.leverage:
+            client.set_leverage(args.symbol, args.leverage)
+        run_grid(client, logger, symbol=args.symbol, side=args.side, levels=args.levels, lower=args.lower, upper=args.upper, qty=args.qty, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side, batch=args.batch)
+    except ValueError as e:
+        # the whole ladder is validated up front: nothing was sent
+        fail(str(e))
+    report_metrics(args)
+
+
+async def _cmd_grid_async(args) -> None:
     import uuid
-    client.current_req_id = str(uuid.uuid4())
-    if args.leverage:
-        client.set_leverage(args.symbol, args.leverage)
-    run_grid(client, logger, symbol=args.symbol, side=args.side, levels=args.levels, lower=args.lower, upper=args.upper, qty=args.qty, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side)
+    from advanced.grid import run_grid_async
+    async with make_async_client(args) as client:
+        client.current_req_id = str(uuid.uuid4())
+        if args.leverage:
+            await client.set_leverage(args.symbol, args.leverage)
+        await run_grid_async(client, client.logger, symbol=args.symbol, side=args.side, levels=args.levels, lower=args.lower, upper=args.upper, qty=args.qty, tif=args.tif, reduce_only=args.reduce_only, position_side=args.position_side, batch=args.batch)
+
 
+async def _cmd_grid_rebalance(args) -> None:
+    import asyncio
+    import signal
+    from .market_data import MarketData
+    from .user_stream import UserDataStream
+    from advanced.grid_engine import GridEngine
+    async with make_async_client(args) as client:
+        if args.leverage:
+            await client.set_leverage(args.symbol, args.leverage)
+        stream = UserDataStream(client)
+        market = MarketData(client, [args.symbol], depth=False)
+        tasks = [asyncio.create_task(stream.run()), asyncio.create_task(market.run())]
+        engine = GridEngine(
+            client, stream, client.logger, symbol=args.symbol, levels=args.levels, lower=args.lower, upper=args.upper, qty=args.qty,
+            tif=args.tif, position_side=args.position_side, market=market, trail=args.trail,
+        )
+        interrupted = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, interrupted.set)
+        try:
+            await stream.wait_connected()
+            await market.wait_connected()
+            if args.price is None:
+                # the ladder is split around the mark, so wait for the first one
+                while market.mark(args.symbol) is None:
+                    await asyncio.sleep(0.05)
+            await engine.start(price=args.price)
+            rprint(engine.progress())
+            tasks.append(asyncio.create_task(engine.run()))
+            await interrupted.wait()
+            rprint(await engine.stop(cancel=not args.keep_orders))
+        finally:
+            await stream.close()
+            await market.close()
+            await asyncio.gather(*tasks)
+
+
+def cmd_amend(args) -> None:
+    import httpx
+    from .orders import amend_order
+    client = make_client(args)
+    try:
+        res = amend_order(client, client.logger, symbol=args.symbol, side=args.side, quantity=args.qty, price=args.price, order_id=args.order_id, client_order_id=args.client_order_id)
+    except ValueError as e:
+        fail(str(e))
+    except httpx.HTTPStatusError as e:
+        # -2013 (gone or not a LIMIT order) and -5027 (nothing to change) are answers, not crashes
+        fail(f"HTTP {e.response.status_code}: {e.response.text}")
+    rprint({k: res.get(k) for k in ("orderId", "symbol", "status", "price", "origQty", "type", "side") if k in res})
+
+
+def cmd_cancel(args) -> None:
+    symbols = [x for x in args.symbol.upper().split(",") if x]
+    if args.all:
+        if args.order_id or args.client_order_id:
+            fail("--all cancels every order of the symbols; drop --order-id/--client-order-id")
+        if len(symbols) > 1:
+            import asyncio
+            return asyncio.run(_cmd_cancel_all(args, symbols))
+        from advanced.flatten import cancel_all
+        client = make_client(args)
+        return rprint(cancel_all(client, client.logger, symbols))
+    if len(symbols) != 1:
+        fail("one --symbol per cancel unless --all")
+    import httpx
+    from .orders import cancel_orders
+    client = make_client(args)
+    try:
+        rprint(cancel_orders(client, client.logger, symbol=symbols[0], order_ids=args.order_id, client_order_id=args.client_order_id))
+    except ValueError as e:
+        fail(str(e))
+    except httpx.HTTPStatusError as e:
+        fail(f"HTTP {e.response.status_code}: {e.response.text}")
+
+
+async def _cmd_cancel_all(args, symbols) -> None:
+    from advanced.flatten import cancel_all_async
+    async with make_async_client(args) as client:
+        rprint(await cancel_all_async(client, client.logger, symbols))
+
+
+def cmd_flatten(args) -> None:
+    import asyncio
+
+    async def run() -> None:
+        from advanced.flatten import flatten_async
+        async with make_async_client(args) as client:
+            symbols = [x for x in (args.symbols or "").upper().split(",") if x]
+            rprint(await flatten_async(client, client.logger, symbols=symbols or None))
+    asyncio.run(run())
+
+
+def cmd_pool(args) -> None:
+    from .pool import ExecutionPool, accounts_from_env
+    if args.base_url:
+        # inherited by the workers
+        os.environ["BINANCE_FAPI_URL"] = args.base_url
+    try:
+        accounts = accounts_from_env([x for x in args.accounts.split(",") if x])
+    except ValueError as e:
+        fail(str(e))
+    default = next(iter(accounts))
+    f = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    with f, ExecutionPool(accounts, workers=args.workers, mainnet=args.mainnet and not args.testnet, dry_run=args.dry_run) as pool:
+        seqs = []
+        for line in f:
+            if line.strip():
+                t = json.loads(line)
+                seqs.append(pool.submit(t.get("account", default), t["cmd"], t.get("args") or {}))
+        for seq in seqs:
+            rprint(pool.result(seq))
+
+
+def _floats(s: str) -> List[float]:
+    return [float(x) for x in s.split(",") if x]
+
+
+def cmd_backtest(args) -> None:
+    # offline: no client, no keys, no network
+    from advanced import backtest as bt
+    try:
+        bars = bt.load_agg_trades(args.data) if args.agg_trades else bt.load_klines(args.data)
+        if args.strategy == "twap":
+            res = bt.simulate_twap(
+                bars, side=args.side, qty=args.qty, slices=args.slices, interval=args.interval, order_type=args.type, price=args.price,
+                start=args.start, slippage_bps=args.slippage_bps, fee_bps=args.fee_bps,
+            )
+        elif args.strategy == "ladder":
+            res = bt.simulate_ladder(bars, side=args.side, levels=args.levels, lower=args.lower, upper=args.upper, qty=args.qty, fee_bps=args.fee_bps)
+        else:
+            configs = bt.grid_configs(_floats(args.lower), _floats(args.upper), [int(x) for x in args.levels.split(",") if x], args.qty, args.fee_bps)
+            if not configs:
+                fail("no config with lower < upper")
+            if len(configs) == 1:
+                return rprint(bt.simulate_grid(bars, **configs[0]))
+            t0 = time.perf_counter()
+            results = bt.sweep_grid(bars, configs, workers=args.workers)
+            results.sort(key=lambda r: r["pnl"], reverse=True)
+            return rprint({"configs": len(results), "bars": len(bars), "seconds": round(time.perf_counter() - t0, 3), "top": results[:args.top]})
+    except (OSError, ValueError) as e:
+        fail(str(e))
+    if not args.fills:
+        res.pop("fills")
+    rprint(res)
+
+
+def cmd_orders(args) -> None:
+    # straight from the local journal: no client, no REST call
+    from .env import getenv
+    from .journal import DEFAULT_JOURNAL_DB, OrderJournal
+    # after .env is read, as the client does, so both open the same database
+    args.journal = args.journal or getenv("BOT_ORDER_JOURNAL", DEFAULT_JOURNAL_DB)
+    if not os.path.exists(args.journal):
+        fail(f"no order journal at {args.journal}")
+    if args.refresh and not (args.client_order_id or args.pending):
+        # the client journals what it finds into the same database
+        os.environ["BOT_ORDER_JOURNAL"] = args.journal
+        client = make_client(args)
+        try:
+            rprint(client.reconcile_journal(args.symbol))
+        finally:
+            client.journal.close()
+        return
+    journal = OrderJournal(args.journal)
+    try:
+        if args.client_order_id:
+            rprint(journal.history(args.client_order_id))
+        else:
+            rprint(journal.pending() if args.pending else journal.open_orders(args.symbol))
+    finally:
+        journal.close()
+
+
+def cmd_daemon(args) -> None:
+    import asyncio
+    from .daemon import Daemon
+    from .env import getenv
+    from .rpc import DEFAULT_SOCKET
+    args.socket = args.socket or getenv("BOT_DAEMON_SOCKET", DEFAULT_SOCKET)
+
+    async def run() -> None:
+        async with make_async_client(args) as client:
+            symbols = [x for x in (args.symbols or "").upper().split(",") if x]
+            await Daemon(client, state_db=args.state_db).serve(args.socket, warm=symbols)
+    try:
+        asyncio.run(run())
+    except RuntimeError as e:
+        fail(str(e))
+
+
+# connection settings belong to the daemon; everything else is forwarded as-is
+_LOCAL_ARGS = {"func", "cmd", "socket", "mainnet", "testnet", "base_url", "metrics", "metrics_file"}
+
+
+def forward(args) -> None:
+    """Run the command on the daemon listening on ``args.socket`` instead of in this process."""
+    from .rpc import DaemonClient, DaemonError
+    payload = {k: v for k, v in vars(args).items() if k not in _LOCAL_ARGS}
+    try:
+        with DaemonClient(args.socket) as daemon:
+            res = daemon.call(args.cmd, payload)
+    except OSError as e:
+        fail(f"no daemon on {args.socket}: {e}")
+    except DaemonError as e:
+        fail(str(e))
+    rprint(res)
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -97,30 +448,39 @@ def build_parser() -> argparse.ArgumentParser:
     sub = p.add_subparsers(required=True)
 
     # Shared flags function
-    def add_common(o):
+    def add_common(o, side_required=True):
         o.add_argument("--symbol", required=True)
-        o.add_argument("--side", required=True, choices=["BUY", "SELL"])
+        o.add_argument("--side", required=side_required, choices=["BUY", "SELL"])
         o.add_argument("--qty", type=float, required=True)
         o.add_argument("--tif", default="GTC", choices=["GTC", "IOC", "FOK"])
         o.add_argument("--reduce-only", action="store_true", dest="reduce_only")
         o.add_argument("--position-side", choices=["LONG", "SHORT"], default=None)
         o.add_argument("--leverage", type=int, default=None)
+        add_connection(o)
+
+    def add_connection(o):
         o.add_argument("--mainnet", action="store_true")
         o.add_argument("--testnet", action="store_true")
         o.add_argument("--dry-run", action="store_true", dest="dry_run")
+        o.add_argument("--base-url", dest="base_url", help="REST endpoint override, e.g. a local mock exchange")
+        o.add_argument("--socket", help="forward to the daemon on this Unix socket (default: $BOT_DAEMON_SOCKET)")
+
+    def add_metrics(o):
+        o.add_argument("--metrics", action="store_true", help="print per-endpoint request metrics when done")
+        o.add_argument("--metrics-file", dest="metrics_file", help="write Prometheus text-format metrics to this file")
     # order
     po = sub.add_parser("order", help="Place MARKET or LIMIT order")
     add_common(po)
     po.add_argument("--type", required=True, choices=["MARKET", "LIMIT"])
     po.add_argument("--price", type=float)
-    po.set_defaults(func=cmd_order)
+    po.set_defaults(func=cmd_order, cmd="order")
 
     # stop-limit
     ps = sub.add_parser("stop-limit", help="Place STOP_LIMIT order")
     add_common(ps)
     ps.add_argument("--stop", type=float, required=True)
     ps.add_argument("--price", type=float, required=True)
-    ps.set_defaults(func=cmd_stop_limit)
+    ps.set_defaults(func=cmd_stop_limit, cmd="stop-limit")
 
     # oco
     po2 = sub.add_parser("oco", help="Place OCO bracket (TP + SL)")
@@ -128,24 +488,134 @@ def build_parser() -> argparse.ArgumentParser:
     po2.add_argument("--take-profit", type=float, required=True)
     po2.add_argument("--stop", type=float, required=True)
     po2.add_argument("--stop-limit", type=float, required=True)
-    po2.set_defaults(func=cmd_oco)
+    po2.add_argument("--concurrent", action="store_true", help="send both legs in parallel (async client)")
+    po2.add_argument("--no-batch", action="store_false", dest="batch", help="send legs as separate orders instead of one batchOrders request")
+    po2.add_argument("--watch", action="store_true", help="stay running and cancel/resize the other leg on fills (user data stream)")
+    po2.add_argument("--state-db", dest="state_db", default="oco_brackets.db", help="bracket state for --watch crash recovery")
+    po2.set_defaults(func=cmd_oco, cmd="oco")
 
     # twap
-    pt = sub.add_parser("twap", help="Run TWAP strategy")
+    pt = sub.add_parser("twap", help="Run TWAP strategy", description="Run TWAP strategy. A failed slice is logged and skipped, the remaining slices still run; the command exits non-zero if any slice failed.")
     add_common(pt)
     pt.add_argument("--slices", type=int, required=True)
     pt.add_argument("--interval", type=float, required=True, help="seconds between orders")
     pt.add_argument("--type", choices=["MARKET", "LIMIT"], default="MARKET")
-    pt.add_argument("--price", type=float)
-    pt.set_defaults(func=cmd_twap)
+    pt.add_argument("--price", type=float, help="LIMIT price; omit to join the best bid/ask from the market-data stream")
+    pt.add_argument("--late", choices=["catch_up", "skip"], default="catch_up", help="what to do with a slice that is overdue when the next one is due")
+    pt.add_argument("--detach", action="store_true", help="with --socket: return once scheduled instead of when done")
+    add_metrics(pt)
+    pt.set_defaults(func=cmd_twap, cmd="twap")
 
     # grid
     pg = sub.add_parser("grid", help="Run Grid strategy")
-    add_common(pg)
+    add_common(pg, side_required=False)
     pg.add_argument("--levels", type=int, required=True)
     pg.add_argument("--lower", type=float, required=True)
     pg.add_argument("--upper", type=float, required=True)
-    pg.set_defaults(func=cmd_grid)
+    pg.add_argument("--concurrent", action="store_true", help="place all levels in parallel (async client)")
+    pg.add_argument("--no-batch", action="store_false", dest="batch", help="one request per level instead of batchOrders chunks")
+    pg.add_argument("--rebalance", action="store_true", help="keep a two-sided ladder live: re-quote behind every fill until interrupted (--side is not used)")
+    pg.add_argument("--trail", action="store_true", help="with --rebalance: slide the ladder after the mark when it leaves the range")
+    pg.add_argument("--keep-orders", action="store_true", dest="keep_orders", help="with --rebalance: leave the ladder on the book on exit")
+    pg.add_argument("--price", type=float, help="with --rebalance: price to split the ladder into BUYs and SELLs at (default: the mark)")
+    add_metrics(pg)
+    pg.set_defaults(func=cmd_grid, cmd="grid")
+
+    # amend
+    pa = sub.add_parser("amend", help="Change the price/quantity of a resting LIMIT order in place")
+    pa.add_argument("--symbol", required=True)
+    pa.add_argument("--side", required=True, choices=["BUY", "SELL"], help="the order's side (required by the exchange)")
+    pa.add_argument("--qty", type=float, required=True)
+    pa.add_argument("--price", type=float, required=True)
+    pa.add_argument("--order-id", type=int, dest="order_id")
+    pa.add_argument("--client-order-id", dest="client_order_id")
+    add_connection(pa)
+    pa.set_defaults(func=cmd_amend, cmd="amend")
+
+    # cancel
+    pc = sub.add_parser("cancel", help="Cancel orders by id, or every open order of one or more symbols")
+    pc.add_argument("--symbol", required=True, help="with --all: comma-separated symbols, cancelled concurrently")
+    pc.add_argument("--order-id", type=int, nargs="+", dest="order_id", help="one or more orderIds; several go out as batchOrders cancels")
+    pc.add_argument("--client-order-id", dest="client_order_id")
+    pc.add_argument("--all", action="store_true", help="every open order of the symbols, stop orders included (allOpenOrders)")
+    add_connection(pc)
+    # the daemon's own `cancel` stops jobs
+    pc.set_defaults(func=cmd_cancel, cmd="cancel-orders")
+
+    # flatten
+    pf = sub.add_parser("flatten", help="Cancel all open orders, then close all positions at market")
+    pf.add_argument("--symbols", help="comma-separated; default: every symbol with an open order or a position")
+    add_connection(pf)
+    pf.set_defaults(func=cmd_flatten, cmd="flatten")
+
+    # pool
+    pp = sub.add_parser("pool", help="Run a file of commands on a process pool, sharded by (account, symbol)")
+    pp.add_argument("--file", required=True, help='JSON lines like {"account": "main", "cmd": "order", "args": {...}} (args as for the daemon); - for stdin')
+    pp.add_argument("--accounts", default="default", help="comma-separated names; keys from BINANCE_API_KEY_<NAME>/BINANCE_API_SECRET_<NAME>")
+    pp.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    pp.add_argument("--mainnet", action="store_true")
+    pp.add_argument("--testnet", action="store_true")
+    pp.add_argument("--dry-run", action="store_true", dest="dry_run")
+    pp.add_argument("--base-url", dest="base_url", help="REST endpoint override, e.g. a local mock exchange")
+    pp.set_defaults(func=cmd_pool)
+
+    # backtest
+    pb = sub.add_parser("backtest", help="Replay a strategy over historical klines/aggTrades (CSV, or Parquet with pyarrow)")
+    bsub = pb.add_subparsers(dest="strategy", required=True)
+
+    def add_data(o):
+        o.add_argument("--data", required=True, help="kline file (Binance data dump layout), or aggTrades with --agg-trades")
+        o.add_argument("--agg-trades", action="store_true", dest="agg_trades")
+        o.add_argument("--qty", type=float, required=True)
+        o.add_argument("--fee-bps", type=float, default=0.0, dest="fee_bps", help="fee on traded notional, in basis points")
+    bt = bsub.add_parser("twap", help="run_twap: equal slices every --interval seconds")
+    add_data(bt)
+    bt.add_argument("--side", required=True, choices=["BUY", "SELL"])
+    bt.add_argument("--slices", type=int, required=True)
+    bt.add_argument("--interval", type=float, required=True, help="seconds between slices")
+    bt.add_argument("--type", choices=["MARKET", "LIMIT"], default="MARKET")
+    bt.add_argument("--price", type=float, help="LIMIT price; omit to join at each slice's first open")
+    bt.add_argument("--start", type=int, help="epoch ms of the first slice (default: the first bar)")
+    bt.add_argument("--slippage-bps", type=float, default=0.0, dest="slippage_bps", help="MARKET fills this much worse than the open")
+    bt.add_argument("--fills", action="store_true", help="include every fill in the output")
+    bl = bsub.add_parser("ladder", help="run_grid: a one-sided ladder placed once")
+    add_data(bl)
+    bl.add_argument("--side", required=True, choices=["BUY", "SELL"])
+    bl.add_argument("--levels", type=int, required=True)
+    bl.add_argument("--lower", type=float, required=True)
+    bl.add_argument("--upper", type=float, required=True)
+    bl.add_argument("--fills", action="store_true", help="include every fill in the output")
+    bg = bsub.add_parser("grid", help="grid --rebalance; comma-separated values sweep every combination")
+    add_data(bg)
+    bg.add_argument("--levels", required=True, help="e.g. 20,50,100")
+    bg.add_argument("--lower", required=True, help="e.g. 55000,60000")
+    bg.add_argument("--upper", required=True, help="e.g. 70000,75000")
+    bg.add_argument("--workers", type=int, help="sweep processes (default: one per core)")
+    bg.add_argument("--top", type=int, default=10, help="best configs by PnL to print")
+    pb.set_defaults(func=cmd_backtest)
+
+    # orders
+    pj = sub.add_parser("orders", help="List open orders from the local order journal (current while a user data stream runs; see --refresh)")
+    pj.add_argument("--symbol")
+    pj.add_argument("--pending", action="store_true", help="orders sent without an answer from the exchange yet")
+    pj.add_argument("--client-order-id", dest="client_order_id", help="every journal record of one order")
+    pj.add_argument("--journal", help="default: $BOT_ORDER_JOURNAL, else orders.db")
+    pj.add_argument("--refresh", action="store_true", help="first check the journal's open orders against the exchange (openOrders, then a lookup per missing order)")
+    pj.add_argument("--mainnet", action="store_true")
+    pj.add_argument("--testnet", action="store_true")
+    pj.add_argument("--base-url", dest="base_url", help="REST endpoint override, e.g. a local mock exchange")
+    pj.set_defaults(func=cmd_orders, dry_run=False)
+
+    # daemon
+    pd = sub.add_parser("daemon", help="Keep a warm client running and serve commands on a Unix socket")
+    pd.add_argument("--socket", help="default: $BOT_DAEMON_SOCKET, else bot.sock")
+    pd.add_argument("--symbols", help="comma-separated symbols whose filters are loaded up front")
+    pd.add_argument("--mainnet", action="store_true")
+    pd.add_argument("--testnet", action="store_true")
+    pd.add_argument("--dry-run", action="store_true", dest="dry_run")
+    pd.add_argument("--base-url", dest="base_url", help="REST endpoint override, e.g. a local mock exchange")
+    pd.add_argument("--state-db", dest="state_db", default="oco_brackets.db", help="bracket state for oco --watch")
+    pd.set_defaults(func=cmd_daemon)
 
     return p
 
@@ -153,4 +623,11 @@ def build_parser() -> argparse.ArgumentParser:
 if __name__ == "__main__":
     parser = build_parser()
     args = parser.parse_args()
-    args.func(args)
+    if getattr(args, "cmd", None) and not args.socket:
+        # .env is read only when the environment does not already say
+        from .env import getenv
+        args.socket = os.getenv("BOT_DAEMON_SOCKET") or getenv("BOT_DAEMON_SOCKET")
+    if getattr(args, "cmd", None) and args.socket:
+        forward(args)
+    else:
+        args.func(args)
@@ -0,0 +1,335 @@
+"""Long-running bot process serving CLI commands over a Unix domain socket.
+
+    python -m src.cli daemon --socket bot.sock --symbols BTCUSDT,ETHUSDT
+    BOT_DAEMON_SOCKET=bot.sock python -m src.cli order --symbol BTCUSDT ...
+
+The daemon keeps one :class:`AsyncBinanceClient` for its lifetime: the HTTP/2
+connection pool, symbol filters, server-time offset and per-symbol leverage all
+stay warm, so a forwarded command costs one exchange round trip. TWAPs run on a
+shared :class:`TwapEngine`; ``oco --watch`` brackets on one :class:`OcoManager`
+and ``grid --rebalance`` ladders on their own :class:`GridEngine`, all fed by one
+user data stream started on first use.
+
+Protocol: one JSON object per line in each direction. A request is
+``{"id": 1, "cmd": "order", "args": {...}}`` with ``args`` named like the CLI
+flags; the reply is ``{"id": 1, "ok": true, "result": ...}`` or
+``{"id": 1, "ok": false, "error": "..."}``, plus ``"dryRun": true`` from a daemon
+started with ``--dry-run``. A command whose ``dry_run`` differs from the
+daemon's mode is refused. A connection can carry any number of requests; they
+are answered in order.
+"""
+from __future__ import annotations
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+import orjson
+
+from .orders import amend_order_async, cancel_orders_async, limit_order_async, market_order_async
+from .rpc import DEFAULT_SOCKET, alive
+from .utils import AsyncBinanceClient
+from advanced.flatten import cancel_all_async, flatten_async
+from advanced.grid import run_grid_async
+from advanced.oco import place_oco_async
+from advanced.stop_limit import place_stop_limit_async
+from advanced.twap import TwapEngine
+
+# fields of an order response worth sending back, as `order` prints them
+ORDER_FIELDS = ("orderId", "symbol", "status", "price", "origQty", "type", "side")
+
+
+class Daemon:
+    def __init__(self, client: AsyncBinanceClient, *, state_db: str = "oco_brackets.db") -> None:
+        self.client = client
+        self.logger = client.logger
+        self.state_db = state_db
+        self.twap = TwapEngine(client, self.logger)
+        self.leverage: Dict[str, int] = {}
+        self.started = time.time()
+        self._oco: Any = None
+        self._oco_lock = asyncio.Lock()
+        # grid id -> (engine, its market-data and run tasks)
+        self.grids: Dict[str, Tuple[Any, Any, List[asyncio.Task]]] = {}
+        self._stream: Any = None
+        self._stream_lock = asyncio.Lock()
+        self._stream_task: Optional[asyncio.Task] = None
+        self._stopped = asyncio.Event()
+        # open connection handlers, and the one that asked for shutdown
+        self._conns: Set[asyncio.Task] = set()
+        self._closer: Optional[asyncio.Task] = None
+        self.commands: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+            "ping": self._ping,
+            "order": self._order,
+            "stop-limit": self._stop_limit,
+            "oco": self._oco_cmd,
+            "twap": self._twap,
+            "grid": self._grid,
+            "amend": self._amend,
+            "cancel-orders": self._cancel_orders,
+            "flatten": self._flatten,
+            "jobs": self._jobs,
+            "cancel": self._cancel,
+            "shutdown": self._shutdown,
+        }
+
+    async def serve(self, path: str = DEFAULT_SOCKET, warm: Iterable[str] = ()) -> None:
+        """Listen on ``path`` until a ``shutdown`` command; ``warm`` symbols get their filters preloaded."""
+        if os.path.exists(path):
+            if alive(path):
+                raise RuntimeError(f"a daemon is already listening on {path}")
+            os.unlink(path)
+        # whoever can open the socket can trade: it is created 0600, never briefly wider
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path)
+        finally:
+            os.umask(umask)
+        try:
+            for s in warm:
+                await self.client.symbol_filters(s)
+            if not self.client.dry_run:
+                await self.client.sync_time()
+            self.logger.info(action="daemon", event="listening", socket=path, pid=os.getpid())
+            async with server:
+                await self._stopped.wait()
+        finally:
+            await self._disconnect()
+            await self.close()
+            if os.path.exists(path):
+                os.unlink(path)
+            self.logger.info(action="daemon", event="stopped")
+
+    async def close(self) -> None:
+        """Stop rebalancing grids (cancelling their orders) and the user data stream."""
+        for gid in list(self.grids):
+            await self._stop_grid(gid, cancel=True)
+        if self._stream is not None:
+            await self._stream.close()
+            await self._stream_task
+        if self._oco is not None:
+            self._oco.store.close()
+
+    async def _disconnect(self) -> None:
+        """Close every client connection but the one being answered ``shutdown``, which ends on its own."""
+        for t in self._conns - {self._closer}:
+            t.cancel()
+        await asyncio.gather(*self._conns, return_exceptions=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._conns.add(task)
+        try:
+            while not self._stopped.is_set():
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    req = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    reply: Dict[str, Any] = {"id": None, "ok": False, "error": "malformed request"}
+                else:
+                    reply = await self.dispatch(req)
+                writer.write(orjson.dumps(reply, default=str) + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # the client went away, or the daemon is stopping
+            pass
+        finally:
+            self._conns.discard(task)
+            writer.close()
+
+    async def dispatch(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        rid, cmd = req.get("id"), req.get("cmd")
+        args = req.get("args") or {}
+        fn = self.commands.get(cmd)
+        if fn is None:
+            reply: Dict[str, Any] = {"id": rid, "ok": False, "error": f"unknown command {cmd!r}"}
+        elif "dry_run" in args and bool(args["dry_run"]) != self.client.dry_run:
+            mode = "a dry run; start a live daemon for live commands" if self.client.dry_run else "live; start it with --dry-run for dry-run commands"
+            reply = {"id": rid, "ok": False, "error": f"daemon is {mode}"}
+        else:
+            reply = await self._call(rid, cmd, fn, args)
+        if self.client.dry_run:
+            reply["dryRun"] = True
+        return reply
+
+    async def _call(self, rid: Any, cmd: str, fn: Callable[[Dict[str, Any]], Awaitable[Any]], args: Dict[str, Any]) -> Dict[str, Any]:
+        # task-local: concurrent connections and the jobs they start keep their own id
+        self.client.current_req_id = req_id = str(uuid.uuid4())
+        t0 = time.perf_counter()
+        try:
+            reply = {"id": rid, "ok": True, "result": await fn(args)}
+        except httpx.HTTPStatusError as e:
+            reply = {"id": rid, "ok": False, "error": f"HTTP {e.response.status_code}: {e.response.text}"}
+        except (ValueError, KeyError, TypeError) as e:
+            reply = {"id": rid, "ok": False, "error": str(e) or repr(e)}
+        except Exception as e:
+            reply = {"id": rid, "ok": False, "error": repr(e)}
+        self.logger.info(action="daemon", cmd=cmd, ok=reply["ok"], error=reply.get("error"), latencyMs=round((time.perf_counter() - t0) * 1000, 3), reqId=req_id)
+        return reply
+
+    async def _leverage(self, a: Dict[str, Any]) -> None:
+        lev = a.get("leverage")
+        sym = a["symbol"].upper()
+        if lev and self.leverage.get(sym) != lev:
+            await self.client.set_leverage(sym, lev)
+            self.leverage[sym] = lev
+
+    # Commands
+    async def _ping(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 3), "dryRun": self.client.dry_run}
+
+    async def _order(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        await self._leverage(a)
+        kw = dict(symbol=a["symbol"], side=a["side"], quantity=a["qty"], reduce_only=a.get("reduce_only", False), position_side=a.get("position_side"))
+        kind = a.get("type", "MARKET").upper()
+        if kind == "MARKET":
+            res = await market_order_async(self.client, self.logger, **kw)
+        elif kind == "LIMIT":
+            if a.get("price") is None:
+                raise ValueError("--price is required for LIMIT orders")
+            res = await limit_order_async(self.client, self.logger, price=a["price"], tif=a.get("tif", "GTC"), **kw)
+        else:
+            raise ValueError(f"Unsupported type: {kind}")
+        return {k: res.get(k) for k in ORDER_FIELDS if k in res}
+
+    async def _stop_limit(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        await self._leverage(a)
+        return await place_stop_limit_async(
+            self.client, self.logger, symbol=a["symbol"], side=a["side"], quantity=a["qty"], stop_price=a["stop"], limit_price=a["price"],
+            tif=a.get("tif", "GTC"), reduce_only=a.get("reduce_only", False), position_side=a.get("position_side"),
+        )
+
+    async def _oco_cmd(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        await self._leverage(a)
+        kw = dict(
+            symbol=a["symbol"], side=a["side"], quantity=a["qty"], take_profit=a["take_profit"], stop=a["stop"], stop_limit=a["stop_limit"],
+            tif=a.get("tif", "GTC"), reduce_only=a.get("reduce_only", False), position_side=a.get("position_side"),
+        )
+        if not a.get("watch"):
+            return await place_oco_async(self.client, self.logger, batch=a.get("batch", True), **kw)
+        manager = await self._oco_manager()
+        b = await manager.open(**kw)
+        return {"bracketId": b.id, **{k: leg.order_id for k, leg in b.legs.items()}}
+
+    async def _user_stream(self) -> Any:
+        async with self._stream_lock:
+            if self._stream is None:
+                from .user_stream import UserDataStream
+                self._stream = UserDataStream(self.client)
+                self._stream_task = asyncio.create_task(self._stream.run())
+            await self._stream.wait_connected()
+        return self._stream
+
+    async def _oco_manager(self) -> Any:
+        async with self._oco_lock:
+            if self._oco is None:
+                from advanced.oco_manager import BracketStore, OcoManager
+                manager = OcoManager(self.client, await self._user_stream(), self.logger, BracketStore(self.state_db))
+                await manager.recover()
+                self._oco = manager
+        return self._oco
+
+    async def _twap(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        await self._leverage(a)
+        job = await self.twap.submit(
+            symbol=a["symbol"], side=a["side"], qty=a["qty"], slices=a["slices"], interval=a["interval"], order_type=a.get("type", "MARKET"),
+            price=a.get("price"), tif=a.get("tif", "GTC"), reduce_only=a.get("reduce_only", False), position_side=a.get("position_side"),
+            late=a.get("late", "catch_up"),
+        )
+        if a.get("detach"):
+            return job.progress()
+        return await job.wait()
+
+    async def _grid(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        await self._leverage(a)
+        if a.get("rebalance"):
+            return await self._start_grid(a)
+        if not a.get("side"):
+            raise ValueError("--side is required unless --rebalance")
+        res = await run_grid_async(
+            self.client, self.logger, symbol=a["symbol"], side=a["side"], levels=a["levels"], lower=a["lower"], upper=a["upper"], qty=a["qty"],
+            tif=a.get("tif", "GTC"), reduce_only=a.get("reduce_only", False), position_side=a.get("position_side"), batch=a.get("batch", True),
+        )
+        placed = [r["orderId"] for r in res if "orderId" in r]
+        return {"placed": len(placed), "rejected": len(res) - len(placed), "orderIds": placed}
+
+    async def _start_grid(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        from .market_data import MarketData
+        from advanced.grid_engine import GridEngine
+        stream = await self._user_stream()
+        market = MarketData(self.client, [a["symbol"]], depth=False)
+        tasks = [asyncio.create_task(market.run())]
+        try:
+            engine = GridEngine(
+                self.client, stream, self.logger, symbol=a["symbol"], levels=a["levels"], lower=a["lower"], upper=a["upper"], qty=a["qty"],
+                tif=a.get("tif", "GTC"), position_side=a.get("position_side"), market=market, trail=a.get("trail", False),
+            )
+            await market.wait_connected()
+            price = a.get("price")
+            while price is None and market.mark(engine.symbol) is None:
+                await asyncio.sleep(0.05)
+            await engine.start(price=price)
+        except BaseException:
+            await market.close()
+            await asyncio.gather(*tasks)
+            raise
+        tasks.append(asyncio.create_task(engine.run()))
+        self.grids[engine.id] = (engine, market, tasks)
+        return engine.progress()
+
+    async def _stop_grid(self, gid: str, cancel: bool) -> Dict[str, Any]:
+        engine, market, tasks = self.grids.pop(gid)
+        res = await engine.stop(cancel=cancel)
+        await market.close()
+        await asyncio.gather(*tasks)
+        return res
+
+    async def _amend(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        res = await amend_order_async(
+            self.client, self.logger, symbol=a["symbol"], side=a["side"], quantity=a["qty"], price=a["price"],
+            order_id=a.get("order_id"), client_order_id=a.get("client_order_id"),
+        )
+        return {k: res.get(k) for k in ORDER_FIELDS if k in res}
+
+    async def _cancel_orders(self, a: Dict[str, Any]) -> Any:
+        symbols = [x for x in a["symbol"].upper().split(",") if x]
+        if a.get("all"):
+            return await cancel_all_async(self.client, self.logger, symbols)
+        if len(symbols) != 1:
+            raise ValueError("one --symbol per cancel unless --all")
+        return await cancel_orders_async(self.client, self.logger, symbol=symbols[0], order_ids=a.get("order_id"), client_order_id=a.get("client_order_id"))
+
+    async def _flatten(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        symbols = [x for x in (a.get("symbols") or "").upper().split(",") if x]
+        # stop our own jobs first, or they would trade straight back in
+        for job in self.twap.jobs.values():
+            if not symbols or job.symbol.upper() in symbols:
+                job.cancel()
+        for gid, (engine, _, _) in list(self.grids.items()):
+            if not symbols or engine.symbol in symbols:
+                await self._stop_grid(gid, cancel=False)
+        return await flatten_async(self.client, self.logger, symbols=symbols or None)
+
+    async def _jobs(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        brackets = list(self._oco.brackets.values()) if self._oco is not None else []
+        return {
+            "twap": self.twap.progress(),
+            "oco": [{"bracketId": b.id, "symbol": b.symbol, "state": b.state, "filled": str(b.filled)} for b in brackets],
+            "grid": [engine.progress() for engine, _, _ in self.grids.values()],
+        }
+
+    async def _cancel(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        if a["id"] in self.grids:
+            return await self._stop_grid(a["id"], cancel=not a.get("keep_orders", False))
+        job = self.twap.jobs[a["id"]]
+        job.cancel()
+        return await job.wait()
+
+    async def _shutdown(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        self._closer = asyncio.current_task()
+        self._stopped.set()
+        return {}
@@ -0,0 +1,32 @@
+"""Environment settings, with ``.env`` read on first use rather than at import.
+
+Commands that never build a client (``--help``, forwarding to the daemon) skip
+both the ``python-dotenv`` import and the file read.
+"""
+from __future__ import annotations
+import os
+from typing import Optional
+
+_loaded = False
+
+
+def load_env() -> None:
+    """Merge ``.env`` into ``os.environ`` once; variables already set win."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    from dotenv import load_dotenv
+    load_dotenv(override=False)
+
+
+def getenv(name: str, default: Optional[str] = None) -> Optional[str]:
+    load_env()
+    return os.getenv(name, default)
+
+
+def get_env_flag(name: str, default: bool = False) -> bool:
+    val = getenv(name)
+    if val is None:
+        return default
+    return val.lower() in {"1", "true", "yes", "y"}
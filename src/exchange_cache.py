@@ -0,0 +1,246 @@
+"""Persistent, process-shared exchangeInfo cache.
+
+The full symbol universe is fetched once and written to a fixed-width binary file,
+one record per symbol sorted by name. Readers ``mmap`` the file and binary-search
+it, so a lookup costs no network round-trip and no JSON parse. Writers replace the
+file atomically, so concurrent bot processes always see a complete snapshot.
+"""
+from __future__ import annotations
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .ticks import Quantizer
+
+_MAGIC = b"BXIC"
+_VERSION = 1
+# magic, version, fetchedAt (epoch seconds), record count
+_HEADER = struct.Struct("<4sHdI")
+# symbol, tickSize, stepSize, minQty, minNotional, pricePrecision, quantityPrecision
+_RECORD = struct.Struct("<20s24s24s24s24sbb")
+
+DEFAULT_TTL = 3600.0
+DEFAULT_MAX_STALE = 86400.0
+
+
+def default_cache_path(base_url: str) -> str:
+    path = os.getenv("BINANCE_EXCHANGE_INFO_CACHE")
+    if path:
+        return path
+    host = base_url.split("://", 1)[-1].split("/", 1)[0]
+    root = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "binance_bot", f"exchange_info-{host}.bin")
+
+
+class SymbolFilters:
+    """Order filters for one symbol, parsed once.
+
+    Supports ``filters["tickSize"]`` style access so it can stand in for the dict
+    :func:`src.utils.get_symbol_filters` used to return.
+    """
+
+    __slots__ = ("symbol", "pricePrecision", "quantityPrecision", "tickSize", "stepSize", "minQty", "minNotional", "raw", "_quantizer")
+
+    def __init__(self, symbol: str, tick_size: str, step_size: str, min_qty: str, min_notional: str, price_precision: Optional[int], quantity_precision: Optional[int]) -> None:
+        self.symbol = symbol
+        self.pricePrecision = price_precision
+        self.quantityPrecision = quantity_precision
+        self.tickSize = float(tick_size)
+        self.stepSize = float(step_size)
+        self.minQty = float(min_qty)
+        self.minNotional = float(min_notional)
+        # exchange strings, kept for exact decimal arithmetic
+        self.raw: Tuple[str, str, str, str] = (tick_size, step_size, min_qty, min_notional)
+        self._quantizer: Optional[Quantizer] = None
+
+    @property
+    def quantizer(self) -> Quantizer:
+        if self._quantizer is None:
+            self._quantizer = Quantizer(self.symbol, *self.raw[:3])
+        return self._quantizer
+
+    @classmethod
+    def from_symbol(cls, sym: Dict[str, Any]) -> "SymbolFilters":
+        filters = {f["filterType"]: f for f in sym["filters"]}
+        return cls(
+            sym["symbol"],
+            filters["PRICE_FILTER"]["tickSize"],
+            filters["LOT_SIZE"]["stepSize"],
+            filters["LOT_SIZE"]["minQty"],
+            filters.get("MIN_NOTIONAL", {}).get("notional", "0"),
+            sym.get("pricePrecision"),
+            sym.get("quantityPrecision"),
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __repr__(self) -> str:
+        return f"SymbolFilters({self.symbol!r}, tickSize={self.raw[0]}, stepSize={self.raw[1]}, minQty={self.raw[2]}, minNotional={self.raw[3]})"
+
+
+def _pack(f: SymbolFilters) -> bytes:
+    return _RECORD.pack(
+        f.symbol.encode(), *(v.encode() for v in f.raw),
+        -1 if f.pricePrecision is None else f.pricePrecision,
+        -1 if f.quantityPrecision is None else f.quantityPrecision,
+    )
+
+
+def _unpack(buf: Any, offset: int) -> SymbolFilters:
+    sym, tick, step, min_qty, min_notional, pp, qp = _RECORD.unpack_from(buf, offset)
+    strs = [v.rstrip(b"\0").decode() for v in (tick, step, min_qty, min_notional)]
+    return SymbolFilters(sym.rstrip(b"\0").decode(), *strs, None if pp < 0 else pp, None if qp < 0 else qp)
+
+
+def _release(mm: mmap.mmap) -> None:
+    try:
+        mm.close()
+    except BufferError:
+        # a reader holds a buffer into it right now; the map is freed with its last reference
+        pass
+
+
+class ExchangeInfoCache:
+    """TTL cache of :class:`SymbolFilters` backed by a shared memory-mapped file.
+
+    Entries older than ``ttl`` are still served but reported by :meth:`is_stale` so
+    the caller can refresh them in the background; entries older than ``max_stale``
+    are treated as missing.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, max_stale: float = DEFAULT_MAX_STALE) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.fetched_at = 0.0
+        # (map, record count) swapped as one reference so readers never see a torn pair
+        self._view: Tuple[Optional[mmap.mmap], int] = (None, 0)
+        self._memo: Dict[str, SymbolFilters] = {}
+        self._mtime_ns = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            st = os.stat(self.path)
+            if st.st_mtime_ns == self._mtime_ns and self._view[0] is not None:
+                return
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        magic, version, fetched_at, count = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC or version != _VERSION or len(mm) < _HEADER.size + count * _RECORD.size:
+            mm.close()
+            return
+        old = self._view[0]
+        self._memo = {}
+        self._view = (mm, count)
+        self._mtime_ns, self.fetched_at = st.st_mtime_ns, fetched_at
+        if old is not None:
+            # a reader still searching the old map gets ValueError and retries on the new one
+            _release(old)
+
+    def _close(self) -> None:
+        mm = self._view[0]
+        self._view = (None, 0)
+        if mm is not None:
+            _release(mm)
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def is_stale(self) -> bool:
+        if self.age() <= self.ttl:
+            return False
+        # another process may have refreshed the file meanwhile
+        self._load()
+        return self.age() > self.ttl
+
+    def get(self, symbol: str) -> Optional[SymbolFilters]:
+        if self.age() > self.max_stale:
+            return None
+        f = self._memo.get(symbol)
+        if f is not None:
+            return f
+        while True:
+            mm, count = self._view
+            if mm is None:
+                return None
+            try:
+                return self._search(mm, count, symbol)
+            except ValueError:
+                # the map was closed under us by a reload; search the current one
+                if self._view[0] is mm:
+                    raise
+
+    def _search(self, mm: mmap.mmap, count: int, symbol: str) -> Optional[SymbolFilters]:
+        key = symbol.encode()
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off = _HEADER.size + mid * _RECORD.size
+            name = mm[off:off + 20].rstrip(b"\0")
+            if name < key:
+                lo = mid + 1
+            elif name > key:
+                hi = mid
+            else:
+                f = self._memo[symbol] = _unpack(mm, off)
+                return f
+        return None
+
+    def store(self, info: Dict[str, Any]) -> None:
+        """Write a full ``/fapi/v1/exchangeInfo`` response to disk and remap it."""
+        records: List[SymbolFilters] = []
+        for sym in info.get("symbols", []):
+            try:
+                records.append(SymbolFilters.from_symbol(sym))
+            except KeyError:
+                continue
+        records.sort(key=lambda f: f.symbol)
+        blob = _HEADER.pack(_MAGIC, _VERSION, time.time(), len(records)) + b"".join(_pack(f) for f in records)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        with self._lock:
+            try:
+                os.replace(tmp, self.path)
+            except OSError:
+                # Windows refuses to replace a file that is still mapped
+                self._close()
+                try:
+                    os.replace(tmp, self.path)
+                except OSError:
+                    os.unlink(tmp)
+            self._mtime_ns = 0
+            self._load()
+
+    def refresh_in_background(self, refresh: Callable[[], None]) -> None:
+        """Run ``refresh`` (fetch, then :meth:`store`) on a daemon thread; at most one at a time.
+
+        ``refresh`` handles the errors it expects; anything else reaches ``threading.excepthook``.
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run() -> None:
+            try:
+                refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="exchange-info-refresh", daemon=True).start()
@@ -0,0 +1,172 @@
+"""Append-only local journal of every order this bot sends.
+
+Each placement is written under its ``newClientOrderId`` *before* it leaves the
+process (status ``SENDING``), then advanced by REST responses and user data
+stream events. ``events`` keeps every record in arrival order; ``orders`` is the
+latest state per clientOrderId, so open orders can be listed without a REST call.
+A successful ``allOpenOrders`` cancel marks the symbol's open entries ``CANCELED``.
+
+``orders`` is only as current as the last response or event: an order that fills
+or expires while no user data stream is running stays ``NEW`` here until
+:meth:`BinanceClient.reconcile_journal` (``cli orders --refresh``) looks it up.
+
+An order still ``SENDING`` is one whose fate is unknown to us: the request timed
+out, or the process died, before the exchange answered. Look it up by
+``origClientOrderId`` before placing it again.
+"""
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+
+DEFAULT_JOURNAL_DB = "orders.db"
+SENDING = "SENDING"
+# a record never moves an order back to an earlier status; responses and
+# stream events for the same order can arrive in either order; anything
+# not listed (FILLED, CANCELED, REJECTED, ...) is final
+_RANK = {SENDING: 0, "NEW": 1, "PARTIALLY_FILLED": 2}
+_FINAL_RANK = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL, client_id TEXT, kind TEXT, body BLOB
+);
+CREATE INDEX IF NOT EXISTS events_client_id ON events (client_id);
+CREATE TABLE IF NOT EXISTS orders (
+    client_id TEXT PRIMARY KEY, symbol TEXT, side TEXT, type TEXT, qty TEXT, price TEXT,
+    order_id INTEGER, status TEXT, rank INTEGER, executed TEXT, error TEXT, created REAL, updated REAL
+);
+CREATE INDEX IF NOT EXISTS orders_open ON orders (rank, symbol);
+"""
+
+_COLUMNS = ("clientOrderId", "symbol", "side", "type", "origQty", "price", "orderId", "status", "executedQty", "error", "created", "updated")
+
+
+def _rank(status: str) -> int:
+    return _RANK.get(status, _FINAL_RANK)
+
+
+class OrderJournal:
+    """SQLite (WAL) order journal keyed by clientOrderId; safe to share between threads."""
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_DB) -> None:
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _append(self, client_id: str, kind: str, body: Dict[str, Any], now: float) -> None:
+        self.db.execute("INSERT INTO events (ts, client_id, kind, body) VALUES (?, ?, ?, ?)", (now, client_id, kind, orjson.dumps(body)))
+
+    def _advance(
+        self, client_id: str, status: str, order_id: Optional[int], executed: Optional[str], now: float,
+        error: Optional[str] = None, qty: Any = None, price: Any = None,
+    ) -> None:
+        rank = _rank(status)
+        # qty and price change when an order is amended
+        self.db.execute(
+            "UPDATE orders SET status = ?, rank = ?, order_id = COALESCE(?, order_id), executed = COALESCE(?, executed), error = ?, updated = ?,"
+            " qty = COALESCE(?, qty), price = COALESCE(?, price)"
+            " WHERE client_id = ? AND (rank < ? OR (rank = ? AND rank < ? AND CAST(COALESCE(executed, '0') AS REAL) <= CAST(COALESCE(?, '0') AS REAL)))",
+            (status, rank, order_id, executed, error, now, _str(qty), _str(price), client_id, rank, rank, _FINAL_RANK, executed),
+        )
+
+    def sent(self, orders: Iterable[Dict[str, Any]]) -> None:
+        """Record placements about to be sent; each must carry ``newClientOrderId``."""
+        now = time.time()
+        with self._lock:
+            for p in orders:
+                cid = p["newClientOrderId"]
+                self._append(cid, "sent", p, now)
+                self._upsert(cid, p.get("symbol"), p.get("side"), p.get("type"), p.get("quantity"), p.get("price"), now)
+            self.db.commit()
+
+    def update(self, orders: Iterable[Dict[str, Any]]) -> None:
+        """Apply REST order responses (``POST``/``GET``/``DELETE /fapi/v1/order``)."""
+        now = time.time()
+        with self._lock:
+            for r in orders:
+                cid = r.get("clientOrderId")
+                if not cid or "status" not in r:
+                    continue
+                self._append(cid, "rest", r, now)
+                self._upsert(cid, r.get("symbol"), r.get("side"), r.get("type"), r.get("origQty"), r.get("price"), now)
+                self._advance(cid, r["status"], r.get("orderId"), r.get("executedQty"), now, qty=r.get("origQty"), price=r.get("price"))
+            self.db.commit()
+
+    def on_event(self, o: Dict[str, Any]) -> None:
+        """Apply the ``o`` payload of an ``ORDER_TRADE_UPDATE``."""
+        cid = o.get("c")
+        if not cid:
+            return
+        now = time.time()
+        with self._lock:
+            self._append(cid, "stream", o, now)
+            self._upsert(cid, o.get("s"), o.get("S"), o.get("o"), o.get("q"), o.get("p"), now)
+            self._advance(cid, o["X"], o.get("i"), o.get("z"), now, qty=o.get("q"), price=o.get("p"))
+            self.db.commit()
+
+    def rejected(self, client_id: str, code: Optional[int], msg: Optional[str]) -> None:
+        """The exchange refused the placement outright."""
+        now = time.time()
+        with self._lock:
+            self._append(client_id, "rejected", {"code": code, "msg": msg}, now)
+            self._advance(client_id, "REJECTED", None, None, now, error=f"{code}: {msg}")
+            self.db.commit()
+
+    def canceled_all(self, symbol: str) -> None:
+        """Every open order of ``symbol`` was just cancelled (``DELETE /fapi/v1/allOpenOrders``)."""
+        now = time.time()
+        with self._lock:
+            rows = self.db.execute("SELECT client_id FROM orders WHERE rank IN (1, 2) AND symbol = ?", (symbol,)).fetchall()
+            for (cid,) in rows:
+                self._append(cid, "cancel_all", {"symbol": symbol}, now)
+                self._advance(cid, "CANCELED", None, None, now)
+            self.db.commit()
+
+    def _upsert(self, cid: str, symbol: Any, side: Any, kind: Any, qty: Any, price: Any, now: float) -> None:
+        # no-op for known orders; ones placed by another tool show up first through the stream
+        self.db.execute(
+            "INSERT INTO orders (client_id, symbol, side, type, qty, price, status, rank, executed, created, updated)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, 0, '0', ?, ?) ON CONFLICT (client_id) DO NOTHING",
+            (cid, symbol, side, kind, _str(qty), _str(price), SENDING, now, now),
+        )
+
+    def _select(self, where: str, args: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT client_id, symbol, side, type, qty, price, order_id, status, executed, error, created, updated FROM orders " + where, args
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def get(self, client_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._select("WHERE client_id = ?", (client_id,))
+        return rows[0] if rows else None
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Orders the exchange has acknowledged and not yet finished."""
+        if symbol:
+            return self._select("WHERE rank IN (1, 2) AND symbol = ? ORDER BY created", (symbol.upper(),))
+        return self._select("WHERE rank IN (1, 2) ORDER BY created", ())
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Placements with no answer from the exchange yet."""
+        return self._select("WHERE rank = 0 ORDER BY created", ())
+
+    def history(self, client_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.db.execute("SELECT ts, kind, body FROM events WHERE client_id = ? ORDER BY seq", (client_id,)).fetchall()
+        return [{"ts": ts, "kind": kind, "body": orjson.loads(body)} for ts, kind, body in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+
+def _str(v: Any) -> Optional[str]:
+    return None if v is None else str(v)
@@ -0,0 +1,442 @@
+"""Columnar archive of closed bot.log segments, partitioned by day.
+
+    compact("bot.log.1.gz", "bot.log.archive")
+    cols = LogArchive("bot.log.archive").read(["ts", "latencyMs"], since="2026-07", until="2026-09", action="http")
+
+A segment (a rotated ``bot.log.N.gz``, or any finished JSON Lines file) is
+parsed in batches of lines, each written as one compressed ``.npz`` per day it
+covers, under ``<root>/<YYYY-MM-DD>/<first ts>-<segment>-<batch>.npz``. Each
+file holds typed columns:
+
+    ts          int64 ms since the epoch
+    level, action, method, path
+                dictionary-encoded: small integer codes plus a ``<name>_dict`` vocabulary
+    status      int16, 0 when absent
+    latencyMs   float64, NaN when absent
+    reqId       fixed-width bytes
+    extra       every other field as JSON (``params.signature`` dropped), read only by :meth:`LogArchive.records`
+
+A value the typed columns would not give back verbatim (a ``ts`` not in the
+writer's ``YYYY-MM-DDTHH:MM:SS.mmm`` form, a null or empty ``reqId``, a
+non-integer ``status``...) also stays in ``extra``, so :meth:`LogArchive.records`
+returns each record as it was logged.
+
+plus per-minute rollups by (action, method, path): ``r_minute``, ``r_action``,
+``r_method``, ``r_path``, ``r_count``, ``r_errors``, ``r_lat_n``, ``r_lat_sum``
+and ``r_lat_max``. Zip members are decompressed only when accessed, so a query
+reads just the days in its range and the columns it names; an equality filter
+on a dictionary column skips a file whose vocabulary lacks the value without
+decompressing anything else. Compacted segments are listed in ``<root>/segments``,
+so compacting the same segment again is a no-op. Records whose ``ts`` does not
+parse go to ``<root>/undated/`` (``ts`` -1, the text kept in ``extra``) rather
+than being dropped; no date range selects them, :meth:`LogArchive.undated` does.
+"""
+from __future__ import annotations
+import glob
+import gzip
+import hashlib
+import itertools
+import os
+import re
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+DICT_COLUMNS = ("level", "action", "method", "path")
+COLUMNS = ("ts", "level", "action", "method", "path", "status", "latencyMs", "reqId")
+ROLLUP_KEYS = ("action", "method", "path")
+_STATS = ("count", "errors", "lat_n", "lat_sum", "lat_max")
+# lines parsed per batch; bounds memory whatever the segment size
+CHUNK_LINES = 200_000
+_DAY_MS = 86_400_000
+_MINUTE_MS = 60_000
+_DAY = re.compile(r"\d{4}-\d{2}-\d{2}$")
+# folder of the records whose ts did not parse
+UNDATED = "undated"
+# the form records() renders ts in; any other ts text is also kept in extra
+_TS = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}")
+
+
+def _open(path: str) -> Any:
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _encode(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    vocab, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+    return codes.astype(np.min_scalar_type(max(len(vocab) - 1, 0))), vocab
+
+
+def _parse_ts(values: List[str]) -> np.ndarray:
+    """ms since the epoch; unparseable timestamps become -1."""
+    try:
+        return np.array(values, dtype="datetime64[ms]").astype(np.int64)
+    except ValueError:
+        out = np.full(len(values), -1, dtype=np.int64)
+        for i, v in enumerate(values):
+            try:
+                out[i] = np.datetime64(v, "ms").astype(np.int64)
+            except ValueError:
+                pass
+        return out
+
+
+def _columns(lines: Iterable[bytes]) -> Dict[str, Any]:
+    ts: List[str] = []
+    text: Dict[str, List[str]] = {c: [] for c in DICT_COLUMNS}
+    status: List[int] = []
+    latency: List[float] = []
+    req_ids: List[bytes] = []
+    extra = bytearray()
+    extra_off: List[int] = [0]
+    # rows whose ts text is not in extra, because records() would render it back as is
+    canonical: List[int] = []
+    for line in lines:
+        try:
+            obj = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue
+        if not isinstance(obj, dict) or not isinstance(obj.get("ts"), str):
+            continue
+        t = obj.pop("ts")
+        ts.append(t[:23].rstrip("Z"))
+        if not _TS.fullmatch(t):
+            obj["ts"] = t
+        else:
+            canonical.append(len(ts) - 1)
+        # a field leaves extra only when its column gives it back unchanged
+        for c in DICT_COLUMNS:
+            v = obj.get(c)
+            # one object per distinct value instead of one per line
+            text[c].append(sys.intern(obj.pop(c)) if isinstance(v, str) and v else "")
+        s, ms, rid = obj.get("status"), obj.get("latencyMs"), obj.get("reqId")
+        status.append(obj.pop("status") if type(s) is int and 0 < s < 32768 else 0)
+        timed = isinstance(ms, (int, float)) and not isinstance(ms, bool)
+        latency.append(ms if timed else np.nan)
+        if timed and not (isinstance(ms, float) and ms.is_integer()):
+            # records() renders a whole float as an int, so 12.0 stays in extra too
+            del obj["latencyMs"]
+        req_ids.append(obj.pop("reqId").encode() if isinstance(rid, str) and rid else b"")
+        params = obj.get("params")
+        if isinstance(params, dict):
+            params.pop("signature", None)
+        if obj:
+            extra += orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        extra_off.append(len(extra))
+    ms = _parse_ts(ts)
+    # the writer's form but no date (2026-02-30...): it goes undated, so its text must be kept too
+    bad = [i for i in canonical if ms[i] < 0]
+    if bad:
+        extra, extra_off = _with_ts(extra, extra_off, {i: ts[i] for i in bad})
+    cols: Dict[str, Any] = {
+        "ts": ms,
+        "status": np.array(status, dtype=np.int16),
+        "latencyMs": np.array(latency, dtype=np.float64),
+        "reqId": np.array(req_ids, dtype=bytes),
+        "extra": np.frombuffer(extra, dtype=np.uint8),
+        "extra_off": np.array(extra_off, dtype=np.int64),
+    }
+    for c in DICT_COLUMNS:
+        cols[c], cols[f"{c}_dict"] = _encode(text[c])
+    return cols
+
+
+def _with_ts(extra: bytearray, off: List[int], texts: Dict[int, str]) -> Tuple[bytearray, List[int]]:
+    """``extra`` rebuilt with ``ts`` added to the rows in ``texts``."""
+    out, new_off = bytearray(), [0]
+    for i in range(len(off) - 1):
+        b = bytes(extra[off[i]:off[i + 1]])
+        if i in texts:
+            obj = orjson.loads(b) if b else {}
+            obj["ts"] = texts[i]
+            b = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        out += b
+        new_off.append(len(out))
+    return out, new_off
+
+
+def _rollup(cols: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Per-minute count, errors and latency sum/max by (action, method, path)."""
+    minute = cols["ts"] // _MINUTE_MS * _MINUTE_MS
+    sizes = [len(cols[f"{c}_dict"]) for c in ROLLUP_KEYS]
+    key = np.zeros(len(minute), dtype=np.int64)
+    for c, n in zip(ROLLUP_KEYS, sizes):
+        key = key * n + cols[c]
+    groups, inv = np.unique(np.stack([minute, key]), axis=1, return_inverse=True)
+    inv = inv.ravel()
+    errors = cols["level_dict"][cols["level"]] == "ERROR"
+    lat = cols["latencyMs"]
+    timed = ~np.isnan(lat)
+    lat_max = np.full(groups.shape[1], np.nan)
+    np.fmax.at(lat_max, inv, lat)
+    out = {
+        "r_minute": groups[0],
+        "r_count": np.bincount(inv, minlength=groups.shape[1]).astype(np.int32),
+        "r_errors": np.bincount(inv, weights=errors, minlength=groups.shape[1]).astype(np.int32),
+        "r_lat_n": np.bincount(inv, weights=timed, minlength=groups.shape[1]).astype(np.int32),
+        "r_lat_sum": np.bincount(inv, weights=np.where(timed, lat, 0), minlength=groups.shape[1]),
+        "r_lat_max": lat_max,
+    }
+    rest = groups[1]
+    for c, n in reversed(list(zip(ROLLUP_KEYS, sizes))):
+        rest, out[f"r_{c}"] = np.divmod(rest, n)
+        out[f"r_{c}"] = out[f"r_{c}"].astype(cols[c].dtype)
+    return out
+
+
+def _take_extra(blob: np.ndarray, off: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """The ``extra`` bytes and offsets of ``rows`` (ascending), copied run by run."""
+    lens = off[rows + 1] - off[rows]
+    new_off = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lens, out=new_off[1:])
+    breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+    starts, ends = rows[np.r_[0, breaks]], rows[np.r_[breaks - 1, len(rows) - 1]] + 1
+    data = np.concatenate([blob[off[a]:off[b]] for a, b in zip(starts.tolist(), ends.tolist())])
+    return data, new_off
+
+
+def _write_npz(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+def compacted(root: str) -> Dict[str, str]:
+    """Segment id -> source path of every segment already in the archive."""
+    try:
+        with open(os.path.join(root, "segments"), encoding="utf-8") as f:
+            return dict(line.rstrip("\n").split(" ", 1) for line in f if " " in line)
+    except FileNotFoundError:
+        return {}
+
+
+def compact(source: str, root: str) -> Optional[str]:
+    """Add one closed segment to the archive; returns its id, or None if empty, gone or already there.
+
+    A segment is identified by a hash of its first line (a unique ts and reqId),
+    which survives the renames of later rotations.
+    """
+    try:
+        f = _open(source)
+    except FileNotFoundError:
+        return None
+    with f:
+        first = f.readline()
+        seg = hashlib.blake2b(first, digest_size=8).hexdigest()
+        if not first.strip() or seg in compacted(root):
+            return None
+        f.seek(0)
+        for k in itertools.count():
+            lines = list(itertools.islice(f, CHUNK_LINES))
+            if not lines:
+                break
+            _write_days(_columns(lines), root, f"{seg}-{k:04d}")
+    # listed last: a compaction cut short is redone in full next time
+    with open(os.path.join(root, "segments"), "a", encoding="utf-8") as f:
+        f.write(f"{seg} {os.path.abspath(source)}\n")
+    return seg
+
+
+def _write_days(cols: Dict[str, np.ndarray], root: str, name: str) -> None:
+    keep = cols["ts"] >= 0
+    day = cols["ts"] // _DAY_MS
+    groups = [(str(np.datetime64(d, "D")), np.flatnonzero(keep & (day == d))) for d in np.unique(day[keep]).tolist()]
+    if not keep.all():
+        groups.append((UNDATED, np.flatnonzero(~keep)))
+    for folder, rows in groups:
+        part = {k: v[rows] for k, v in cols.items() if k not in ("extra", "extra_off") and not k.endswith("_dict")}
+        for c in DICT_COLUMNS:
+            # re-encode so each day file carries only the vocabulary it uses
+            used, codes = np.unique(part[c], return_inverse=True)
+            part[c] = codes.astype(np.min_scalar_type(max(len(used) - 1, 0)))
+            part[f"{c}_dict"] = cols[f"{c}_dict"][used]
+        part["extra"], part["extra_off"] = _take_extra(cols["extra"], cols["extra_off"], rows)
+        part.update(_rollup(part))
+        folder = os.path.join(root, folder)
+        os.makedirs(folder, exist_ok=True)
+        # named by first ts, so a day's files list in time order
+        _write_npz(os.path.join(folder, f"{part['ts'][0]}-{name}.npz"), part)
+
+
+def closed_segments(log_path: str) -> List[str]:
+    """Rotated ``<log>.N.gz`` archives, oldest first."""
+    found = glob.glob(f"{glob.escape(log_path)}.*.gz")
+    numbered = [(int(p[len(log_path) + 1:-3]), p) for p in found if p[len(log_path) + 1:-3].isdigit()]
+    return [p for _, p in sorted(numbered, reverse=True)]
+
+
+def compact_closed(log_path: str, root: str) -> List[str]:
+    """Compact every rotated segment of ``log_path`` not yet in the archive."""
+    return [seg for seg in (compact(p, root) for p in closed_segments(log_path)) if seg]
+
+
+def _ms(prefix: str, end: bool) -> int:
+    try:
+        t = np.datetime64(prefix)
+    except ValueError:
+        raise ValueError(f"bad ts prefix {prefix!r}: expected e.g. 2026-07, 2026-07-01 or 2026-07-01T10:30") from None
+    return int((t + 1 if end else t).astype("datetime64[ms]").astype(np.int64))
+
+
+def _group(bucket: np.ndarray, keys: List[np.ndarray], stats: Dict[str, np.ndarray], first: bool = False) -> Dict[Any, np.ndarray]:
+    """Sum the rollup ``stats`` (max for ``lat_max``) over equal (bucket, *keys); keys come back under their position."""
+    groups, idx, inv = np.unique(np.stack([bucket] + keys), axis=1, return_index=True, return_inverse=True)
+    inv = inv.ravel()
+    n = groups.shape[1]
+    out: Dict[Any, np.ndarray] = {"bucket": groups[0]}
+    for k in range(len(keys)):
+        out[k] = groups[k + 1]
+    for s in ("count", "errors", "lat_n"):
+        out[s] = np.bincount(inv, weights=stats[s], minlength=n).astype(np.int64)
+    out["lat_sum"] = np.bincount(inv, weights=stats["lat_sum"], minlength=n)
+    out["lat_max"] = np.full(n, np.nan)
+    np.fmax.at(out["lat_max"], inv, stats["lat_max"])
+    if first:
+        out["first"] = idx
+    return out
+
+
+def _bounds(since: Optional[str], until: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """ts prefixes to a half-open ms range; ``until`` includes everything sharing its prefix."""
+    return None if since is None else _ms(since, False), None if until is None else _ms(until, True)
+
+
+class LogArchive:
+    """Read side of an archive written by :func:`compact`."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def days(self, since: Optional[str] = None, until: Optional[str] = None) -> List[str]:
+        names = sorted(n for n in os.listdir(self.root) if _DAY.match(n)) if os.path.isdir(self.root) else []
+        # a day is in range when it shares or follows the prefix of since and shares or precedes that of until
+        return [n for n in names if (since is None or n >= since[:10]) and (until is None or n[:len(until[:10])] <= until[:10])]
+
+    def files(self, since: Optional[str] = None, until: Optional[str] = None) -> List[str]:
+        return [p for d in self.days(since, until) for p in sorted(glob.glob(os.path.join(self.root, d, "*.npz")))]
+
+    def _scan(
+        self, names: Iterable[str], since: Optional[str], until: Optional[str], filters: Dict[str, str], paths: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """Per file (of ``paths``, default the days in range), the requested members restricted to rows in range and matching ``filters``."""
+        lo, hi = _bounds(since, until)
+        names = list(dict.fromkeys(names))
+        for path in self.files(since, until) if paths is None else paths:
+            with np.load(path) as z:
+                mask: Optional[np.ndarray] = None
+                absent = False
+                for c, v in filters.items():
+                    hit = np.flatnonzero(z[f"{c}_dict"] == v)
+                    if not len(hit):
+                        absent = True
+                        break
+                    m = z[c] == hit[0]
+                    mask = m if mask is None else mask & m
+                if absent:
+                    # the value is not in this file's vocabulary: nothing else is decompressed
+                    continue
+                if lo is not None or hi is not None:
+                    t = z["ts"]
+                    m = np.ones(len(t), dtype=bool)
+                    if lo is not None:
+                        m &= t >= lo
+                    if hi is not None:
+                        m &= t < hi
+                    mask = m if mask is None else mask & m
+                rows = None if mask is None else np.flatnonzero(mask)
+                out = {}
+                for c in names:
+                    if c == "extra":
+                        blob, off = z["extra"].tobytes(), z["extra_off"]
+                        idx = range(len(off) - 1) if rows is None else rows.tolist()
+                        out[c] = [blob[off[i]:off[i + 1]] for i in idx]
+                        continue
+                    a = z[c]
+                    out[c] = a if rows is None else a[rows]
+                    if c in DICT_COLUMNS:
+                        out[c] = z[f"{c}_dict"][out[c]]
+                yield out
+
+    def read(self, columns: Iterable[str], since: Optional[str] = None, until: Optional[str] = None, **filters: str) -> Dict[str, np.ndarray]:
+        """Columns of every matching record, concatenated in archive order.
+
+        ``since``/``until`` are inclusive ts prefixes as in ``tools/validate_logs.py query``;
+        ``filters`` are equalities on dictionary columns (``action="http"``), which
+        come back decoded to strings.
+        """
+        columns = list(columns)
+        for c in list(columns) + list(filters):
+            if c not in COLUMNS or (c in filters and c not in DICT_COLUMNS):
+                raise ValueError(f"unknown column {c!r}" if c not in COLUMNS else f"{c} is not a dictionary column")
+        parts = list(self._scan(columns, since, until, filters))
+        empty = {"ts": np.int64, "status": np.int16, "latencyMs": np.float64, "reqId": "S1"}
+        return {c: np.concatenate([p[c] for p in parts]) if parts else np.array([], dtype=empty.get(c, str)) for c in columns}
+
+    def rollups(self, since: Optional[str] = None, until: Optional[str] = None, every: int = 60, by: Iterable[str] = ROLLUP_KEYS) -> Dict[str, np.ndarray]:
+        """Pre-aggregated stats re-bucketed to ``every`` seconds and grouped by a subset of (action, method, path).
+
+        Returns ``bucket`` (ms), the ``by`` keys, ``count``, ``errors``, ``lat_n``,
+        ``lat_sum`` and ``lat_max``; only the rollup members are read, and
+        ``since``/``until`` apply at minute granularity.
+        """
+        by = list(by)
+        if set(by) - set(ROLLUP_KEYS) or every < 60 or every % 60:
+            raise ValueError(f"by must be a subset of {ROLLUP_KEYS} and every a whole number of minutes")
+        step = every * 1000
+        lo, hi = _bounds(since, until)
+        parts = []
+        for path in self.files(since, until):
+            with np.load(path) as z:
+                p = {m: z[m] for m in ["r_minute"] + [f"r_{c}" for c in by] + [f"r_{s}" for s in _STATS]}
+                vocab = {c: z[f"{c}_dict"] for c in by}
+            keep = np.ones(len(p["r_minute"]), dtype=bool)
+            if lo is not None:
+                keep &= p["r_minute"] >= lo // _MINUTE_MS * _MINUTE_MS
+            if hi is not None:
+                keep &= p["r_minute"] < hi
+            # merged within the file on integer codes first; only the few groups left are decoded
+            g = _group(p["r_minute"][keep] // step * step, [p[f"r_{c}"][keep] for c in by], {s: p[f"r_{s}"][keep] for s in _STATS})
+            for k, c in enumerate(by):
+                g[c] = vocab[c][g.pop(k)]
+            parts.append(g)
+        if not parts:
+            return {k: np.array([], dtype=np.int64) for k in ["bucket"] + by + list(_STATS)}
+        cat = {m: np.concatenate([p[m] for p in parts]) for m in parts[0]}
+        codes = [np.unique(cat[c], return_inverse=True)[1].ravel() for c in by]
+        out = _group(cat["bucket"], codes, {s: cat[s] for s in _STATS}, first=True)
+        first = out.pop("first")
+        for k, c in enumerate(by):
+            del out[k]
+            out[c] = cat[c][first]
+        return out
+
+    def records(self, since: Optional[str] = None, until: Optional[str] = None, **filters: str) -> Iterator[Dict[str, Any]]:
+        """Whole records as logged, rebuilt from the columns and ``extra``, in archive order (without ``params.signature``)."""
+        return self._records(self._scan(list(COLUMNS) + ["extra"], since, until, filters))
+
+    def undated(self, **filters: str) -> Iterator[Dict[str, Any]]:
+        """Like :meth:`records`, for the records whose ``ts`` did not parse."""
+        paths = sorted(glob.glob(os.path.join(self.root, UNDATED, "*.npz")))
+        return self._records(self._scan(list(COLUMNS) + ["extra"], None, None, filters, paths))
+
+    def _records(self, parts: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for p in parts:
+            ts = np.datetime_as_string(p["ts"].astype("datetime64[ms]")).tolist()
+            for i, extra in enumerate(p["extra"]):
+                rec: Dict[str, Any] = {"ts": ts[i]}
+                for c in DICT_COLUMNS:
+                    if p[c][i]:
+                        rec[c] = str(p[c][i])
+                if p["status"][i]:
+                    rec["status"] = int(p["status"][i])
+                ms = float(p["latencyMs"][i])
+                if ms == ms:
+                    rec["latencyMs"] = int(ms) if ms.is_integer() else ms
+                if extra:
+                    rec.update(orjson.loads(extra))
+                if p["reqId"][i]:
+                    rec["reqId"] = p["reqId"][i].decode()
+                yield rec
@@ -0,0 +1,165 @@
+"""Background writer behind :class:`src.utils.Logger` in buffered mode.
+
+Callers only serialize a record and put it on a queue; a daemon thread batches
+records into large appends, flushing when the buffer reaches ``flush_bytes``,
+when ``flush_interval`` seconds have passed, and at interpreter exit. When the file
+grows past ``max_bytes`` it is rotated to ``<path>.1.gz`` (older archives shift up
+to ``<path>.<backups>.gz``). A failed write (e.g. a full disk) is reported on
+stderr and retried with the next batch instead of stopping the writer. With an ``archive`` directory, each closed segment is
+also compacted into the columnar archive of :mod:`src.log_archive`.
+"""
+from __future__ import annotations
+import atexit
+import gzip
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+_STOP = object()
+# unwritten bytes kept for a retry while writes fail; beyond this they are dropped
+_MAX_PENDING = 64 * 1024 * 1024
+# seconds flush() waits between checks that the writer thread is still alive
+_FLUSH_POLL = 0.5
+_compacting = threading.Lock()
+
+
+def _compact(path: str, archive: str) -> None:
+    from .log_archive import compact_closed
+    # segments are identified by content, so one that rotated on meanwhile is still found
+    with _compacting:
+        compact_closed(path, archive)
+
+
+def rotate(path: str, backups: int, archive: Optional[str] = None) -> None:
+    """Shift ``path.N.gz`` archives up by one and gzip ``path`` into ``path.1.gz``.
+
+    With ``archive``, the new segment is compacted into it on a background thread
+    (synchronously when ``backups`` is 0, as nothing else keeps it).
+    """
+    for i in range(backups - 1, 0, -1):
+        src = f"{path}.{i}.gz"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{i + 1}.gz")
+    if backups < 1:
+        if archive:
+            from .log_archive import compact
+            with _compacting:
+                compact(path, archive)
+        os.remove(path)
+        return
+    tmp = f"{path}.rotating"
+    os.replace(path, tmp)
+    # written aside and renamed, so a compaction still reading the previous .1.gz keeps its file
+    with open(tmp, "rb") as fin, gzip.open(f"{path}.1.gz.tmp", "wb") as fout:
+        shutil.copyfileobj(fin, fout)
+    os.replace(f"{path}.1.gz.tmp", f"{path}.1.gz")
+    os.remove(tmp)
+    if archive:
+        # explicitly non-daemon (the writer thread is one): exit waits for a compaction in progress
+        threading.Thread(target=_compact, args=(path, archive), name=f"log-compact:{os.path.basename(path)}", daemon=False).start()
+
+
+class LogWriter:
+    def __init__(self, path: str, flush_bytes: int = 64 * 1024, flush_interval: float = 0.5, max_bytes: int = 0, backups: int = 5, archive: Optional[str] = None) -> None:
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.archive = archive
+        self._q: "queue.SimpleQueue[object]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"log-writer:{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, line: bytes) -> None:
+        self._q.put(line)
+
+    def flush(self) -> None:
+        """Block until everything queued so far is written (or the writer thread is gone)."""
+        if self._thread.is_alive():
+            done = threading.Event()
+            self._q.put(done)
+            while not done.wait(_FLUSH_POLL):
+                if not self._thread.is_alive():
+                    return
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._q.put(_STOP)
+            self._thread.join()
+
+    def _report(self, msg: str) -> None:
+        sys.stderr.write(f"log writer {self.path}: {msg}\n")
+
+    def _run(self) -> None:
+        f: Any = None
+        buf = bytearray()
+        deadline = time.monotonic() + self.flush_interval
+        stop = False
+        while not stop:
+            flushed: Optional[threading.Event] = None
+            try:
+                item = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+                # drain whatever else is already queued without blocking
+                while True:
+                    if item is _STOP:
+                        stop = True
+                        break
+                    if isinstance(item, threading.Event):
+                        flushed = item
+                        break
+                    buf += item
+                    if len(buf) >= self.flush_bytes:
+                        break
+                    item = self._q.get_nowait()
+            except queue.Empty:
+                pass
+            if buf and (stop or flushed or len(buf) >= self.flush_bytes or time.monotonic() >= deadline):
+                try:
+                    if f is None:
+                        f = open(self.path, "ab")
+                    f.write(buf)
+                    f.flush()
+                    buf.clear()
+                    if self.max_bytes and f.tell() >= self.max_bytes:
+                        f.close()
+                        f = None
+                        rotate(self.path, self.backups, self.archive)
+                except OSError as e:
+                    self._report(f"write failed: {e!r}")
+                    if f is not None:
+                        try:
+                            f.close()
+                        except OSError:
+                            pass
+                        f = None
+                    if len(buf) > _MAX_PENDING:
+                        self._report(f"dropped {len(buf)} bytes of log records")
+                        buf.clear()
+            if flushed is not None:
+                flushed.set()
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+        if buf:
+            self._report(f"lost {len(buf)} bytes of log records at exit")
+        if f is not None:
+            f.close()
+
+
+_writers: Dict[str, LogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path: str, **kw: Any) -> LogWriter:
+    """One writer thread per file, shared by every Logger pointing at it."""
+    key = os.path.abspath(path)
+    with _writers_lock:
+        w: Optional[LogWriter] = _writers.get(key)
+        if w is None:
+            w = _writers[key] = LogWriter(path, **kw)
+        return w
@@ -0,0 +1,239 @@
+"""Local market data from the ``bookTicker``, ``markPrice`` and diff-depth streams.
+
+    md = MarketData(client, ["BTCUSDT", "ETHUSDT"])
+    md.start_in_thread()                  # or ``await md.run()``
+    bid, bid_qty, ask, ask_qty = md.best_bid_ask("BTCUSDT")
+    md.mark("BTCUSDT"); md.book("BTCUSDT").best_bid()
+
+All symbols share one combined-stream connection. Top of book and mark price are
+kept as plain tuples per symbol, so lookups are a dict access. Each L2 book holds
+prices and quantities as integer tick/step units in sorted ``array('q')`` columns
+(8 bytes per value, best level last so updates near the touch move little
+memory). Books follow Binance's sync procedure: diff events are buffered while a
+REST snapshot is fetched, replayed from ``lastUpdateId``, and any gap in the
+``pu`` -> ``u`` chain triggers a fresh snapshot.
+"""
+from __future__ import annotations
+import asyncio
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import httpx
+
+from .exchange_cache import SymbolFilters
+from .ratelimit import RateLimitError
+from .utils import AsyncBinanceClient, BinanceClient
+from .ws import StreamClient
+
+# (bid, bidQty, ask, askQty)
+Ticker = Tuple[float, float, float, float]
+# (mark, index, funding rate, next funding time ms)
+Mark = Tuple[float, float, float, int]
+# diffs kept while waiting for a snapshot; older ones are useless once it arrives
+MAX_BUFFER = 10_000
+
+
+class L2Book:
+    """Depth for one symbol. Bid prices ascend; ask prices are stored negated so both sides keep the best level last."""
+
+    __slots__ = ("symbol", "price", "qty", "bid_px", "bid_qty", "ask_px", "ask_qty", "last_update_id", "synced", "_buffer")
+
+    def __init__(self, filters: SymbolFilters) -> None:
+        self.symbol = filters.symbol
+        self.price = filters.quantizer.price
+        self.qty = filters.quantizer.qty
+        self.bid_px = array("q")
+        self.bid_qty = array("q")
+        self.ask_px = array("q")
+        self.ask_qty = array("q")
+        self.last_update_id = 0
+        self.synced = False
+        self._buffer: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _set(px: array, qty: array, key: int, q: int) -> None:
+        i = bisect_left(px, key)
+        if i < len(px) and px[i] == key:
+            if q:
+                qty[i] = q
+            else:
+                del px[i]
+                del qty[i]
+        elif q:
+            px.insert(i, key)
+            qty.insert(i, q)
+
+    def _apply(self, bids: Iterable[List[str]], asks: Iterable[List[str]]) -> None:
+        pu, qu = self.price.units, self.qty.units
+        for p, q in bids:
+            self._set(self.bid_px, self.bid_qty, pu(float(p)), qu(float(q)))
+        for p, q in asks:
+            self._set(self.ask_px, self.ask_qty, -pu(float(p)), qu(float(q)))
+
+    def reset(self) -> None:
+        """Forget the book and start buffering diffs until the next snapshot."""
+        for a in (self.bid_px, self.bid_qty, self.ask_px, self.ask_qty):
+            del a[:]
+        self.synced = False
+        self._buffer.clear()
+
+    def on_diff(self, ev: Dict[str, Any]) -> bool:
+        """Apply one ``depthUpdate``; returns False when the chain broke and a new snapshot is needed."""
+        if not self.synced:
+            self._buffer.append(ev)
+            if len(self._buffer) > MAX_BUFFER:
+                del self._buffer[: MAX_BUFFER // 2]
+            return True
+        if ev["pu"] != self.last_update_id:
+            self.reset()
+            self._buffer.append(ev)
+            return False
+        self._apply(ev["b"], ev["a"])
+        self.last_update_id = ev["u"]
+        return True
+
+    def load_snapshot(self, snap: Dict[str, Any]) -> bool:
+        """Install a REST ``/fapi/v1/depth`` snapshot and replay buffered diffs on top of it.
+
+        Returns False when the snapshot is older than every buffered event and must be refetched.
+        """
+        buffered, self._buffer = self._buffer, []
+        self.reset()
+        last = snap["lastUpdateId"]
+        self._apply(snap["bids"], snap["asks"])
+        self.last_update_id = last
+        events = [ev for ev in buffered if ev["u"] >= last]
+        if events and events[0]["U"] > last:
+            self._buffer = events
+            return False
+        self.synced = True
+        for i, ev in enumerate(events):
+            # the first event straddles lastUpdateId; later ones chain on pu
+            if i:
+                if not self.on_diff(ev):
+                    return False
+                continue
+            self._apply(ev["b"], ev["a"])
+            self.last_update_id = ev["u"]
+        return True
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        if not self.bid_px:
+            return None
+        return self.price.to_float(self.bid_px[-1]), self.qty.to_float(self.bid_qty[-1])
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        if not self.ask_px:
+            return None
+        return self.price.to_float(-self.ask_px[-1]), self.qty.to_float(self.ask_qty[-1])
+
+    def levels(self, side: str, n: int = 10) -> List[Tuple[float, float]]:
+        """Top ``n`` levels of ``"BUY"`` (bids) or ``"SELL"`` (asks), best first."""
+        px, qty, sign = (self.bid_px, self.bid_qty, 1) if side.upper() == "BUY" else (self.ask_px, self.ask_qty, -1)
+        k = min(n, len(px))
+        return [(self.price.to_float(sign * px[-1 - i]), self.qty.to_float(qty[-1 - i])) for i in range(k)]
+
+    def nbytes(self) -> int:
+        return sum(a.buffer_info()[1] * a.itemsize for a in (self.bid_px, self.bid_qty, self.ask_px, self.ask_qty))
+
+
+class MarketData(StreamClient):
+    action = "market_data"
+
+    def __init__(
+        self,
+        client: Union[BinanceClient, AsyncBinanceClient],
+        symbols: Iterable[str],
+        *,
+        depth: bool = True,
+        depth_limit: int = 1000,
+        depth_speed: str = "100ms",
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ) -> None:
+        super().__init__(client, reconnect_delay=reconnect_delay, max_reconnect_delay=max_reconnect_delay)
+        self.symbols = [s.upper() for s in symbols]
+        self.depth = depth
+        self.depth_limit = depth_limit
+        self.depth_speed = depth_speed
+        self.tickers: Dict[str, Ticker] = {}
+        self.marks: Dict[str, Mark] = {}
+        self.books: Dict[str, L2Book] = {}
+        self._syncing: Dict[str, asyncio.Task] = {}
+
+    # Lookups
+    def best_bid_ask(self, symbol: str) -> Optional[Ticker]:
+        return self.tickers.get(symbol.upper())
+
+    def mark(self, symbol: str) -> Optional[float]:
+        m = self.marks.get(symbol.upper())
+        return m[0] if m else None
+
+    def touch(self, symbol: str, side: str) -> Optional[float]:
+        """Price that joins the queue on ``side``: best bid to buy, best ask to sell."""
+        t = self.tickers.get(symbol.upper())
+        if t is None:
+            return None
+        return t[0] if side.upper() == "BUY" else t[2]
+
+    def book(self, symbol: str) -> L2Book:
+        return self.books[symbol.upper()]
+
+    # Stream
+    def streams(self) -> List[str]:
+        out = []
+        for s in self.symbols:
+            low = s.lower()
+            out += [f"{low}@bookTicker", f"{low}@markPrice@1s"]
+            if self.depth:
+                out.append(f"{low}@depth@{self.depth_speed}")
+        return out
+
+    async def _url(self) -> str:
+        if self.depth:
+            for s in self.symbols:
+                if s not in self.books:
+                    filters = await self._rest(self.client.symbol_filters, s)
+                    self.books[s] = L2Book(filters)
+        return f"{self.client.ws_url}/stream?streams={'/'.join(self.streams())}"
+
+    async def _on_open(self, reconnect: bool) -> None:
+        self._syncing.clear()
+        for book in self.books.values():
+            # diffs received while the socket was down are gone; start over
+            book.reset()
+            self._resync(book)
+
+    def _resync(self, book: L2Book) -> None:
+        if book.symbol not in self._syncing or self._syncing[book.symbol].done():
+            self._syncing[book.symbol] = self._spawn(self._sync(book))
+
+    async def _sync(self, book: L2Book) -> None:
+        delay = 0.25
+        while True:
+            # let a few diffs arrive first, so the replay has something to straddle
+            await asyncio.sleep(delay)
+            try:
+                snap = await self._rest(self.client.depth, book.symbol, self.depth_limit)
+            except (httpx.HTTPError, RateLimitError) as e:
+                self.logger.error(action=self.action, event="snapshot", symbol=book.symbol, error=repr(e))
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            if book.load_snapshot(snap):
+                self.logger.info(action=self.action, event="synced", symbol=book.symbol, lastUpdateId=book.last_update_id)
+                return
+
+    async def _on_message(self, msg: Dict[str, Any]) -> None:
+        ev = msg.get("data", msg)
+        kind = ev.get("e")
+        s = ev.get("s")
+        if kind == "bookTicker":
+            self.tickers[s] = (float(ev["b"]), float(ev["B"]), float(ev["a"]), float(ev["A"]))
+        elif kind == "markPriceUpdate":
+            self.marks[s] = (float(ev["p"]), float(ev.get("i") or 0), float(ev.get("r") or 0), int(ev.get("T") or 0))
+        elif kind == "depthUpdate":
+            book = self.books.get(s)
+            if book is not None and not book.on_diff(ev):
+                self.logger.error(action=self.action, event="gap", symbol=s, pu=ev["pu"], u=ev["u"])
+                self._resync(book)
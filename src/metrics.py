@@ -0,0 +1,188 @@
+"""In-process request metrics: latency histograms and counters.
+
+Latencies go into HDR-style log-linear histograms (128 sub-buckets per power of
+two, i.e. under 1% relative error) keyed by (method, path, status). Counters
+track retries, timeouts and dry-run calls. The registry can be written as a
+Prometheus text file, served over HTTP, or summarized for the CLI.
+"""
+from __future__ import annotations
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 2 ** (_SUB_BITS - 1) sub-buckets per power of two
+_SUB_BITS = 8
+_HALF = 1 << (_SUB_BITS - 1)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _index(v: int) -> int:
+    if v < (1 << _SUB_BITS):
+        return v
+    e = v.bit_length() - _SUB_BITS
+    return (e << (_SUB_BITS - 1)) + (v >> e)
+
+
+def _value(i: int) -> int:
+    """Upper edge of bucket ``i`` (inverse of :func:`_index`)."""
+    if i < (1 << _SUB_BITS):
+        return i
+    e = (i >> (_SUB_BITS - 1)) - 1
+    return ((i - e * _HALF) << e) + (1 << e) - 1
+
+
+class Histogram:
+    """Sparse log-linear histogram of microsecond values."""
+
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, seconds: float) -> None:
+        us = max(0, int(seconds * 1_000_000))
+        i = _index(us)
+        self.counts[i] = self.counts.get(i, 0) + 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def quantile(self, q: float) -> float:
+        """Value in seconds at quantile ``q`` (0..1)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                return min(_value(i), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+
+Key = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, Any]) -> Key:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: Key, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latency: Dict[Key, Histogram] = {}
+        self._counters: Dict[str, Dict[Key, int]] = {}
+
+    def observe(self, method: str, path: str, status: Any, seconds: float) -> None:
+        key = _key({"method": method, "path": path, "status": status})
+        with self._lock:
+            h = self._latency.get(key)
+            if h is None:
+                h = self._latency[key] = Histogram()
+            h.record(seconds)
+
+    def inc(self, name: str, n: int = 1, **labels: Any) -> None:
+        key = _key(labels)
+        with self._lock:
+            c = self._counters.setdefault(name, {})
+            c[key] = c.get(key, 0) + n
+
+    def counter(self, name: str, **labels: Any) -> int:
+        with self._lock:
+            return self._counters.get(name, {}).get(_key(labels), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._counters.clear()
+
+    def prometheus(self) -> str:
+        out: List[str] = []
+        with self._lock:
+            if self._latency:
+                out.append("# TYPE binance_request_latency_seconds summary")
+                for key, h in sorted(self._latency.items()):
+                    for q in QUANTILES:
+                        out.append(f"binance_request_latency_seconds{_fmt_labels(key, [('quantile', str(q))])} {h.quantile(q):.6f}")
+                    out.append(f"binance_request_latency_seconds_sum{_fmt_labels(key)} {h.total_us / 1_000_000:.6f}")
+                    out.append(f"binance_request_latency_seconds_count{_fmt_labels(key)} {h.count}")
+            for name, series in sorted(self._counters.items()):
+                out.append(f"# TYPE binance_{name}_total counter")
+                for key, v in sorted(series.items()):
+                    out.append(f"binance_{name}_total{_fmt_labels(key)} {v}")
+        return "\n".join(out) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the registry for node_exporter's textfile collector (atomic replace)."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row per (method, path): request count, errors, retries and latency quantiles in ms."""
+        rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        with self._lock:
+            merged: Dict[Tuple[str, str], Histogram] = {}
+            for key, h in self._latency.items():
+                labels = dict(key)
+                ep = (labels["method"], labels["path"])
+                m = merged.setdefault(ep, Histogram())
+                for i, c in h.counts.items():
+                    m.counts[i] = m.counts.get(i, 0) + c
+                m.count += h.count
+                m.total_us += h.total_us
+                m.max_us = max(m.max_us, h.max_us)
+                row = rows.setdefault(ep, {"method": ep[0], "path": ep[1], "count": 0, "errors": 0})
+                row["count"] += h.count
+                if not labels["status"].startswith("2"):
+                    row["errors"] += h.count
+            for ep, m in merged.items():
+                rows[ep].update({f"p{int(q * 100)}Ms": round(m.quantile(q) * 1000, 2) for q in QUANTILES})
+                rows[ep]["maxMs"] = round(m.max_us / 1000, 2)
+            for name in ("retries", "timeouts", "dry_run"):
+                for key, v in self._counters.get(name, {}).items():
+                    labels = dict(key)
+                    ep = (labels.get("method", ""), labels.get("path", ""))
+                    row = rows.setdefault(ep, {"method": ep[0], "path": ep[1], "count": 0, "errors": 0})
+                    row[name] = row.get(name, 0) + v
+        return sorted(rows.values(), key=lambda r: (r["path"], r["method"]))
+
+
+REGISTRY = MetricsRegistry()
+
+
+def serve(port: int, registry: Optional[MetricsRegistry] = None, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` on a daemon thread; returns the server so the caller can shut it down."""
+    reg = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = reg.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
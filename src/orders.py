@@ -1,13 +1,10 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional
-from .utils import BinanceClient, Logger, get_symbol_filters, validate_order
+from typing import Any, Dict, List, Optional
+from .ticks import Number
+from .utils import AsyncBinanceClient, BinanceClient, Logger, validate_order
 
 
-def market_order(client: BinanceClient, logger: Logger, *, symbol: str, side: str, quantity: float, reduce_only: bool = False, position_side: Optional[str] = None) -> Dict[str, Any]:
-    info = client.exchange_info(symbol)
-    filters = get_symbol_filters(info)
-    validate_order(filters, qty=quantity, price=None)
-
+def market_params(*, symbol: str, side: str, quantity: Number, reduce_only: bool, position_side: Optional[str]) -> Dict[str, Any]:
     params: Dict[str, Any] = {
         "symbol": symbol.upper(),
         "side": side.upper(),
@@ -17,16 +14,10 @@ def market_order(client: BinanceClient, logger: Logger, *, symbol: str, side: st
     }
     if position_side:
         params["positionSide"] = position_side
-
-    logger.info(action="place_order", kind="market", params=params)
-    return client.place_order(**params)
+    return params
 
 
-def limit_order(client: BinanceClient, logger: Logger, *, symbol: str, side: str, quantity: float, price: float, tif: str = "GTC", reduce_only: bool = False, position_side: Optional[str] = None) -> Dict[str, Any]:
-    info = client.exchange_info(symbol)
-    filters = get_symbol_filters(info)
-    validate_order(filters, qty=quantity, price=price)
-
+def limit_params(*, symbol: str, side: str, quantity: Number, price: Number, tif: str, reduce_only: bool, position_side: Optional[str]) -> Dict[str, Any]:
     params: Dict[str, Any] = {
         "symbol": symbol.upper(),
         "side": side.upper(),
@@ -38,6 +29,88 @@ def limit_order(client: BinanceClient, logger: Logger, *, symbol: str, side: str
     }
     if position_side:
         params["positionSide"] = position_side
+    return params
+
+
+def market_order(client: BinanceClient, logger: Logger, *, symbol: str, side: str, quantity: float, reduce_only: bool = False, position_side: Optional[str] = None) -> Dict[str, Any]:
+    filters = client.symbol_filters(symbol)
+    quantity, _ = validate_order(filters, qty=quantity, price=None)
 
+    params = market_params(symbol=symbol, side=side, quantity=quantity, reduce_only=reduce_only, position_side=position_side)
+    logger.info(action="place_order", kind="market", params=params)
+    return client.place_order(**params)
+
+
+def limit_order(client: BinanceClient, logger: Logger, *, symbol: str, side: str, quantity: float, price: float, tif: str = "GTC", reduce_only: bool = False, position_side: Optional[str] = None) -> Dict[str, Any]:
+    filters = client.symbol_filters(symbol)
+    quantity, price = validate_order(filters, qty=quantity, price=price)
+
+    params = limit_params(symbol=symbol, side=side, quantity=quantity, price=price, tif=tif, reduce_only=reduce_only, position_side=position_side)
     logger.info(action="place_order", kind="limit", params=params)
     return client.place_order(**params)
+
+
+async def market_order_async(client: AsyncBinanceClient, logger: Logger, *, symbol: str, side: str, quantity: float, reduce_only: bool = False, position_side: Optional[str] = None) -> Dict[str, Any]:
+    filters = await client.symbol_filters(symbol)
+    quantity, _ = validate_order(filters, qty=quantity, price=None)
+
+    params = market_params(symbol=symbol, side=side, quantity=quantity, reduce_only=reduce_only, position_side=position_side)
+    logger.info(action="place_order", kind="market", params=params)
+    return await client.place_order(**params)
+
+
+async def limit_order_async(client: AsyncBinanceClient, logger: Logger, *, symbol: str, side: str, quantity: float, price: float, tif: str = "GTC", reduce_only: bool = False, position_side: Optional[str] = None) -> Dict[str, Any]:
+    filters = await client.symbol_filters(symbol)
+    quantity, price = validate_order(filters, qty=quantity, price=price)
+
+    params = limit_params(symbol=symbol, side=side, quantity=quantity, price=price, tif=tif, reduce_only=reduce_only, position_side=position_side)
+    logger.info(action="place_order", kind="limit", params=params)
+    return await client.place_order(**params)
+
+
+def _amend_target(order_id: Optional[int], client_order_id: Optional[str]) -> Dict[str, Any]:
+    if (order_id is None) == (client_order_id is None):
+        raise ValueError("pass exactly one of order_id or client_order_id")
+    return {"order_id": order_id, "client_order_id": client_order_id}
+
+
+def amend_order(client: BinanceClient, logger: Logger, *, symbol: str, side: str, quantity: float, price: float, order_id: Optional[int] = None, client_order_id: Optional[str] = None) -> Dict[str, Any]:
+    """Reprice/resize a resting LIMIT order in one request; it never leaves the book."""
+    target = _amend_target(order_id, client_order_id)
+    filters = client.symbol_filters(symbol)
+    quantity, price = validate_order(filters, qty=quantity, price=price)
+
+    logger.info(action="amend_order", symbol=symbol.upper(), side=side.upper(), quantity=quantity, price=price, orderId=order_id, clientOrderId=client_order_id)
+    return client.modify_order(symbol, side, quantity, price, **target)
+
+
+async def amend_order_async(client: AsyncBinanceClient, logger: Logger, *, symbol: str, side: str, quantity: float, price: float, order_id: Optional[int] = None, client_order_id: Optional[str] = None) -> Dict[str, Any]:
+    target = _amend_target(order_id, client_order_id)
+    filters = await client.symbol_filters(symbol)
+    quantity, price = validate_order(filters, qty=quantity, price=price)
+
+    logger.info(action="amend_order", symbol=symbol.upper(), side=side.upper(), quantity=quantity, price=price, orderId=order_id, clientOrderId=client_order_id)
+    return await client.modify_order(symbol, side, quantity, price, **target)
+
+
+def _cancel_ids(order_ids: Optional[List[int]], client_order_id: Optional[str]) -> List[int]:
+    if bool(order_ids) == (client_order_id is not None):
+        raise ValueError("pass either order ids or a client order id")
+    return list(order_ids or [])
+
+
+def cancel_orders(client: BinanceClient, logger: Logger, *, symbol: str, order_ids: Optional[List[int]] = None, client_order_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Cancel one order, or several of one symbol through batchOrders; one result per order."""
+    ids = _cancel_ids(order_ids, client_order_id)
+    logger.info(action="cancel_orders", symbol=symbol.upper(), orderIds=ids, clientOrderId=client_order_id)
+    if len(ids) > 1:
+        return client.cancel_orders_batch(symbol, ids)
+    return [client.cancel_order(symbol, order_id=ids[0] if ids else None, client_order_id=client_order_id)]
+
+
+async def cancel_orders_async(client: AsyncBinanceClient, logger: Logger, *, symbol: str, order_ids: Optional[List[int]] = None, client_order_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    ids = _cancel_ids(order_ids, client_order_id)
+    logger.info(action="cancel_orders", symbol=symbol.upper(), orderIds=ids, clientOrderId=client_order_id)
+    if len(ids) > 1:
+        return await client.cancel_orders_batch(symbol, ids)
+    return [await client.cancel_order(symbol, order_id=ids[0] if ids else None, client_order_id=client_order_id)]
@@ -0,0 +1,162 @@
+"""Whole-ladder and TWAP-schedule planning on NumPy arrays.
+
+    plan = ladder_plan(filters, levels=10_000, lower=60000, upper=70000, qty=0.001)
+    orders = plan.params(symbol="BTCUSDT", side="BUY", tif="GTC")
+
+A plan holds every level's price and quantity as integer tick/step units (the
+same scaled integers as :mod:`src.ticks`). They are generated, snapped and
+checked against tickSize, stepSize, minQty and minNotional in one vectorized
+pass; anything invalid is raised together as a :class:`PlanError` before a
+single order is built, let alone sent. Strings for the exchange are formatted
+only when the orders are.
+"""
+from __future__ import annotations
+from decimal import ROUND_CEILING, Decimal
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from .exchange_cache import SymbolFilters
+from .orders import limit_params
+from .ticks import ROUND_DOWN, ROUND_NEAREST, ROUND_UP, Grid, Number
+
+ArrayLike = Union[Number, List[Number], np.ndarray]
+
+# level indices quoted per reason in a PlanError message; all are in ``.invalid``
+_SHOWN = 5
+
+
+class PlanError(ValueError):
+    """Some levels of a plan would be rejected; ``invalid`` lists each with its reasons."""
+
+    def __init__(self, msg: str, invalid: List[Dict[str, Any]]) -> None:
+        super().__init__(msg)
+        self.invalid = invalid
+
+
+def _units(grid: Grid, values: ArrayLike, rounding: str) -> np.ndarray:
+    """:meth:`Grid.units` for a whole array of floats, with the same guard digits."""
+    guarded = np.rint(np.asarray(values, dtype=np.float64) * grid._scale).astype(np.int64)
+    q, r = np.divmod(guarded, grid._gunit)
+    if rounding == ROUND_UP:
+        q += r > 0
+    elif rounding == ROUND_NEAREST:
+        q += 2 * r >= grid._gunit
+    return q
+
+
+def _format(grid: Grid, units: np.ndarray) -> List[str]:
+    n = units * grid.unit
+    if not grid.decimals:
+        return [str(x) for x in n.tolist()]
+    whole, frac = np.divmod(n, 10 ** grid.decimals)
+    d = grid.decimals
+    return [f"{w}.{f:0{d}d}" for w, f in zip(whole.tolist(), frac.tolist())]
+
+
+class Plan:
+    """Prices and quantities of a ladder or schedule, validated; ``price_units`` is None for MARKET slices."""
+
+    __slots__ = ("filters", "price_units", "qty_units")
+
+    def __init__(self, filters: SymbolFilters, price_units: Optional[np.ndarray], qty_units: np.ndarray) -> None:
+        self.filters = filters
+        self.price_units = price_units
+        self.qty_units = qty_units
+
+    def __len__(self) -> int:
+        return len(self.qty_units)
+
+    @property
+    def prices(self) -> List[str]:
+        return _format(self.filters.quantizer.price, self.price_units)
+
+    @property
+    def quantities(self) -> List[str]:
+        return _format(self.filters.quantizer.qty, self.qty_units)
+
+    def params(self, *, symbol: str, side: str, tif: str = "GTC", reduce_only: bool = False, position_side: Optional[str] = None) -> List[Dict[str, Any]]:
+        """One LIMIT order per level, in exchange strings."""
+        return [
+            limit_params(symbol=symbol, side=side, quantity=qty, price=px, tif=tif, reduce_only=reduce_only, position_side=position_side)
+            for px, qty in zip(self.prices, self.quantities)
+        ]
+
+
+def check(filters: SymbolFilters, price_units: Optional[np.ndarray], qty_units: np.ndarray, misaligned: Optional[np.ndarray] = None) -> Plan:
+    """Raise :class:`PlanError` listing every level that breaks minQty, minNotional or has a non-positive price.
+
+    ``misaligned`` flags quantities that were given off the step grid, for callers
+    that do not snap them.
+    """
+    q = filters.quantizer
+    reasons = []
+    if misaligned is not None:
+        reasons.append((misaligned, f"qty not aligned to stepSize {q.qty.format(1)}"))
+    bad = qty_units < max(q.min_qty_units, 1)
+    reasons.append((bad, f"qty below minQty {q.qty.format(max(q.min_qty_units, 1))}"))
+    if price_units is not None:
+        reasons.append((price_units <= 0, "price must be positive"))
+        # exact: notional in units of 10**-(price decimals + qty decimals)
+        scale = q.price.decimals + q.qty.decimals
+        min_notional = int(Decimal(filters.raw[3]).scaleb(scale).to_integral_value(ROUND_CEILING))
+        low = (price_units * q.price.unit) * (qty_units * q.qty.unit) < min_notional
+        reasons.append((low, f"notional below minNotional {filters.raw[3]}"))
+    invalid = np.zeros(len(qty_units), dtype=bool)
+    for mask, _ in reasons:
+        invalid |= mask
+    if invalid.any():
+        problems = []
+        for i in np.flatnonzero(invalid).tolist():
+            p: Dict[str, Any] = {"index": i, "qty": q.qty.format(int(qty_units[i]))}
+            if price_units is not None:
+                p["price"] = q.price.format(int(price_units[i]))
+            p["reason"] = ", ".join(r for mask, r in reasons if mask[i])
+            problems.append(p)
+        summary = []
+        for mask, r in reasons:
+            idx = np.flatnonzero(mask)
+            if len(idx):
+                more = f" and {len(idx) - _SHOWN} more" if len(idx) > _SHOWN else ""
+                summary.append(f"{r}: " + ", ".join(f"#{i}" for i in idx[:_SHOWN].tolist()) + more)
+        raise PlanError(f"{len(problems)} of {len(qty_units)} levels invalid: " + "; ".join(summary), problems)
+    return Plan(filters, price_units, qty_units)
+
+
+def plan_orders(filters: SymbolFilters, prices: ArrayLike, qtys: ArrayLike, *, price_rounding: str = ROUND_NEAREST) -> Plan:
+    """Arbitrary levels: prices snapped to tickSize (``price_rounding``), quantities down to stepSize."""
+    q = filters.quantizer
+    prices = np.atleast_1d(np.asarray(prices, dtype=np.float64))
+    qty_units = np.broadcast_to(_units(q.qty, qtys, ROUND_DOWN), prices.shape).copy()
+    return check(filters, _units(q.price, prices, price_rounding), qty_units)
+
+
+def ladder_plan(filters: SymbolFilters, *, levels: int, lower: float, upper: float, qty: ArrayLike) -> Plan:
+    """Evenly spaced levels from ``lower`` to ``upper``, both snapped inward; ``qty`` is per level, or one for all, on stepSize."""
+    if levels < 2:
+        raise ValueError("levels must be >= 2")
+    q = filters.quantizer
+    lo, hi = q.price.units(lower, ROUND_UP), q.price.units(upper, ROUND_DOWN)
+    if hi - lo < levels - 1:
+        raise ValueError(f"range {lower}-{upper} too narrow for {levels} levels at tickSize {q.price.format(1)}")
+    price_units = lo + (np.arange(levels, dtype=np.int64) * (hi - lo)) // (levels - 1)
+    qty_units = np.broadcast_to(_units(q.qty, qty, ROUND_DOWN), (levels,)).copy()
+    # sizes are the caller's, so an off-step one is an error rather than rounded
+    misaligned = np.broadcast_to(_units(q.qty, qty, ROUND_UP), (levels,)) != qty_units
+    return check(filters, price_units, qty_units, misaligned)
+
+
+def twap_plan(filters: SymbolFilters, *, qty: Number, slices: int, price: Optional[float] = None) -> Plan:
+    """``qty`` split into ``slices`` step-aligned slices, the remainder on the last one.
+
+    With ``price`` (a LIMIT price, or a reference price for MARKET slices) each
+    slice is also checked against minNotional.
+    """
+    if slices < 1:
+        raise ValueError("slices must be >= 1")
+    q = filters.quantizer
+    total = q.qty.units(qty, ROUND_DOWN)
+    qty_units = np.full(slices, total // slices, dtype=np.int64)
+    qty_units[-1] += total - (total // slices) * slices
+    price_units = None if price is None else np.full(slices, q.price.units(price), dtype=np.int64)
+    return check(filters, price_units, qty_units)
@@ -0,0 +1,284 @@
+"""Order execution sharded by (account, symbol) across worker processes.
+
+    pool = ExecutionPool(accounts_from_env(["main", "sub1"]), workers=4)
+    with pool:
+        replies = pool.run([("main", "order", {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "qty": 0.001}), ...])
+
+Each (account, symbol) pair is pinned to one worker the first time it is seen,
+so its commands run in submission order; different pairs run concurrently, in
+their worker's event loop and across workers. A worker keeps one
+:class:`AsyncBinanceClient` per account (connection pool, filters, server-time
+offset, leverage) and executes commands through the daemon's command table, so
+commands and their arguments are the same as over the daemon socket.
+
+Every worker paces itself on ``1/workers`` of each rate-limit budget, and its
+accounts share one request-weight bucket (weight is counted per IP), so the
+pool as a whole stays within the exchange's limits. Log records are sent back
+to the parent and appended to one log file; replies come back in submission
+order from :meth:`ExecutionPool.run`, or by sequence number from
+:meth:`ExecutionPool.result`. A worker that dies is replaced; commands it had
+not answered get an error reply instead of blocking their caller.
+"""
+from __future__ import annotations
+import asyncio
+import multiprocessing as mp
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .env import getenv
+from .log_writer import get_writer
+from .utils import Logger
+
+Account = Tuple[str, str]  # (api key, api secret)
+Task = Tuple[str, str, Dict[str, Any]]  # (account, command, args)
+
+_LOG, _REPLY = 0, 1
+# seconds between liveness checks of the worker a result is waited on
+_POLL = 0.5
+
+
+def accounts_from_env(names: Iterable[str]) -> Dict[str, Account]:
+    """Key pairs from ``BINANCE_API_KEY_<NAME>``/``BINANCE_API_SECRET_<NAME>``.
+
+    ``default`` falls back to the plain ``BINANCE_API_KEY``/``BINANCE_API_SECRET``.
+    """
+    accounts: Dict[str, Account] = {}
+    for name in names:
+        suffix = name.upper().replace("-", "_")
+        key, secret = getenv(f"BINANCE_API_KEY_{suffix}"), getenv(f"BINANCE_API_SECRET_{suffix}")
+        if name == "default":
+            key, secret = key or getenv("BINANCE_API_KEY"), secret or getenv("BINANCE_API_SECRET")
+        if not key or not secret:
+            raise ValueError(f"no key pair for account {name!r}: set BINANCE_API_KEY_{suffix} and BINANCE_API_SECRET_{suffix}")
+        accounts[name] = (key, secret)
+    return accounts
+
+
+class _QueueLogger(Logger):
+    """Worker-side logger: records go to the parent, which owns the log file."""
+
+    def __init__(self, outbox: Any, **fields: Any) -> None:
+        super().__init__(os.devnull, buffered=False)
+        self.outbox = outbox
+        self.fields = fields
+
+    def _write(self, obj: Dict[str, Any]) -> None:
+        obj.update(self.fields)
+        self.outbox.put((_LOG, self._line(obj)))
+
+
+class _Worker:
+    def __init__(self, index: int, workers: int, accounts: Dict[str, Account], mainnet: bool, dry_run: bool, rate_limits: Dict[str, int], outbox: Any) -> None:
+        self.index = index
+        self.workers = workers
+        self.accounts = accounts
+        self.mainnet = mainnet
+        self.dry_run = dry_run
+        self.rate_limits = rate_limits
+        self.outbox = outbox
+        self.daemons: Dict[str, Any] = {}
+        self.weight: Any = None
+        # (account, symbol) -> its latest command, which the next one waits for
+        self.chains: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def _daemon(self, account: str) -> Any:
+        d = self.daemons.get(account)
+        if d is None:
+            from .daemon import Daemon
+            from .ratelimit import RateLimiter
+            from .utils import AsyncBinanceClient
+            key, secret = self.accounts[account]
+            logger = _QueueLogger(self.outbox, account=account, worker=self.index)
+            client = AsyncBinanceClient(key, secret, self.mainnet, logger, dry_run=self.dry_run)
+            client.rate_limiter = RateLimiter(**self.rate_limits, share=1 / self.workers)
+            if self.weight is None:
+                self.weight = client.rate_limiter.buckets["weight_1m"]
+            client.rate_limiter.buckets["weight_1m"] = self.weight
+            d = self.daemons[account] = Daemon(client, state_db=f"oco_brackets.{account}.db")
+        return d
+
+    async def _run(self, prev: Optional[asyncio.Task], seq: int, account: str, cmd: str, args: Dict[str, Any]) -> None:
+        if prev is not None:
+            await asyncio.wait({prev})
+        if account not in self.accounts:
+            reply = {"id": seq, "ok": False, "error": f"unknown account {account!r}"}
+        else:
+            reply = await self._daemon(account).dispatch({"id": seq, "cmd": cmd, "args": args})
+        reply.update(account=account, worker=self.index)
+        self.outbox.put((_REPLY, seq, reply))
+
+    def _chain(self, key: Tuple[str, str], t: asyncio.Task) -> None:
+        self.chains[key] = t
+
+        def done(_: asyncio.Task) -> None:
+            if self.chains.get(key) is t:
+                del self.chains[key]
+        t.add_done_callback(done)
+
+    async def serve(self, inbox: Any) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            task = await loop.run_in_executor(None, inbox.get)
+            if task is None:
+                break
+            seq, account, cmd, args = task
+            key = (account, str(args.get("symbol", "")).upper())
+            self._chain(key, asyncio.create_task(self._run(self.chains.get(key), seq, account, cmd, args)))
+        if self.chains:
+            await asyncio.wait(set(self.chains.values()))
+        for d in self.daemons.values():
+            await d.close()
+            await d.client.aclose()
+
+
+def _worker_main(index: int, workers: int, accounts: Dict[str, Account], mainnet: bool, dry_run: bool, rate_limits: Dict[str, int], inbox: Any, outbox: Any) -> None:
+    asyncio.run(_Worker(index, workers, accounts, mainnet, dry_run, rate_limits, outbox).serve(inbox))
+
+
+class ExecutionPool:
+    """Process pool that runs daemon commands, sharded by (account, symbol).
+
+    ``rate_limits`` overrides the exchange limits the workers pace against
+    (``weight_1m``, ``orders_10s``, ``orders_1m``), e.g. for a VIP tier.
+    """
+
+    def __init__(
+        self, accounts: Dict[str, Account], *, workers: Optional[int] = None, mainnet: bool = False, dry_run: bool = False, log_path: str = "bot.log",
+        rate_limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        if not accounts:
+            raise ValueError("at least one account is required")
+        self.accounts = accounts
+        self.workers = workers or os.cpu_count() or 1
+        self.mainnet = mainnet
+        self.dry_run = dry_run
+        self.rate_limits = rate_limits or {}
+        self.logger = Logger(log_path, buffered=True)
+        self.shards: Dict[Tuple[str, str], int] = {}
+        self._seq = 0
+        self._replies: Dict[int, Dict[str, Any]] = {}
+        # seq -> worker, until its reply arrives
+        self._pending: Dict[int, int] = {}
+        self._ready = threading.Condition()
+        self._ctx: Any = None
+        self._inboxes: List[Any] = []
+        self._procs: List[Any] = []
+        self._outbox: Any = None
+        self._collector: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ExecutionPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        # spawn: workers must not inherit the parent's threads, sockets or locks
+        self._ctx = mp.get_context("spawn")
+        self._outbox = self._ctx.Queue()
+        self._inboxes, self._procs = [None] * self.workers, [None] * self.workers
+        for i in range(self.workers):
+            self._spawn(i)
+        self._collector = threading.Thread(target=self._collect, name="pool-collector", daemon=True)
+        self._collector.start()
+        self.logger.info(action="pool", event="start", workers=self.workers, accounts=sorted(self.accounts))
+
+    def _spawn(self, i: int) -> None:
+        inbox = self._ctx.Queue()
+        p = self._ctx.Process(
+            target=_worker_main, args=(i, self.workers, self.accounts, self.mainnet, self.dry_run, self.rate_limits, inbox, self._outbox), name=f"pool-worker-{i}", daemon=True,
+        )
+        p.start()
+        self._inboxes[i], self._procs[i] = inbox, p
+
+    def _check(self, w: int) -> None:
+        """If worker ``w`` died, fail its unanswered commands and start a replacement for its shards."""
+        with self._ready:
+            p = self._procs[w]
+            if p.is_alive():
+                return
+            lost = [seq for seq, ww in self._pending.items() if ww == w]
+            for seq in lost:
+                del self._pending[seq]
+                self._replies[seq] = {
+                    "id": seq, "ok": False, "worker": w,
+                    "error": f"worker {w} exited with code {p.exitcode} before replying; the command may or may not have been executed",
+                }
+            self._spawn(w)
+            self._ready.notify_all()
+        self.logger.error(action="pool", event="worker_died", worker=w, exitcode=p.exitcode, lost=len(lost))
+
+    def _collect(self) -> None:
+        writer = get_writer(self.logger.path)
+        while True:
+            item = self._outbox.get()
+            if item is None:
+                break
+            if item[0] == _LOG:
+                writer.put(item[1])
+            else:
+                with self._ready:
+                    # a reply that outran its worker's death being noticed; otherwise already failed
+                    if self._pending.pop(item[1], None) is not None:
+                        self._replies[item[1]] = item[2]
+                        self._ready.notify_all()
+
+    def shard(self, account: str, symbol: str) -> int:
+        """Worker for (account, symbol); new pairs go round-robin, so shards stay even."""
+        key = (account, symbol.upper())
+        w = self.shards.get(key)
+        if w is None:
+            w = self.shards[key] = len(self.shards) % self.workers
+        return w
+
+    def submit(self, account: str, cmd: str, args: Dict[str, Any]) -> int:
+        """Queue one command; returns its sequence number for :meth:`result`."""
+        self._seq += 1
+        w = self.shard(account, str(args.get("symbol", "")))
+        self._check(w)
+        with self._ready:
+            self._pending[self._seq] = w
+        self._inboxes[w].put((self._seq, account, cmd, args))
+        return self._seq
+
+    def result(self, seq: int, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """The reply to command ``seq``, in the daemon's ``{"ok": ..., "result"/"error": ...}`` shape.
+
+        If its worker dies meanwhile the reply is an error, and the worker is replaced.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._ready:
+                if seq in self._replies:
+                    return self._replies.pop(seq)
+                w = self._pending.get(seq)
+                if w is None:
+                    raise KeyError(f"unknown command {seq}")
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    raise TimeoutError(f"no reply to command {seq} within {timeout}s")
+                self._ready.wait(_POLL if left is None else min(left, _POLL))
+                if seq in self._replies:
+                    continue
+            self._check(w)
+
+    def run(self, tasks: Iterable[Task]) -> List[Dict[str, Any]]:
+        """Submit every task, then return their replies in submission order."""
+        seqs = [self.submit(account, cmd, args) for account, cmd, args in tasks]
+        return [self.result(s) for s in seqs]
+
+    def close(self) -> None:
+        """Let the workers finish what is queued, then stop them."""
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for p in self._procs:
+            p.join()
+        if self._collector is not None:
+            self._outbox.put(None)
+            self._collector.join()
+        self.logger.info(action="pool", event="stop", commands=self._seq)
+        self.logger.flush()
+        self._inboxes, self._procs, self._collector = [], [], None
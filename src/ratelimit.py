@@ -0,0 +1,175 @@
+"""Client-side pacing against Binance's request-weight and order-count limits.
+
+Each budget is a token bucket refilled at ``limit / window`` per second and
+corrected from the ``X-MBX-USED-WEIGHT-1M`` / ``X-MBX-ORDER-COUNT-*`` response
+headers, which are authoritative. :meth:`RateLimiter.reserve` never blocks: it
+books the request and returns how long the caller must wait, so the same limiter
+paces both the sync and the async client.
+
+New orders may only spend down to ``cancel_reserve`` of each bucket; the rest is
+kept for cancels so a burst of placements can never starve a panic exit.
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+import httpx
+
+# (method, path) -> request weight; anything not listed costs 1
+WEIGHTS: Dict[tuple, int] = {
+    ("GET", "/fapi/v1/exchangeInfo"): 1,
+    # a single new order only counts against the order-count limits
+    ("POST", "/fapi/v1/order"): 0,
+    ("POST", "/fapi/v1/batchOrders"): 5,
+    ("PUT", "/fapi/v1/batchOrders"): 5,
+    ("DELETE", "/fapi/v1/batchOrders"): 1,
+    ("DELETE", "/fapi/v1/allOpenOrders"): 1,
+    ("GET", "/fapi/v1/openOrders"): 1,  # 40 without a symbol
+    ("GET", "/fapi/v2/positionRisk"): 5,
+}
+
+
+def depth_weight(limit: int) -> int:
+    """Weight of ``GET /fapi/v1/depth``, which grows with the number of levels."""
+    if limit <= 50:
+        return 2
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 10
+    return 20
+
+
+# Binance error codes worth retrying despite a 4xx status
+RETRYABLE_CODES = {
+    -1001,  # internal error; unable to process your request
+    -1003,  # too many requests
+    -1007,  # timeout waiting for response from backend server
+    -1015,  # too many new orders
+    -1021,  # timestamp outside recvWindow (retried after a server-time resync)
+}
+
+
+class RateLimitError(Exception):
+    """Raised instead of waiting longer than ``max_wait`` (e.g. during a 418 IP ban); ``wait`` is the wait refused."""
+
+    def __init__(self, msg: str, wait: float = 0.0) -> None:
+        super().__init__(msg)
+        self.wait = wait
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, limit: float, window: float, headroom: float) -> None:
+        self.capacity = limit * headroom
+        self.rate = limit / window
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, n: float, floor: float, now: float) -> float:
+        """Take ``n`` tokens, keeping ``floor`` in reserve; return seconds until they exist."""
+        self._refill(now)
+        self.tokens -= n
+        deficit = floor - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def observe_used(self, used: int, limit: int) -> None:
+        # the server's count wins when it has seen more than we booked
+        remaining = self.capacity - used * (self.capacity / limit)
+        if remaining < self.tokens:
+            self.tokens = remaining
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        weight_1m: int = 2400,
+        orders_10s: int = 300,
+        orders_1m: int = 1200,
+        headroom: float = 0.9,
+        cancel_reserve: float = 0.1,
+        max_wait: float = 60.0,
+        share: float = 1.0,
+    ) -> None:
+        # `share` of each budget, for one of several processes trading on the same
+        # limits; `limits` stay the exchange's, so the usage headers scale correctly
+        self.limits = {"weight_1m": weight_1m, "orders_10s": orders_10s, "orders_1m": orders_1m}
+        self.buckets = {
+            "weight_1m": TokenBucket(weight_1m * share, 60.0, headroom),
+            "orders_10s": TokenBucket(orders_10s * share, 10.0, headroom),
+            "orders_1m": TokenBucket(orders_1m * share, 60.0, headroom),
+        }
+        self.cancel_reserve = cancel_reserve
+        self.max_wait = max_wait
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, method: str, path: str, orders: int = 0, weight: Optional[int] = None) -> float:
+        """Book one request and return how many seconds to wait before sending it."""
+        if weight is None:
+            weight = WEIGHTS.get((method, path), 1)
+        is_cancel = method == "DELETE"
+        now = time.monotonic()
+        with self._lock:
+            delay = max(0.0, self.blocked_until - now)
+            b = self.buckets["weight_1m"]
+            delay = max(delay, b.reserve(weight, 0.0 if is_cancel else b.capacity * self.cancel_reserve, now))
+            taken = [(b, weight)]
+            if orders and not is_cancel:
+                for key in ("orders_10s", "orders_1m"):
+                    b = self.buckets[key]
+                    delay = max(delay, b.reserve(orders, b.capacity * self.cancel_reserve, now))
+                    taken.append((b, orders))
+            if delay > self.max_wait:
+                # the request is never sent, so it must not keep the budget it booked
+                for b, n in taken:
+                    b.tokens += n
+                raise RateLimitError(f"{method} {path} would have to wait {delay:.1f}s for rate-limit budget", delay)
+        return delay
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Correct bucket levels from the usage the exchange reports."""
+        with self._lock:
+            for key, header in (("weight_1m", "x-mbx-used-weight-1m"), ("orders_10s", "x-mbx-order-count-10s"), ("orders_1m", "x-mbx-order-count-1m")):
+                v = headers.get(header)
+                if v is not None and v.isdigit():
+                    self.buckets[key].observe_used(int(v), self.limits[key])
+
+    def block_for(self, seconds: float) -> None:
+        """Hold every request for ``seconds`` (Retry-After, 418 bans)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def retry_after(resp: httpx.Response) -> Optional[float]:
+    v = resp.headers.get("retry-after")
+    try:
+        return float(v) if v is not None else None
+    except ValueError:
+        return None
+
+
+def error_code(resp: httpx.Response) -> Optional[int]:
+    try:
+        body = resp.json()
+    except ValueError:
+        return None
+    return body.get("code") if isinstance(body, dict) else None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """True for errors that can succeed on a later attempt; validation errors are final."""
+    if isinstance(exc, httpx.TimeoutException):
+        return True
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return False
+    status = exc.response.status_code
+    if status in (418, 429) or status >= 500:
+        return True
+    return error_code(exc.response) in RETRYABLE_CODES
@@ -0,0 +1,61 @@
+"""Thin client for :mod:`src.daemon`: newline-delimited JSON over a Unix socket.
+
+Kept to the standard library (``json`` rather than ``orjson``, no HTTP client or
+strategies), so forwarding a command from the CLI costs a socket round trip
+rather than a full bot start-up.
+"""
+from __future__ import annotations
+import json
+import socket
+from typing import Any, Dict, Optional
+
+DEFAULT_SOCKET = "bot.sock"
+
+
+class DaemonError(Exception):
+    """A command the daemon answered with ``ok: false``."""
+
+
+def alive(path: str) -> bool:
+    """True when something accepts connections on the socket at ``path``."""
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+
+class DaemonClient:
+    """Blocking client for a running daemon; one connection, reused across calls."""
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: Optional[float] = None) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self._file = self.sock.makefile("rb")
+        self._ids = 0
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self.sock.close()
+
+    def call(self, cmd: str, args: Optional[Dict[str, Any]] = None) -> Any:
+        """Send one command and return its result; raises :class:`DaemonError` on ``ok: false``."""
+        self._ids += 1
+        self.sock.sendall(json.dumps({"id": self._ids, "cmd": cmd, "args": args or {}}, separators=(",", ":")).encode() + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("daemon closed the connection")
+        reply = json.loads(line)
+        if not reply["ok"]:
+            raise DaemonError(reply["error"])
+        return reply["result"]
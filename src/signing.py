@@ -0,0 +1,168 @@
+"""Request signing and server-time synchronization for signed endpoints.
+
+:class:`Signer` keys HMAC-SHA256 with the API secret once; each signature copies
+that state instead of re-deriving the key pads. :func:`encode_query` builds the
+query string in one pass, skipping percent-encoding for values that need none,
+so the signed string is also the one sent.
+
+:class:`ServerClock` keeps the offset between the local clock and
+``/fapi/v1/time`` (refreshed every ``sync_interval`` seconds, and at once after a
+``-1021`` rejection) and sizes ``recvWindow`` from observed request latency.
+With a ``path`` the last sync is kept on disk and reused by the next process
+while it is younger than ``sync_interval``, so a one-shot CLI command signs its
+first request without a ``/fapi/v1/time`` round trip first.
+"""
+from __future__ import annotations
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Mapping, Optional
+from urllib.parse import quote_plus
+
+# seconds between /fapi/v1/time refreshes
+SYNC_INTERVAL = 300.0
+# seconds before retrying a failed refresh
+SYNC_RETRY = 5.0
+# Binance rejects recvWindow above 60000
+RECV_WINDOW_MIN = 2000
+RECV_WINDOW_MAX = 60000
+# fixed allowance on top of latency, for scheduling hiccups on either side
+RECV_WINDOW_MARGIN = 1000
+
+# characters urlencode leaves as they are
+_SAFE = re.compile(r"[A-Za-z0-9_.\-~]*").fullmatch
+
+
+def _encode_value(v: Any) -> str:
+    if v is True:
+        return "true"
+    if v is False:
+        return "false"
+    if isinstance(v, int):
+        return str(v)
+    s = v if isinstance(v, str) else str(v)
+    return s if _SAFE(s) else quote_plus(s)
+
+
+def encode_query(params: Mapping[str, Any]) -> str:
+    """``urlencode(params, doseq=True)`` with Binance's lowercase booleans, in insertion order."""
+    parts = []
+    for k, v in params.items():
+        if isinstance(v, (list, tuple)):
+            parts.extend(f"{k}={_encode_value(x)}" for x in v)
+        else:
+            parts.append(f"{k}={_encode_value(v)}")
+    return "&".join(parts)
+
+
+class Signer:
+    """HMAC-SHA256 keyed once with the API secret."""
+
+    __slots__ = ("_mac",)
+
+    def __init__(self, secret: bytes) -> None:
+        self._mac = hmac.new(secret, digestmod=hashlib.sha256)
+
+    def sign(self, query: str) -> str:
+        mac = self._mac.copy()
+        mac.update(query.encode())
+        return mac.hexdigest()
+
+
+class ServerClock:
+    """Local estimate of Binance server time and a recvWindow sized to current latency."""
+
+    def __init__(
+        self, *, sync_interval: float = SYNC_INTERVAL, min_window: int = RECV_WINDOW_MIN, max_window: int = RECV_WINDOW_MAX, path: Optional[str] = None,
+    ) -> None:
+        self.sync_interval = sync_interval
+        self.min_window = min_window
+        self.max_window = max_window
+        # server minus local, in ms
+        self.offset_ms = 0.0
+        # half the round trip of the sample the offset came from
+        self.uncertainty_ms = 0.0
+        # EWMA of request latency, in ms
+        self.latency_ms = 0.0
+        self.synced = False
+        self._next_sync = 0.0
+        self._syncing = False
+        self._lock = threading.Lock()
+        self.path = path
+        if path:
+            self._restore()
+
+    def _restore(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                d = json.load(f)
+            age = time.time() - d["at"]
+            if not 0 <= age < self.sync_interval:
+                return
+            self.offset_ms, self.uncertainty_ms, self.latency_ms = d["offsetMs"], d["uncertaintyMs"], d["latencyMs"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        self.synced = True
+        self._next_sync = time.monotonic() + self.sync_interval - age
+
+    def _save(self) -> None:
+        d = {"at": time.time(), "offsetMs": self.offset_ms, "uncertaintyMs": self.uncertainty_ms, "latencyMs": self.latency_ms}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(d, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            # only an optimization for the next process
+            pass
+
+    def now_ms(self) -> int:
+        return int(time.time() * 1000 + self.offset_ms)
+
+    def recv_window(self) -> int:
+        w = RECV_WINDOW_MARGIN + 4 * self.latency_ms + self.uncertainty_ms
+        return int(min(self.max_window, max(self.min_window, w)))
+
+    def due(self) -> bool:
+        """True when a refresh is needed; the caller that gets True must end it with :meth:`release`."""
+        if self._syncing or time.monotonic() < self._next_sync:
+            return False
+        with self._lock:
+            if self._syncing:
+                return False
+            self._syncing = True
+            return True
+
+    def update(self, server_ms: int, sent: float, received: float) -> None:
+        """Take a ``serverTime`` answered between local ``time.time()`` values ``sent`` and ``received``."""
+        rtt_ms = (received - sent) * 1000
+        self.offset_ms = server_ms - (sent * 1000 + rtt_ms / 2)
+        self.uncertainty_ms = rtt_ms / 2
+        self.synced = True
+        self._next_sync = time.monotonic() + self.sync_interval
+        self._syncing = False
+        if self.path:
+            self._save()
+
+    def failed(self) -> None:
+        self._next_sync = time.monotonic() + SYNC_RETRY
+        self._syncing = False
+
+    def release(self) -> None:
+        """End a refresh; one that neither :meth:`update` nor :meth:`failed` settled (it raised) counts as failed."""
+        if self._syncing:
+            self.failed()
+
+    def invalidate(self) -> None:
+        """Refresh before the next signed request, e.g. after a ``-1021`` rejection."""
+        self._next_sync = 0.0
+
+    def observe(self, elapsed: float) -> None:
+        """Feed one request latency (seconds) into the recvWindow estimate."""
+        ms = elapsed * 1000
+        self.latency_ms = ms if not self.latency_ms else self.latency_ms + 0.1 * (ms - self.latency_ms)
@@ -0,0 +1,112 @@
+"""Exact price/quantity quantization on scaled integers.
+
+Tick and step sizes are turned into integers once per symbol; prices and quantities
+are then snapped, checked and formatted with integer arithmetic only, so values like
+0.3 at step 0.1 validate and every emitted string is exactly what Binance expects.
+"""
+from __future__ import annotations
+from decimal import Decimal
+from typing import List, Optional, Tuple, Union
+
+Number = Union[int, float, str, Decimal]
+
+ROUND_DOWN = "down"
+ROUND_UP = "up"
+ROUND_NEAREST = "nearest"
+
+# Extra decimal digits kept when scaling inputs, so a value finer than the tick
+# (0.35 at tick 0.1) is seen as misaligned instead of being rounded onto it.
+_GUARD = 4
+
+
+def decimals(step: str) -> int:
+    """Number of decimal places in a step string such as ``"0.0100"`` (-> 2)."""
+    d = Decimal(step).normalize()
+    return max(0, -d.as_tuple().exponent)
+
+
+class Grid:
+    """One quantization grid (tick or step) at a fixed number of decimals."""
+
+    __slots__ = ("decimals", "unit", "_scale", "_gunit")
+
+    def __init__(self, step: str) -> None:
+        self.decimals = decimals(step)
+        # step expressed in units of 10**-decimals
+        self.unit = int(Decimal(step).scaleb(self.decimals))
+        self._scale = 10 ** (self.decimals + _GUARD)
+        self._gunit = self.unit * 10 ** _GUARD
+
+    def _guarded(self, value: Number) -> int:
+        if isinstance(value, float):
+            return round(value * self._scale)
+        if isinstance(value, int):
+            return value * self._scale
+        return int(Decimal(value).scaleb(self.decimals + _GUARD).to_integral_value())
+
+    def units(self, value: Number, rounding: str = ROUND_NEAREST) -> int:
+        """Snap ``value`` to the grid and return it as a whole number of steps."""
+        q, r = divmod(self._guarded(value), self._gunit)
+        if r and (rounding == ROUND_UP or (rounding == ROUND_NEAREST and 2 * r >= self._gunit)):
+            q += 1
+        return q
+
+    def aligned(self, value: Number) -> bool:
+        return self._guarded(value) % self._gunit == 0
+
+    def format(self, units: int) -> str:
+        """Decimal string for a whole number of steps, e.g. ``681234`` at 0.1 -> ``"68123.4"``."""
+        n = units * self.unit
+        if not self.decimals:
+            return str(n)
+        sign = "-" if n < 0 else ""
+        digits = str(abs(n)).rjust(self.decimals + 1, "0")
+        return f"{sign}{digits[:-self.decimals]}.{digits[-self.decimals:]}"
+
+    def snap(self, value: Number, rounding: str = ROUND_NEAREST) -> str:
+        return self.format(self.units(value, rounding))
+
+    def to_float(self, units: int) -> float:
+        return units * self.unit / 10 ** self.decimals
+
+
+class Quantizer:
+    """Price and quantity grids plus min-qty for one symbol; build once, reuse per order."""
+
+    __slots__ = ("symbol", "price", "qty", "min_qty_units")
+
+    def __init__(self, symbol: str, tick_size: str, step_size: str, min_qty: str) -> None:
+        self.symbol = symbol
+        self.price = Grid(tick_size)
+        self.qty = Grid(step_size)
+        self.min_qty_units = self.qty.units(min_qty, ROUND_UP)
+
+    def price_str(self, price: Number, rounding: str = ROUND_NEAREST) -> str:
+        return self.price.snap(price, rounding)
+
+    def qty_str(self, qty: Number, rounding: str = ROUND_DOWN) -> str:
+        return self.qty.snap(qty, rounding)
+
+    def validate(self, qty: Number, price: Optional[Number]) -> Tuple[str, Optional[str]]:
+        """Raise ``ValueError`` unless qty/price sit exactly on the grids; return their strings."""
+        if not self.qty.aligned(qty):
+            raise ValueError(f"qty {qty} not aligned to stepSize {self.qty.format(1)}")
+        qty_units = self.qty.units(qty)
+        if qty_units < self.min_qty_units:
+            raise ValueError(f"qty {qty} < minQty {self.qty.format(self.min_qty_units)}")
+        px = None
+        if price is not None:
+            if not self.price.aligned(price):
+                raise ValueError(f"price {price} not aligned to tickSize {self.price.format(1)}")
+            px = self.price.snap(price)
+        return self.qty.format(qty_units), px
+
+    def split_qty(self, qty: Number, parts: int) -> List[str]:
+        """Split ``qty`` into ``parts`` step-aligned slices; the remainder goes to the last one."""
+        if parts < 1:
+            raise ValueError("parts must be >= 1")
+        total = self.qty.units(qty, ROUND_DOWN)
+        per = total // parts
+        sizes = [per] * parts
+        sizes[-1] += total - per * parts
+        return [self.qty.format(u) for u in sizes]
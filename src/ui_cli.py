@@ -1,13 +1,9 @@
 from __future__ import annotations
 import sys
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from .utils import Logger, BinanceClient
-from .orders import market_order, limit_order
-from advanced.stop_limit import place_stop_limit
-from advanced.oco import place_oco
-from advanced.twap import run_twap
-from advanced.grid import run_grid
+if TYPE_CHECKING:
+    from .utils import BinanceClient
 
 
 def ask(prompt: str, default: Optional[str] = None) -> str:
@@ -34,6 +30,8 @@ def ask_int(prompt: str, default: Optional[int] = None) -> int:
 
 
 def build_client(use_mainnet: bool, dry_run: bool) -> BinanceClient:
+    # the HTTP client and strategies load after the first prompts, not before them
+    from .utils import BinanceClient, Logger
     logger = Logger()
     return BinanceClient(api_key=None, api_secret=None, mainnet=use_mainnet, logger=logger, dry_run=dry_run)
 
@@ -70,21 +68,25 @@ def main() -> None:
 
         try:
             if choice == "1":
+                from .orders import market_order
                 res = market_order(client, logger, symbol=symbol, side=side, quantity=qty)
                 print({k: res.get(k) for k in ("orderId", "symbol", "status", "type", "side", "price", "origQty") if isinstance(res, dict) and k in res})
             elif choice == "2":
                 price = ask_float("Limit price")
+                from .orders import limit_order
                 res = limit_order(client, logger, symbol=symbol, side=side, quantity=qty, price=price, tif=tif)
                 print({k: res.get(k) for k in ("orderId", "symbol", "status", "type", "side", "price", "origQty") if isinstance(res, dict) and k in res})
             elif choice == "3":
                 stop = ask_float("Stop trigger price")
                 limit_px = ask_float("Stop-Limit price")
+                from advanced.stop_limit import place_stop_limit
                 res = place_stop_limit(client, logger, symbol=symbol, side=side, quantity=qty, stop_price=stop, limit_price=limit_px, tif=tif)
                 print(res)
             elif choice == "4":
                 tp = ask_float("Take-profit limit price")
                 stop = ask_float("Stop trigger price")
                 stop_limit = ask_float("Stop-Limit price")
+                from advanced.oco import place_oco
                 res = place_oco(client, logger, symbol=symbol, side=side, quantity=qty, take_profit=tp, stop=stop, stop_limit=stop_limit, tif=tif)
                 print(res)
             elif choice == "5":
@@ -94,12 +96,14 @@ def main() -> None:
                 price = None
                 if otype == "LIMIT":
                     price = ask_float("Limit price")
-                run_twap(client, logger, symbol=symbol, side=side, qty=qty, slices=slices, interval=interval, order_type=otype, price=price, tif=tif)
-                print("TWAP orders submitted.")
+                from advanced.twap import run_twap
+                res = run_twap(client, logger, symbol=symbol, side=side, qty=qty, slices=slices, interval=interval, order_type=otype, price=price, tif=tif)
+                print(f"TWAP orders submitted: {res['sent']} sent, {res['skipped']} skipped, {res['errors']} failed.")
             elif choice == "6":
                 levels = ask_int("Grid levels", 5)
                 lower = ask_float("Lower price")
                 upper = ask_float("Upper price")
+                from advanced.grid import run_grid
                 run_grid(client, logger, symbol=symbol, side=side, levels=levels, lower=lower, upper=upper, qty=qty, tif=tif)
                 print("Grid orders submitted.")
             else:
@@ -0,0 +1,178 @@
+"""Binance USDT-M user data stream: order and account events pushed over one WebSocket.
+
+    stream = UserDataStream(client)
+    stream.on("ORDER_TRADE_UPDATE", lambda ev: print(ev["o"]["X"]))
+    stream.start_in_thread()          # sync client; ``await stream.run()`` on the async one
+
+The stream creates the listenKey, renews it every ``keepalive_interval`` seconds
+and reconnects with exponential backoff. Events missed while disconnected are
+recovered on reconnect: tracked orders are diffed against one ``openOrders``
+snapshot, only those no longer open are fetched individually, and a synthetic
+``ORDER_TRADE_UPDATE`` (marked ``"gap": True``) is dispatched for anything that
+changed. Orders appear in that set when an event for them arrives
+or when they are registered with :meth:`UserDataStream.track`.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import httpx
+
+from .ratelimit import RateLimitError
+from .utils import AsyncBinanceClient, BinanceClient
+from .ws import StreamClient
+
+# Binance expires a listenKey after 60 minutes without a keepalive
+KEEPALIVE_INTERVAL = 30 * 60
+# openOrders without a symbol costs as much as this many per-symbol calls
+OPEN_ORDERS_ALL_WEIGHT = 40
+FINAL_STATUSES = {"FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH"}
+
+Callback = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+def _order_from_rest(r: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a REST order response onto the short keys of an ORDER_TRADE_UPDATE ``o`` payload."""
+    return {
+        "s": r["symbol"], "c": r.get("clientOrderId"), "S": r.get("side"), "o": r.get("type"),
+        "f": r.get("timeInForce"), "q": r.get("origQty"), "p": r.get("price"), "ap": r.get("avgPrice"),
+        "sp": r.get("stopPrice"), "X": r["status"], "i": r["orderId"], "z": r.get("executedQty", "0"),
+        "T": r.get("updateTime", 0), "R": r.get("reduceOnly"),
+    }
+
+
+class UserDataStream(StreamClient):
+    action = "user_stream"
+
+    def __init__(
+        self,
+        client: Union[BinanceClient, AsyncBinanceClient],
+        *,
+        keepalive_interval: float = KEEPALIVE_INTERVAL,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ) -> None:
+        super().__init__(client, reconnect_delay=reconnect_delay, max_reconnect_delay=max_reconnect_delay)
+        self.keepalive_interval = keepalive_interval
+        self.listen_key: Optional[str] = None
+        # orderId -> last known ``o`` payload, for open orders only
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self._handlers: Dict[str, List[Callback]] = {}
+
+    def on(self, event: str, fn: Callback) -> Callback:
+        """Register ``fn`` for an event type (``ORDER_TRADE_UPDATE``, ``ACCOUNT_UPDATE``, ...) or ``"*"`` for all."""
+        self._handlers.setdefault(event, []).append(fn)
+        return fn
+
+    def track(self, symbol: str, order_id: int) -> None:
+        """Include an order placed over REST in gap recovery before its first event arrives."""
+        self.orders.setdefault(order_id, {"s": symbol.upper(), "i": order_id, "X": "NEW", "z": "0", "T": 0})
+
+    async def _emit(self, ev: Dict[str, Any]) -> None:
+        for fn in self._handlers.get(ev.get("e", ""), []) + self._handlers.get("*", []):
+            try:
+                res = fn(ev)
+                if asyncio.iscoroutine(res):
+                    await res
+            except Exception as e:
+                self.logger.error(action="user_stream_callback", event=ev.get("e"), error=repr(e))
+
+    async def _on_message(self, ev: Dict[str, Any]) -> None:
+        kind = ev.get("e")
+        if kind == "listenKeyExpired":
+            self.logger.info(action="user_stream", event="listenKeyExpired")
+            # the loop reconnects with a fresh key
+            await self.reconnect()
+            return
+        if kind == "ORDER_TRADE_UPDATE":
+            o = ev["o"]
+            if self.client.journal is not None:
+                self.client.journal.on_event(o)
+            if o["X"] in FINAL_STATUSES:
+                self.orders.pop(o["i"], None)
+            else:
+                self.orders[o["i"]] = o
+        await self._emit(ev)
+
+    async def _recover(self) -> None:
+        """Replay what changed on tracked orders while the socket was down.
+
+        One ``openOrders`` snapshot (per symbol, or for all symbols once that is
+        cheaper in weight) covers every order still open; only tracked orders
+        missing from it, i.e. filled or cancelled meanwhile, are fetched one by one.
+        """
+        symbols = sorted({o["s"] for o in self.orders.values()})
+        if not symbols:
+            return
+        snapshot: Dict[int, Dict[str, Any]] = {}
+        # openOrders costs weight 1 per symbol, 40 without one
+        batches: List[Optional[str]] = [None] if len(symbols) >= OPEN_ORDERS_ALL_WEIGHT else list(symbols)
+        failed = set()
+        for sym in batches:
+            try:
+                rows = await self._rest(self.client.open_orders, sym)
+            except RateLimitError as e:
+                # nothing more can be fetched for a while; run() reconnects, and recovers, once it may
+                self.logger.error(action="user_stream_recover", symbol=sym, error=repr(e))
+                raise
+            except httpx.HTTPError as e:
+                self.logger.error(action="user_stream_recover", symbol=sym, error=repr(e))
+                failed.update(symbols if sym is None else [sym])
+                continue
+            snapshot.update((r["orderId"], r) for r in rows)
+        for oid, known in list(self.orders.items()):
+            if known["s"] in failed:
+                continue
+            r = snapshot.get(oid)
+            if r is None:
+                try:
+                    r = await self._rest(self.client.get_order, known["s"], oid)
+                except RateLimitError as e:
+                    self.logger.error(action="user_stream_recover", orderId=oid, error=repr(e))
+                    raise
+                except httpx.HTTPError as e:
+                    self.logger.error(action="user_stream_recover", orderId=oid, error=repr(e))
+                    continue
+            await self._replay(oid, _order_from_rest(r))
+
+    async def _replay(self, oid: int, o: Dict[str, Any]) -> None:
+        current = self.orders.get(oid)
+        # a live event may have overtaken the REST call
+        if current is None or int(current.get("T") or 0) > int(o["T"] or 0):
+            return
+        filled = Decimal(o["z"]) - Decimal(current.get("z") or "0")
+        if not filled and o["X"] == current.get("X"):
+            return
+        o["x"] = "TRADE" if filled > 0 else o["X"]
+        o["l"] = str(filled)
+        await self._on_message({"e": "ORDER_TRADE_UPDATE", "E": int(time.time() * 1000), "T": o["T"], "o": o, "gap": True})
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self._rest(self.client.keepalive_listen_key)
+                self.logger.info(action="user_stream", event="keepalive")
+            except (httpx.HTTPError, RateLimitError) as e:
+                # the key is gone (or unreachable); reconnecting creates a new one
+                self.logger.error(action="user_stream", event="keepalive", error=repr(e))
+                await self.reconnect()
+                return
+
+    async def _url(self) -> str:
+        self.listen_key = (await self._rest(self.client.new_listen_key))["listenKey"]
+        return f"{self.client.ws_url}/ws/{self.listen_key}"
+
+    async def _on_open(self, reconnect: bool) -> None:
+        if reconnect:
+            await self._recover()
+        self._spawn(self._keepalive())
+
+    async def _on_shutdown(self) -> None:
+        if self.listen_key is not None:
+            try:
+                await self._rest(self.client.close_listen_key)
+            except (httpx.HTTPError, RateLimitError):
+                pass
@@ -1,50 +1,132 @@
 from __future__ import annotations
+import asyncio
+import contextvars
 import os
 import time
-import hmac
-import hashlib
-from typing import Any, Dict, Optional
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 import backoff
 import httpx
-from dotenv import load_dotenv
 import orjson
-from urllib.parse import urlencode
+from .log_writer import get_writer, rotate
+from .exchange_cache import DEFAULT_TTL, ExchangeInfoCache, SymbolFilters, default_cache_path
+from .ticks import ROUND_DOWN, Grid, Number
+from .metrics import REGISTRY, MetricsRegistry
+from .env import get_env_flag, load_env
+from .journal import DEFAULT_JOURNAL_DB, OrderJournal
+from .ratelimit import RateLimiter, RateLimitError, depth_weight, error_code, is_retryable, retry_after
+from .signing import ServerClock, Signer, encode_query
 
 BINANCE_FAPI_TESTNET = "https://testnet.binancefuture.com"
 BINANCE_FAPI_MAINNET = "https://fapi.binance.com"
+BINANCE_FSTREAM_TESTNET = "wss://stream.binancefuture.com"
+BINANCE_FSTREAM_MAINNET = "wss://fstream.binance.com"
+# POST /fapi/v1/batchOrders accepts at most this many orders per request (PUT too)
+BATCH_ORDERS_MAX = 5
+# DELETE /fapi/v1/batchOrders takes up to this many orderIds
+BATCH_CANCEL_MAX = 10
+ORDER_PATH = "/fapi/v1/order"
+BATCH_PATH = "/fapi/v1/batchOrders"
+OPEN_ORDERS_PATH = "/fapi/v1/openOrders"
+CANCEL_ALL_PATH = "/fapi/v1/allOpenOrders"
+POSITION_RISK_PATH = "/fapi/v2/positionRisk"
+# seconds; placements that time out are looked up, not resent blindly, so this can be tight
+DEFAULT_HTTP_TIMEOUT = 10.0
+# per-request fields left out of journal entries
+_UNJOURNALED = ("timestamp", "recvWindow", "signature")
+# a failed background exchangeInfo refresh is logged, and the cached filters served until the next try
+_REFRESH_ERRORS = (httpx.HTTPError, RateLimitError, OSError, ValueError, KeyError)
+# logging correlation id of the command being run; per asyncio task, so concurrent commands keep their own
+_REQ_ID: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("req_id", default=None)
 
-load_dotenv(override=False)
+
+class OrderStateUnknown(Exception):
+    """An order request went unanswered and the follow-up lookup failed too; check before placing it again."""
 
 
 def json_dumps(data: Any) -> str:
     return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
 
 
+def _wire_value(v: Any) -> Any:
+    # Binance expects lowercase booleans; str(True) would break the signature
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    return v
+
+
+def _batch_value(v: Any) -> str:
+    # batchOrders entries are JSON objects of string values
+    return str(_wire_value(v))
+
+
 def get_base_url(mainnet: bool) -> str:
+    # explicit override, e.g. a local tools/mock_exchange.py
+    override = os.getenv("BINANCE_FAPI_URL")
+    if override:
+        return override.rstrip("/")
     return BINANCE_FAPI_MAINNET if mainnet else BINANCE_FAPI_TESTNET
 
 
-def get_env_flag(name: str, default: bool = False) -> bool:
-    val = os.getenv(name)
-    if val is None:
-        return default
-    return val.lower() in {"1", "true", "yes", "y"}
+def get_ws_url(mainnet: bool) -> str:
+    override = os.getenv("BINANCE_FSTREAM_URL")
+    if override:
+        return override.rstrip("/")
+    return BINANCE_FSTREAM_MAINNET if mainnet else BINANCE_FSTREAM_TESTNET
 
 
 class Logger:
-    def __init__(self, path: str = "bot.log") -> None:
+    """JSON Lines logger.
+
+    By default each record is appended synchronously. With ``buffered`` (or
+    ``BOT_LOG_BUFFERED=1``) records are handed to a background writer that batches
+    disk writes and rotates the file into gzip archives past ``max_bytes``
+    (``BOT_LOG_MAX_BYTES``), keeping ``backups`` of them (``BOT_LOG_BACKUPS``).
+    With ``archive`` (``BOT_LOG_ARCHIVE``) each rotated segment is also compacted
+    into that columnar archive directory (:mod:`src.log_archive`).
+    """
+
+    def __init__(self, path: str = "bot.log", buffered: Optional[bool] = None, max_bytes: Optional[int] = None, backups: Optional[int] = None, archive: Optional[str] = None) -> None:
+        load_env()
         self.path = path
+        self.buffered = get_env_flag("BOT_LOG_BUFFERED", False) if buffered is None else buffered
+        self.max_bytes = int(os.getenv("BOT_LOG_MAX_BYTES", "0")) if max_bytes is None else max_bytes
+        self.backups = int(os.getenv("BOT_LOG_BACKUPS", "5")) if backups is None else backups
+        self.archive = (os.getenv("BOT_LOG_ARCHIVE") or None) if archive is None else archive
+        # default reqIds: one random prefix per logger plus a counter, instead of a uuid4 per line
+        self._id_prefix = uuid4().hex[:12]
+        self._seq = itertools.count(1)
+        self._ts_sec = -1
+        self._ts_prefix = ""
+        self._writer = get_writer(self.path, max_bytes=self.max_bytes, backups=self.backups, archive=self.archive) if self.buffered else None
         # ensure file exists
         if not os.path.exists(self.path):
             with open(self.path, "w", encoding="utf-8") as f:
                 f.write("")
 
+    def _ts(self) -> str:
+        # strftime only once per second; milliseconds are appended per record
+        now = time.time()
+        sec = int(now)
+        if sec != self._ts_sec:
+            self._ts_sec, self._ts_prefix = sec, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        return f"{self._ts_prefix}.{int((now - sec) * 1000):03d}"
+
+    def _line(self, obj: Dict[str, Any]) -> bytes:
+        obj.setdefault("ts", self._ts())
+        obj.setdefault("reqId", f"{self._id_prefix}-{next(self._seq):x}")
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+
     def _write(self, obj: Dict[str, Any]) -> None:
-        obj.setdefault("ts", time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()))
-        obj.setdefault("reqId", str(uuid4()))
-        with open(self.path, "a", encoding="utf-8") as f:
-            f.write(json_dumps(obj) + "\n")
+        line = self._line(obj)
+        if self._writer is not None:
+            self._writer.put(line)
+            return
+        with open(self.path, "ab") as f:
+            f.write(line)
+        if self.max_bytes and os.path.getsize(self.path) >= self.max_bytes:
+            rotate(self.path, self.backups, self.archive)
 
     def info(self, **k: Any) -> None:
         k["level"] = "INFO"
@@ -54,72 +136,289 @@ class Logger:
         k["level"] = "ERROR"
         self._write(k)
 
+    def flush(self) -> None:
+        """Block until buffered records are on disk (no-op in synchronous mode)."""
+        if self._writer is not None:
+            self._writer.flush()
+
+
+def _http_timeout() -> float:
+    return float(os.getenv("BINANCE_HTTP_TIMEOUT", DEFAULT_HTTP_TIMEOUT))
+
+
+def _giveup(e: Exception) -> bool:
+    return not is_retryable(e)
+
+
+def _on_backoff(details: Dict[str, Any]) -> None:
+    # args of the decorated _request: (self, method, path, ...)
+    client, method, path = details["args"][:3]
+    client.metrics.inc("retries", method=method, path=path)
+
+
+class _BaseClient:
+    """Config, signing and endpoint definitions shared by the sync and async clients.
+
+    Public endpoint methods return whatever ``_request`` returns, so on the async
+    client they return awaitables.
+    """
 
-class BinanceClient:
     def __init__(self, api_key: Optional[str], api_secret: Optional[str], mainnet: bool, logger: Logger, dry_run: bool = False):
+        load_env()
         self.api_key = api_key or os.getenv("BINANCE_API_KEY")
         self.api_secret = (api_secret or os.getenv("BINANCE_API_SECRET") or "").encode()
-        self.base_url = get_base_url(mainnet or get_env_flag("BINANCE_MAINNET", False))
+        mainnet = mainnet or get_env_flag("BINANCE_MAINNET", False)
+        self.base_url = get_base_url(mainnet)
+        self.ws_url = get_ws_url(mainnet)
         self.logger = logger
         self.dry_run = dry_run
-        self.client = httpx.Client(base_url=self.base_url, timeout=30.0)
+        self.metrics: MetricsRegistry = REGISTRY
+        self.rate_limiter = RateLimiter()
+        self.signer = Signer(self.api_secret)
+        cache_path = default_cache_path(self.base_url)
+        # the last time sync is shared on disk next to the exchangeInfo cache
+        self.clock = ServerClock(path=f"{os.path.splitext(cache_path)[0]}.clock.json")
         self._exchange_info_cache: Dict[str, Any] = {}
-        # Per-request logging correlation id set by caller (orders/strategies)
-        self.current_req_id: Optional[str] = None
+        # Full symbol universe, shared on disk between bot processes
+        self.filters_cache = ExchangeInfoCache(cache_path, ttl=float(os.getenv("BINANCE_EXCHANGE_INFO_TTL", DEFAULT_TTL)))
+        # every placement carries a clientOrderId, so an unanswered one can be looked up
+        self._cid_prefix = uuid4().hex[:12]
+        self._cid_seq = itertools.count(1)
+        journal_path = os.getenv("BOT_ORDER_JOURNAL", DEFAULT_JOURNAL_DB)
+        self.journal: Optional[OrderJournal] = OrderJournal(journal_path) if journal_path and not dry_run else None
+
+    @property
+    def current_req_id(self) -> Optional[str]:
+        """Per-request logging correlation id set by caller (orders/strategies), scoped to the current task."""
+        return _REQ_ID.get()
 
-    def _sign(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        # Build canonical query string for Binance HMAC signing
-        # Preserve insertion order of params (dicts are ordered in Py3.7+)
-        query = urlencode(params, doseq=True)
-        signature = hmac.new(self.api_secret, query.encode(), hashlib.sha256).hexdigest()
-        return {**params, "signature": signature}
+    @current_req_id.setter
+    def current_req_id(self, value: Optional[str]) -> None:
+        _REQ_ID.set(value)
+
+    def new_client_order_id(self) -> str:
+        return f"{self._cid_prefix}-{next(self._cid_seq):x}"
+
+    def _sign(self, params: Dict[str, Any]) -> str:
+        """Sign ``params`` in insertion order; adds ``signature`` to them and returns the full query string."""
+        query = encode_query(params)
+        params["signature"] = signature = self.signer.sign(query)
+        return f"{query}&signature={signature}"
 
     def _headers(self) -> Dict[str, str]:
         return {"X-MBX-APIKEY": self.api_key or ""}
 
-    @backoff.on_exception(backoff.expo, (httpx.TimeoutException, httpx.HTTPStatusError), max_tries=3)
+    def _prepare(self, method: str, path: str, signed: bool, params: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]:
+        """Return ``(params, url, stub)``; ``stub`` is set when the call must not hit the network.
+
+        ``url`` carries the exact query string that was signed, so the HTTP layer
+        cannot re-encode it differently.
+        """
+        # copy, so a retry of the same call gets a fresh timestamp and signature
+        params = dict(params) if params else {}
+        if not signed:
+            return params, f"{path}?{encode_query(params)}" if params else path, None
+        params.setdefault("timestamp", self.clock.now_ms())
+        params.setdefault("recvWindow", self.clock.recv_window())
+        url = f"{path}?{self._sign(params)}"
+        if not self.dry_run:
+            return params, url, None
+        # Do not hit private endpoints; return a stub response
+        stub = {"dryRun": True, "method": method, "path": path, "params": params}
+        # mimic order creation response
+        if path == ORDER_PATH and method == "POST":
+            stub.update({"orderId": int(time.time() * 1000) % 10_000_000, "status": "NEW"})
+        elif path == ORDER_PATH and method == "PUT":
+            stub.update({"orderId": params.get("orderId"), "status": "NEW"})
+        elif path == ORDER_PATH and method == "DELETE":
+            stub.update({"orderId": params.get("orderId"), "status": "CANCELED"})
+        elif path == CANCEL_ALL_PATH:
+            stub.update({"code": 200, "msg": "The operation of cancel all open order is done."})
+        if path == BATCH_PATH and method == "POST":
+            base_id = int(time.time() * 1000) % 10_000_000
+            n = len(orjson.loads(params["batchOrders"]))
+            stub.update({"orders": [{"orderId": base_id + i, "status": "NEW"} for i in range(n)]})
+        elif path == BATCH_PATH and method == "PUT":
+            stub.update({"orders": [{"orderId": o.get("orderId"), "status": "NEW"} for o in orjson.loads(params["batchOrders"])]})
+        elif path == BATCH_PATH and method == "DELETE":
+            stub.update({"orders": [{"orderId": oid, "status": "CANCELED"} for oid in orjson.loads(params["orderIdList"])]})
+        self.metrics.inc("dry_run", method=method, path=path)
+        self.logger.info(action="http-dryrun", method=method, path=path, params=params, reqId=self.current_req_id)
+        if path in (OPEN_ORDERS_PATH, POSITION_RISK_PATH):
+            # a dry run has nothing open
+            return params, url, []
+        return params, url, stub
+
     def _request(self, method: str, path: str, signed: bool = False, params: Optional[Dict[str, Any]] = None) -> Any:
-        params = params or {}
-        if signed:
-            params.setdefault("timestamp", int(time.time() * 1000))
-            params.setdefault("recvWindow", 5000)
-            params = self._sign(params)
-            if self.dry_run:
-                # Do not hit private endpoints; return a stub response
-                stub = {"dryRun": True, "method": method, "path": path, "params": params}
-                # mimic order creation response
-                if path == "/fapi/v1/order" and method == "POST":
-                    stub.update({"orderId": int(time.time() * 1000) % 10_000_000, "status": "NEW"})
-                self.logger.info(action="http-dryrun", method=method, path=path, params=params, reqId=self.current_req_id)
-                return stub
-        try:
-            _t0 = time.perf_counter()
-            resp = self.client.request(method, path, params=params, headers=self._headers())
-            resp.raise_for_status()
-            data = resp.json()
-            latency_ms = int((time.perf_counter() - _t0) * 1000)
-            self.logger.info(action="http", method=method, path=path, params=params, status=resp.status_code, latencyMs=latency_ms, reqId=self.current_req_id)
-            return data
-        except httpx.HTTPStatusError as e:
-            latency_ms = None
-            self.logger.error(action="http", method=method, path=path, params=params, status=e.response.status_code, body=e.response.text, latencyMs=latency_ms, reqId=self.current_req_id)
-            raise
+        raise NotImplementedError
+
+    def _pace(self, method: str, path: str, params: Dict[str, Any]) -> float:
+        """Book the request with the rate limiter; returns seconds to wait before sending."""
+        orders = 0
+        weight = None
+        if method in ("POST", "PUT") and path == ORDER_PATH:
+            orders = 1
+        elif method in ("POST", "PUT") and path == BATCH_PATH:
+            orders = len(orjson.loads(params["batchOrders"]))
+        elif path == "/fapi/v1/depth":
+            weight = depth_weight(int(params.get("limit", 500)))
+        elif path == OPEN_ORDERS_PATH and "symbol" not in params:
+            weight = 40
+        return self.rate_limiter.reserve(method, path, orders, weight)
+
+    def _on_error_response(self, resp: httpx.Response) -> None:
+        if resp.status_code == 400 and error_code(resp) == -1021:
+            # our clock drifted from the server's; resync before the retry
+            self.clock.invalidate()
+        wait = retry_after(resp)
+        if wait is None and resp.status_code == 418:
+            # banned without a hint: back off for a full weight window
+            wait = 60.0
+        if wait is not None:
+            self.rate_limiter.block_for(wait)
+
+    # Order journal and unanswered placements
+    def _sent_orders(self, path: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if path == BATCH_PATH:
+            return orjson.loads(params["batchOrders"])
+        return [{k: v for k, v in params.items() if k not in _UNJOURNALED}]
+
+    def _journal_sent(self, method: str, path: str, params: Dict[str, Any]) -> None:
+        if self.journal is not None and method == "POST" and path in (ORDER_PATH, BATCH_PATH):
+            self.journal.sent(self._sent_orders(path, params))
+
+    def _journal_result(self, method: str, path: str, params: Dict[str, Any], data: Any) -> None:
+        if self.journal is None:
+            return
+        if path == ORDER_PATH:
+            self.journal.update([data])
+        elif path == BATCH_PATH and method == "POST":
+            for o, r in zip(self._sent_orders(path, params), data):
+                if "orderId" in r:
+                    self.journal.update([r])
+                elif r.get("code") != -4116:
+                    self.journal.rejected(o["newClientOrderId"], r.get("code"), r.get("msg"))
+        elif path == BATCH_PATH:
+            # cancels and amendments; failed entries leave the order as it was
+            self.journal.update([r for r in data if "orderId" in r])
+        elif path == CANCEL_ALL_PATH and method == "DELETE" and data.get("code") == 200:
+            self.journal.canceled_all(params["symbol"])
+
+    def _journal_error(self, method: str, path: str, params: Dict[str, Any], e: httpx.HTTPStatusError) -> None:
+        if self.journal is None or method != "POST" or path not in (ORDER_PATH, BATCH_PATH) or is_retryable(e):
+            return
+        code, msg = error_code(e.response), e.response.text
+        for o in self._sent_orders(path, params):
+            self.journal.rejected(o["newClientOrderId"], code, msg)
+
+    def _unanswered(self, method: str, path: str, e: Exception) -> bool:
+        """True when an order POST failed without telling whether the orders exist.
+
+        Timeouts and 5xx leave the outcome unknown (the exchange may have
+        accepted the order); ``-4116`` means a resend found the first attempt.
+        """
+        if method != "POST" or path not in (ORDER_PATH, BATCH_PATH):
+            return False
+        if isinstance(e, httpx.TimeoutException):
+            return True
+        return isinstance(e, httpx.HTTPStatusError) and (e.response.status_code >= 500 or error_code(e.response) in (-1007, -4116))
+
+    def _lookup_failed(self, o: Dict[str, Any], e: httpx.HTTPError) -> Optional[Dict[str, Any]]:
+        """``None`` when the lookup proves the order never arrived; raise when it proves nothing."""
+        if isinstance(e, httpx.HTTPStatusError) and error_code(e.response) == -2013:
+            return None
+        self.logger.error(action="order_lookup", clientOrderId=o["newClientOrderId"], error=repr(e), reqId=self.current_req_id)
+        raise OrderStateUnknown(f"{o['symbol']} {o['newClientOrderId']}: no answer and lookup failed ({e!r})") from e
+
+    def _recovered(self, path: str, sent: List[Dict[str, Any]], found: List[Optional[Dict[str, Any]]], e: Exception) -> Any:
+        """Result of an unanswered POST when every order was found; else re-raise so it is resent with the same ids."""
+        self.logger.info(action="order_lookup", path=path, found=sum(r is not None for r in found), missing=sum(r is None for r in found), reqId=self.current_req_id)
+        if all(r is not None for r in found):
+            return found[0] if path == ORDER_PATH else found
+        if path == ORDER_PATH or all(r is None for r in found):
+            raise e
+        return None
+
+    @staticmethod
+    def _merge(found: List[Optional[Dict[str, Any]]], resent: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        it = iter(resent)
+        return [r if r is not None else next(it) for r in found]
+
+    def _clock_synced(self, sent: float, data: Any) -> None:
+        self.clock.update(data["serverTime"], sent, time.time())
+        c = self.clock
+        self.logger.info(action="time_sync", offsetMs=round(c.offset_ms, 1), uncertaintyMs=round(c.uncertainty_ms, 1), recvWindow=c.recv_window())
+
+    def _clock_failed(self, e: Exception) -> None:
+        self.clock.failed()
+        # keep signing with the last known offset
+        self.logger.error(action="time_sync", error=repr(e))
+
+    def _store_filters(self, info: Dict[str, Any], symbol: str) -> SymbolFilters:
+        self.filters_cache.store(info)
+        f = self.filters_cache.get(symbol)
+        if f is None:
+            raise ValueError(f"unknown symbol {symbol}")
+        return f
 
     # Public
     def ping(self) -> Any:
         return self._request("GET", "/fapi/v1/ping")
 
-    def exchange_info(self, symbol: str) -> Dict[str, Any]:
-        s = symbol.upper()
-        if s in self._exchange_info_cache:
-            return self._exchange_info_cache[s]
-        data = self._request("GET", "/fapi/v1/exchangeInfo", params={"symbol": s})
-        self._exchange_info_cache[s] = data
-        return data
+    def server_time(self) -> Any:
+        return self._request("GET", "/fapi/v1/time")
+
+    def depth(self, symbol: str, limit: int = 1000) -> Any:
+        return self._request("GET", "/fapi/v1/depth", params={"symbol": symbol.upper(), "limit": limit})
 
     # Private
     def place_order(self, **params: Any) -> Any:
-        return self._request("POST", "/fapi/v1/order", signed=True, params=params)
+        params.setdefault("newClientOrderId", self.new_client_order_id())
+        return self._request("POST", ORDER_PATH, signed=True, params=params)
+
+    def _batch_chunks(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Split orders into batchOrders request params of at most BATCH_ORDERS_MAX each."""
+        chunks = []
+        for i in range(0, len(orders), BATCH_ORDERS_MAX):
+            chunk = [{k: _batch_value(v) for k, v in o.items()} for o in orders[i:i + BATCH_ORDERS_MAX]]
+            for o in chunk:
+                o.setdefault("newClientOrderId", self.new_client_order_id())
+            chunks.append({"batchOrders": json_dumps(chunk)})
+        return chunks
+
+    def _cancel_chunks(self, symbol: str, order_ids: List[int]) -> List[Dict[str, Any]]:
+        s = symbol.upper()
+        return [{"symbol": s, "orderIdList": json_dumps(order_ids[i:i + BATCH_CANCEL_MAX])} for i in range(0, len(order_ids), BATCH_CANCEL_MAX)]
+
+    def _modify_chunks(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {"batchOrders": json_dumps([{k: _batch_value(v) for k, v in o.items()} for o in orders[i:i + BATCH_ORDERS_MAX]])}
+            for i in range(0, len(orders), BATCH_ORDERS_MAX)
+        ]
+
+    @staticmethod
+    def _per_order(res: Any) -> List[Dict[str, Any]]:
+        # dry-run stubs carry their per-order results under "orders"
+        return res.get("orders", []) if isinstance(res, dict) else res
+
+    def _batch_results(self, chunk_params: Dict[str, Any], res: Any) -> List[Dict[str, Any]]:
+        res = self._per_order(res)
+        sent = orjson.loads(chunk_params["batchOrders"])
+        for o, r in zip(sent, res):
+            # a batch is accepted as a whole but each order can fail on its own
+            if "code" in r and "orderId" not in r:
+                self.logger.error(action="batch_order", params=o, code=r.get("code"), msg=r.get("msg"), reqId=self.current_req_id)
+        return res
+
+    # User data stream (API key only, not signed)
+    def new_listen_key(self) -> Any:
+        return self._request("POST", "/fapi/v1/listenKey")
+
+    def keepalive_listen_key(self) -> Any:
+        return self._request("PUT", "/fapi/v1/listenKey")
+
+    def close_listen_key(self) -> Any:
+        return self._request("DELETE", "/fapi/v1/listenKey")
 
     def set_leverage(self, symbol: str, leverage: int) -> Any:
         return self._request("POST", "/fapi/v1/leverage", signed=True, params={"symbol": symbol.upper(), "leverage": leverage})
@@ -130,7 +429,7 @@ class BinanceClient:
             params["orderId"] = order_id
         if client_order_id is not None:
             params["origClientOrderId"] = client_order_id
-        return self._request("GET", "/fapi/v1/order", signed=True, params=params)
+        return self._request("GET", ORDER_PATH, signed=True, params=params)
 
     def cancel_order(self, symbol: str, order_id: Optional[int] = None, client_order_id: Optional[str] = None) -> Any:
         params: Dict[str, Any] = {"symbol": symbol.upper()}
@@ -138,36 +437,390 @@ class BinanceClient:
             params["orderId"] = order_id
         if client_order_id is not None:
             params["origClientOrderId"] = client_order_id
-        return self._request("DELETE", "/fapi/v1/order", signed=True, params=params)
+        return self._request("DELETE", ORDER_PATH, signed=True, params=params)
+
+    def modify_order(self, symbol: str, side: str, quantity: Any, price: Any, order_id: Optional[int] = None, client_order_id: Optional[str] = None) -> Any:
+        """Amend a resting LIMIT order in place (``PUT /fapi/v1/order``); it keeps its orderId.
+
+        Only a pure quantity reduction keeps the order's queue priority.
+        """
+        params: Dict[str, Any] = {"symbol": symbol.upper()}
+        if order_id is not None:
+            params["orderId"] = order_id
+        if client_order_id is not None:
+            params["origClientOrderId"] = client_order_id
+        params.update(side=side.upper(), quantity=quantity, price=price)
+        return self._request("PUT", ORDER_PATH, signed=True, params=params)
+
+    def open_orders(self, symbol: Optional[str] = None) -> Any:
+        """Open orders of ``symbol``, or of every symbol (weight 40 instead of 1)."""
+        return self._request("GET", OPEN_ORDERS_PATH, signed=True, params={"symbol": symbol.upper()} if symbol else None)
 
+    def cancel_all_orders(self, symbol: str) -> Any:
+        """Cancel every open order of ``symbol``, conditional ones included, in one request of weight 1."""
+        return self._request("DELETE", CANCEL_ALL_PATH, signed=True, params={"symbol": symbol.upper()})
+
+    def position_risk(self, symbol: Optional[str] = None) -> Any:
+        return self._request("GET", POSITION_RISK_PATH, signed=True, params={"symbol": symbol.upper()} if symbol else None)
+
+
+class BinanceClient(_BaseClient):
+    def __init__(self, api_key: Optional[str], api_secret: Optional[str], mainnet: bool, logger: Logger, dry_run: bool = False):
+        super().__init__(api_key, api_secret, mainnet, logger, dry_run)
+        self._http: Optional[httpx.Client] = None
 
-def get_symbol_filters(info: Dict[str, Any]) -> Dict[str, Any]:
-    sym = info["symbols"][0]
-    filters = {f["filterType"]: f for f in sym["filters"]}
-    return {
-        "symbol": sym["symbol"],
-        "pricePrecision": sym.get("pricePrecision"),
-        "quantityPrecision": sym.get("quantityPrecision"),
-        "tickSize": float(filters["PRICE_FILTER"]["tickSize"]),
-        "stepSize": float(filters["LOT_SIZE"]["stepSize"]),
-        "minQty": float(filters["LOT_SIZE"]["minQty"]),
-        "minNotional": float(filters.get("MIN_NOTIONAL", {}).get("notional", 0.0)),
-    }
+    @property
+    def client(self) -> httpx.Client:
+        # built on first use: the TLS context alone costs tens of ms that dry runs never need
+        if self._http is None:
+            self._http = httpx.Client(base_url=self.base_url, timeout=_http_timeout())
+        return self._http
+
+    @client.setter
+    def client(self, value: httpx.Client) -> None:
+        self._http = value
+
+    @backoff.on_exception(backoff.expo, (httpx.TimeoutException, httpx.HTTPStatusError), max_tries=3, giveup=_giveup, on_backoff=_on_backoff)
+    def _request(self, method: str, path: str, signed: bool = False, params: Optional[Dict[str, Any]] = None) -> Any:
+        if signed and not self.dry_run and self.clock.due():
+            self.sync_time()
+        raw = params
+        params, url, stub = self._prepare(method, path, signed, raw)
+        if stub is not None:
+            return stub
+        delay = self._pace(method, path, params)
+        if delay:
+            time.sleep(delay)
+            if signed:
+                # the wait can outlast recvWindow; sign again with a fresh timestamp
+                params, url, _ = self._prepare(method, path, signed, raw)
+        self._journal_sent(method, path, params)
+        _t0 = time.perf_counter()
+        try:
+            resp = self.client.request(method, url, headers=self._headers())
+            self.rate_limiter.update(resp.headers)
+            resp.raise_for_status()
+            data = resp.json()
+            elapsed = time.perf_counter() - _t0
+            self.clock.observe(elapsed)
+            self.metrics.observe(method, path, resp.status_code, elapsed)
+            self.logger.info(action="http", method=method, path=path, params=params, status=resp.status_code, latencyMs=int(elapsed * 1000), reqId=self.current_req_id)
+            self._journal_result(method, path, params, data)
+            return data
+        except httpx.HTTPStatusError as e:
+            elapsed = time.perf_counter() - _t0
+            self._on_error_response(e.response)
+            self.metrics.observe(method, path, e.response.status_code, elapsed)
+            self.logger.error(action="http", method=method, path=path, params=params, status=e.response.status_code, body=e.response.text, latencyMs=int(elapsed * 1000), reqId=self.current_req_id)
+            if self._unanswered(method, path, e):
+                return self._recover(path, params, e)
+            self._journal_error(method, path, params, e)
+            raise
+        except httpx.TimeoutException as e:
+            self.metrics.observe(method, path, "timeout", time.perf_counter() - _t0)
+            self.metrics.inc("timeouts", method=method, path=path)
+            if self._unanswered(method, path, e):
+                return self._recover(path, params, e)
+            raise
+
+    def _recover(self, path: str, params: Dict[str, Any], e: Exception) -> Any:
+        """Look up an unanswered order POST by clientOrderId instead of resending it blindly."""
+        sent = self._sent_orders(path, params)
+        found = [self._lookup(o) for o in sent]
+        res = self._recovered(path, sent, found, e)
+        if res is not None:
+            return res
+        # part of a batch arrived: resend the rest, under the same ids
+        missing = [o for o, r in zip(sent, found) if r is None]
+        return self._merge(found, self._request("POST", BATCH_PATH, signed=True, params={"batchOrders": json_dumps(missing)}))
+
+    def _lookup(self, o: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            return self.get_order(o["symbol"], client_order_id=o["newClientOrderId"])
+        except httpx.HTTPError as e:
+            return self._lookup_failed(o, e)
+
+    def sync_time(self) -> None:
+        """Refresh the server-time offset used for ``timestamp``; runs on its own every few minutes."""
+        sent = time.time()
+        try:
+            self._clock_synced(sent, self.server_time())
+        except (httpx.HTTPError, KeyError) as e:
+            self._clock_failed(e)
+        finally:
+            # anything else (a RateLimitError from pacing, cancellation) must not leave the clock marked as syncing
+            self.clock.release()
+
+    # Public
+    def exchange_info(self, symbol: str) -> Dict[str, Any]:
+        s = symbol.upper()
+        if s in self._exchange_info_cache:
+            return self._exchange_info_cache[s]
+        data = self._request("GET", "/fapi/v1/exchangeInfo", params={"symbol": s})
+        self._exchange_info_cache[s] = data
+        return data
+
+    def symbol_filters(self, symbol: str) -> SymbolFilters:
+        """Filters for ``symbol`` from the shared cache, fetching the full universe on a miss."""
+        s = symbol.upper()
+        f = self.filters_cache.get(s)
+        if f is None:
+            return self._store_filters(self._request("GET", "/fapi/v1/exchangeInfo"), s)
+        if self.filters_cache.is_stale():
+            self.filters_cache.refresh_in_background(self._refresh_filters)
+        return f
+
+    def _refresh_filters(self) -> None:
+        try:
+            self.filters_cache.store(self._request("GET", "/fapi/v1/exchangeInfo"))
+        except _REFRESH_ERRORS as e:
+            self.logger.error(action="exchange_info_refresh", error=repr(e))
+
+    # Private
+    def place_orders_batch(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Place orders via POST /fapi/v1/batchOrders, BATCH_ORDERS_MAX per request.
+
+        Returns one result per input order, in order. Rejected orders come back as
+        ``{"code": ..., "msg": ...}`` entries instead of raising.
+        """
+        results: List[Dict[str, Any]] = []
+        for chunk in self._batch_chunks(orders):
+            res = self._request("POST", BATCH_PATH, signed=True, params=chunk)
+            results.extend(self._batch_results(chunk, res))
+        return results
+
+    def cancel_orders_batch(self, symbol: str, order_ids: List[int]) -> List[Dict[str, Any]]:
+        """Cancel orders of one symbol via DELETE /fapi/v1/batchOrders, BATCH_CANCEL_MAX per request.
+
+        Returns one result per orderId; orders already gone come back as
+        ``{"code": -2011, ...}`` entries.
+        """
+        results: List[Dict[str, Any]] = []
+        for chunk in self._cancel_chunks(symbol, order_ids):
+            results.extend(self._per_order(self._request("DELETE", BATCH_PATH, signed=True, params=chunk)))
+        return results
+
+    def modify_orders_batch(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Amend resting LIMIT orders via PUT /fapi/v1/batchOrders.
+
+        Each entry needs ``symbol``, ``orderId`` (or ``origClientOrderId``),
+        ``side``, ``quantity`` and ``price``; results come back per order like
+        :meth:`place_orders_batch`.
+        """
+        results: List[Dict[str, Any]] = []
+        for chunk in self._modify_chunks(orders):
+            results.extend(self._per_order(self._request("PUT", BATCH_PATH, signed=True, params=chunk)))
+        return results
+
+    def reconcile_journal(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Bring the journal's open orders up to date; returns those still open.
+
+        One ``openOrders`` call refreshes the ones still resting; each one missing
+        from it (filled, cancelled or expired meanwhile) is looked up by clientOrderId.
+        """
+        if self.journal is None:
+            return []
+        known = self.journal.open_orders(symbol)
+        if not known:
+            return []
+        rows = self.open_orders(symbol)
+        self.journal.update(rows)
+        resting = {r.get("clientOrderId") for r in rows}
+        for o in known:
+            if o["clientOrderId"] in resting:
+                continue
+            try:
+                # journaled like any GET /fapi/v1/order response
+                self.get_order(o["symbol"], client_order_id=o["clientOrderId"])
+            except httpx.HTTPError as e:
+                self.logger.error(action="journal_reconcile", clientOrderId=o["clientOrderId"], error=repr(e))
+        return self.journal.open_orders(symbol)
+
+
+class AsyncBinanceClient(_BaseClient):
+    """asyncio twin of :class:`BinanceClient` for concurrent order fan-out.
+
+    Requests share one pooled HTTP/2 keep-alive connection set; at most
+    ``max_in_flight`` requests are outstanding at any time. Use as
+    ``async with AsyncBinanceClient(...) as client:`` or call :meth:`aclose`.
+    """
+
+    def __init__(self, api_key: Optional[str], api_secret: Optional[str], mainnet: bool, logger: Logger, dry_run: bool = False, max_in_flight: int = 20):
+        super().__init__(api_key, api_secret, mainnet, logger, dry_run)
+        self._limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._exchange_info_locks: Dict[str, asyncio.Lock] = {}
+        self._filters_lock = asyncio.Lock()
+        self._filters_refresh: Optional[asyncio.Task] = None
+        self._clock_sync: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "AsyncBinanceClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(base_url=self.base_url, timeout=_http_timeout(), http2=True, limits=self._limits)
+        return self._http
+
+    @client.setter
+    def client(self, value: httpx.AsyncClient) -> None:
+        self._http = value
+
+    @backoff.on_exception(backoff.expo, (httpx.TimeoutException, httpx.HTTPStatusError), max_tries=3, giveup=_giveup, on_backoff=_on_backoff)
+    async def _request(self, method: str, path: str, signed: bool = False, params: Optional[Dict[str, Any]] = None) -> Any:
+        if signed and not self.dry_run:
+            await self._wait_clock()
+        raw = params
+        params, url, stub = self._prepare(method, path, signed, raw)
+        if stub is not None:
+            return stub
+        delay = self._pace(method, path, params)
+        if delay:
+            await asyncio.sleep(delay)
+            if signed:
+                # the wait can outlast recvWindow; sign again with a fresh timestamp
+                params, url, _ = self._prepare(method, path, signed, raw)
+        self._journal_sent(method, path, params)
+        unanswered: Optional[Exception] = None
+        async with self._in_flight:
+            _t0 = time.perf_counter()
+            try:
+                resp = await self.client.request(method, url, headers=self._headers())
+                self.rate_limiter.update(resp.headers)
+                resp.raise_for_status()
+                elapsed = time.perf_counter() - _t0
+                self.clock.observe(elapsed)
+            except httpx.HTTPStatusError as e:
+                elapsed = time.perf_counter() - _t0
+                self._on_error_response(e.response)
+                self.metrics.observe(method, path, e.response.status_code, elapsed)
+                self.logger.error(action="http", method=method, path=path, params=params, status=e.response.status_code, body=e.response.text, latencyMs=int(elapsed * 1000), reqId=self.current_req_id)
+                if not self._unanswered(method, path, e):
+                    self._journal_error(method, path, params, e)
+                    raise
+                unanswered = e
+            except httpx.TimeoutException as e:
+                self.metrics.observe(method, path, "timeout", time.perf_counter() - _t0)
+                self.metrics.inc("timeouts", method=method, path=path)
+                if not self._unanswered(method, path, e):
+                    raise
+                unanswered = e
+        if unanswered is not None:
+            # outside the in-flight slot: the lookups need slots of their own
+            return await self._recover(path, params, unanswered)
+        data = resp.json()
+        self.metrics.observe(method, path, resp.status_code, elapsed)
+        self.logger.info(action="http", method=method, path=path, params=params, status=resp.status_code, latencyMs=int(elapsed * 1000), reqId=self.current_req_id)
+        self._journal_result(method, path, params, data)
+        return data
+
+    async def _recover(self, path: str, params: Dict[str, Any], e: Exception) -> Any:
+        """Async :meth:`BinanceClient._recover`; the lookups run concurrently."""
+        sent = self._sent_orders(path, params)
+        found = list(await asyncio.gather(*(self._lookup(o) for o in sent)))
+        res = self._recovered(path, sent, found, e)
+        if res is not None:
+            return res
+        missing = [o for o, r in zip(sent, found) if r is None]
+        return self._merge(found, await self._request("POST", BATCH_PATH, signed=True, params={"batchOrders": json_dumps(missing)}))
+
+    async def _lookup(self, o: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.get_order(o["symbol"], client_order_id=o["newClientOrderId"])
+        except httpx.HTTPError as e:
+            return self._lookup_failed(o, e)
+
+    async def _wait_clock(self) -> None:
+        if self.clock.due():
+            self._clock_sync = asyncio.create_task(self.sync_time())
+        # a fan-out waits for the refresh in flight instead of signing with the offset it replaces
+        if self._clock_sync is not None and not self._clock_sync.done():
+            await asyncio.shield(self._clock_sync)
+
+    async def sync_time(self) -> None:
+        """Async :meth:`BinanceClient.sync_time`."""
+        sent = time.time()
+        try:
+            self._clock_synced(sent, await self.server_time())
+        except (httpx.HTTPError, KeyError) as e:
+            self._clock_failed(e)
+        finally:
+            # anything else (a RateLimitError from pacing, cancellation) must not leave the clock marked as syncing
+            self.clock.release()
+
+    # Public
+    async def exchange_info(self, symbol: str) -> Dict[str, Any]:
+        s = symbol.upper()
+        if s in self._exchange_info_cache:
+            return self._exchange_info_cache[s]
+        # One fetch per symbol even when a whole ladder asks at once
+        lock = self._exchange_info_locks.setdefault(s, asyncio.Lock())
+        async with lock:
+            if s not in self._exchange_info_cache:
+                self._exchange_info_cache[s] = await self._request("GET", "/fapi/v1/exchangeInfo", params={"symbol": s})
+        return self._exchange_info_cache[s]
+
+    async def symbol_filters(self, symbol: str) -> SymbolFilters:
+        """Async :meth:`BinanceClient.symbol_filters`; stale entries refresh on a background task."""
+        s = symbol.upper()
+        f = self.filters_cache.get(s)
+        if f is None:
+            # One universe fetch even when a whole ladder misses at once
+            async with self._filters_lock:
+                f = self.filters_cache.get(s)
+                if f is None:
+                    return self._store_filters(await self._request("GET", "/fapi/v1/exchangeInfo"), s)
+        if self.filters_cache.is_stale() and (self._filters_refresh is None or self._filters_refresh.done()):
+            self._filters_refresh = asyncio.create_task(self._refresh_filters())
+        return f
+
+    async def _refresh_filters(self) -> None:
+        try:
+            self.filters_cache.store(await self._request("GET", "/fapi/v1/exchangeInfo"))
+        except _REFRESH_ERRORS as e:
+            self.logger.error(action="exchange_info_refresh", error=repr(e))
+
+    # Private
+    async def place_orders_batch(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async :meth:`BinanceClient.place_orders_batch`; chunks are sent concurrently."""
+        chunks = self._batch_chunks(orders)
+        responses = await asyncio.gather(*(self._request("POST", BATCH_PATH, signed=True, params=c) for c in chunks))
+        results: List[Dict[str, Any]] = []
+        for chunk, res in zip(chunks, responses):
+            results.extend(self._batch_results(chunk, res))
+        return results
+
+    async def cancel_orders_batch(self, symbol: str, order_ids: List[int]) -> List[Dict[str, Any]]:
+        """Async :meth:`BinanceClient.cancel_orders_batch`; chunks are sent concurrently."""
+        responses = await asyncio.gather(*(self._request("DELETE", BATCH_PATH, signed=True, params=c) for c in self._cancel_chunks(symbol, order_ids)))
+        return [r for res in responses for r in self._per_order(res)]
+
+    async def modify_orders_batch(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async :meth:`BinanceClient.modify_orders_batch`; chunks are sent concurrently."""
+        responses = await asyncio.gather(*(self._request("PUT", BATCH_PATH, signed=True, params=c) for c in self._modify_chunks(orders)))
+        return [r for res in responses for r in self._per_order(res)]
+
+
+def get_symbol_filters(info: Dict[str, Any]) -> SymbolFilters:
+    return SymbolFilters.from_symbol(info["symbols"][0])
 
 
 def round_to_step(value: float, step: float) -> float:
     if step <= 0:
         return value
-    return (int(value / step)) * step
-
-
-def validate_order(symbol_filters: Dict[str, Any], qty: float, price: Optional[float]) -> None:
-    if qty < symbol_filters["minQty"]:
-        raise ValueError(f"qty {qty} < minQty {symbol_filters['minQty']}")
-    if price is not None:
-        px = round_to_step(price, symbol_filters["tickSize"])
-        if abs(px - price) > 1e-12:
-            raise ValueError(f"price {price} not aligned to tickSize {symbol_filters['tickSize']}")
-    qy = round_to_step(qty, symbol_filters["stepSize"])
-    if abs(qy - qty) > 1e-12:
-        raise ValueError(f"qty {qty} not aligned to stepSize {symbol_filters['stepSize']}")
+    g = Grid(repr(step))
+    return g.to_float(g.units(value, ROUND_DOWN))
+
+
+def validate_order(symbol_filters: SymbolFilters, qty: Number, price: Optional[Number]) -> Tuple[str, Optional[str]]:
+    """Check qty/price against the symbol's grids; return them as exact exchange strings."""
+    return symbol_filters.quantizer.validate(qty, price)
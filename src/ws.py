@@ -0,0 +1,135 @@
+"""Reconnecting WebSocket loop shared by the user-data and market-data streams.
+
+Subclasses provide the URL to connect to and a message handler; this class owns
+the connection, exponential reconnect backoff, background tasks tied to one
+connection, and running the loop on a thread for the sync client.
+"""
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Union
+
+import httpx
+import orjson
+import websockets
+from websockets.asyncio.client import connect
+
+from .ratelimit import RateLimitError
+from .utils import AsyncBinanceClient, BinanceClient
+
+
+class StreamClient:
+    # ``action`` of this stream's log records
+    action = "stream"
+
+    def __init__(self, client: Union[BinanceClient, AsyncBinanceClient], *, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0) -> None:
+        self.client = client
+        self.logger = client.logger
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = threading.Event()
+        self.reconnects = 0
+        self._ws: Any = None
+        self._tasks: List[asyncio.Task] = []
+        self._closing = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # Subclass hooks
+    async def _url(self) -> str:
+        raise NotImplementedError
+
+    async def _on_open(self, reconnect: bool) -> None:
+        pass
+
+    async def _on_message(self, msg: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def _on_shutdown(self) -> None:
+        pass
+
+    async def _rest(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call a client endpoint without blocking the loop, whichever client this is."""
+        if isinstance(self.client, AsyncBinanceClient):
+            return await fn(*args, **kwargs)
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def _spawn(self, coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+        """Run ``coro`` for the lifetime of the current connection."""
+        t = asyncio.get_running_loop().create_task(coro)
+        self._tasks.append(t)
+        return t
+
+    async def reconnect(self) -> None:
+        """Drop the current connection; :meth:`run` opens a new one."""
+        if self._ws is not None:
+            await self._ws.close()
+
+    async def wait_connected(self, timeout: float = 10.0) -> None:
+        """Wait until the socket is up, so nothing sent afterwards can be missed."""
+        deadline = time.monotonic() + timeout
+        while not self.connected.is_set():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{self.action} did not connect")
+            await asyncio.sleep(0.01)
+
+    async def run(self) -> None:
+        """Hold the stream open until :meth:`close`; reconnects on any failure."""
+        self._loop = asyncio.get_running_loop()
+        self._closing = asyncio.Event()
+        delay = self.reconnect_delay
+        first = True
+        while not self._closing.is_set():
+            pause = 0.0
+            try:
+                async with connect(await self._url(), max_size=None) as ws:
+                    self._ws = ws
+                    if not first:
+                        self.reconnects += 1
+                    await self._on_open(not first)
+                    first = False
+                    delay = self.reconnect_delay
+                    self.connected.set()
+                    self.logger.info(action=self.action, event="connected", reconnects=self.reconnects)
+                    try:
+                        async for msg in ws:
+                            await self._on_message(orjson.loads(msg))
+                    finally:
+                        for t in self._tasks:
+                            t.cancel()
+                        self._tasks.clear()
+            except RateLimitError as e:
+                # REST budget held (a long Retry-After, a ban): wait it out, the stream is not given up
+                self.logger.error(action=self.action, event="disconnected", error=repr(e))
+                pause = e.wait
+            except (OSError, websockets.WebSocketException, httpx.HTTPError, KeyError) as e:
+                self.logger.error(action=self.action, event="disconnected", error=repr(e))
+            self.connected.clear()
+            if self._closing.is_set():
+                break
+            try:
+                await asyncio.wait_for(self._closing.wait(), max(delay, pause))
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self.max_reconnect_delay)
+        await self._on_shutdown()
+
+    async def close(self) -> None:
+        """Stop :meth:`run`."""
+        self._closing.set()
+        if self._ws is not None:
+            await self._ws.close()
+
+    def start_in_thread(self) -> threading.Thread:
+        """Run the stream on its own event loop; callbacks are invoked on that thread."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), name=self.action, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Close a stream started with :meth:`start_in_thread`."""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.close(), self._loop)
+        if self._thread is not None:
+            self._thread.join(timeout)
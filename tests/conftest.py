@@ -0,0 +1,28 @@
+"""Shared fixtures: a fresh in-process mock exchange per test (see ``tools/mock_exchange.py``)."""
+from __future__ import annotations
+import os
+import sys
+from typing import Any, Iterator, Tuple
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import mock_exchange  # noqa: E402
+
+
+@pytest.fixture
+def mock(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> Iterator[Tuple[mock_exchange.MockExchange, str]]:
+    """Mock exchange with streams and no random walk; clients built in the test talk to it."""
+    server, ex, url = mock_exchange.start(api_key="k", api_secret="s", tick_interval=0)
+    monkeypatch.setenv("BINANCE_FAPI_URL", url)
+    monkeypatch.setenv("BINANCE_FSTREAM_URL", ex.ws_url)
+    monkeypatch.setenv("BINANCE_EXCHANGE_INFO_CACHE", str(tmp_path / "exchange_info.bin"))
+    monkeypatch.setenv("BOT_ORDER_JOURNAL", str(tmp_path / "orders.db"))
+    try:
+        yield ex, url
+    finally:
+        server.shutdown()
+        server.server_close()
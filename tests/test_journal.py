@@ -0,0 +1,96 @@
+"""Order journal and unanswered-placement recovery against the mock exchange."""
+from __future__ import annotations
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pytest
+
+from mock_exchange import ApiError, MockExchange
+from src.utils import BinanceClient, Logger
+
+ORDER = ("POST", "/fapi/v1/order")
+LOOKUP = ("GET", "/fapi/v1/order")
+LOST = ApiError(503, -1001, "Internal error; unable to process your request. Please try again.")
+UNKNOWN = ApiError(400, -2013, "Order does not exist.")
+
+
+def _flaky(ex: MockExchange, route: Tuple[str, str], error: ApiError, times: int = 1, handled: bool = False) -> None:
+    """Answer ``route`` with ``error`` ``times`` times; with ``handled`` the request still takes effect first."""
+    signed, fn = ex.routes[route]
+    left = [times]
+
+    def wrapped(p: Dict[str, str]) -> Any:
+        if not left[0]:
+            return fn(p)
+        left[0] -= 1
+        if handled:
+            fn(p)
+        raise error
+
+    ex.routes[route] = (signed, wrapped)
+
+
+def _orders(ex: MockExchange, cid: str) -> List[Any]:
+    return [o for o in ex.engine.orders.values() if o.client_id == cid]
+
+
+@pytest.fixture
+def client(mock: Tuple[MockExchange, str], tmp_path: Any) -> Iterator[BinanceClient]:
+    c = BinanceClient("k", "s", False, Logger(str(tmp_path / "bot.log")))
+    yield c
+    c.journal.close()
+
+
+def _place(client: BinanceClient, price: str = "60000") -> Dict[str, Any]:
+    return client.place_order(symbol="BTCUSDT", side="BUY", type="LIMIT", price=price, quantity="0.01", timeInForce="GTC")
+
+
+def _assert_placed_once(ex: MockExchange, client: BinanceClient, r: Dict[str, Any]) -> None:
+    cid = r["clientOrderId"]
+    assert [o.id for o in _orders(ex, cid)] == [r["orderId"]]
+    assert client.journal.get(cid)["status"] == "NEW"
+    assert client.journal.pending() == []
+
+
+def test_lost_response_is_looked_up_not_resent(mock: Tuple[MockExchange, str], client: BinanceClient) -> None:
+    ex, _ = mock
+    _flaky(ex, ORDER, LOST, handled=True)
+    _assert_placed_once(ex, client, _place(client))
+
+
+def test_unplaced_order_is_resent_under_same_id(mock: Tuple[MockExchange, str], client: BinanceClient) -> None:
+    ex, _ = mock
+    _flaky(ex, ORDER, LOST)
+    _assert_placed_once(ex, client, _place(client))
+
+
+def test_duplicate_resend_finds_first_order(mock: Tuple[MockExchange, str], client: BinanceClient) -> None:
+    ex, _ = mock
+    # placed, but the lookup misses it: the resend is refused as a duplicate (-4116) and looked up again
+    _flaky(ex, ORDER, LOST, handled=True)
+    _flaky(ex, LOOKUP, UNKNOWN)
+    _assert_placed_once(ex, client, _place(client))
+
+
+def test_rejected_order_leaves_sending(mock: Tuple[MockExchange, str], client: BinanceClient) -> None:
+    with pytest.raises(Exception):
+        client.place_order(symbol="BTCUSDT", side="BUY", type="LIMIT", price="60000", quantity="0.0001", timeInForce="GTC")
+    assert client.journal.pending() == []
+
+
+def test_cancel_all_closes_journal_entries(mock: Tuple[MockExchange, str], client: BinanceClient) -> None:
+    for i in range(3):
+        _place(client, str(60000 - i))
+    assert len(client.journal.open_orders("BTCUSDT")) == 3
+    client.cancel_all_orders("BTCUSDT")
+    assert client.journal.open_orders("BTCUSDT") == []
+
+
+def test_reconcile_drops_orders_finished_elsewhere(mock: Tuple[MockExchange, str], client: BinanceClient) -> None:
+    ex, _ = mock
+    kept, gone = _place(client), _place(client, "59000")
+    # cancelled behind the journal's back, with no user data stream running
+    ex.engine.cancel({"symbol": "BTCUSDT", "orderId": str(gone["orderId"])})
+    assert len(client.journal.open_orders()) == 2
+    rows = client.reconcile_journal("BTCUSDT")
+    assert [r["clientOrderId"] for r in rows] == [kept["clientOrderId"]]
+    assert client.journal.get(gone["clientOrderId"])["status"] == "CANCELED"
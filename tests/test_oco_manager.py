@@ -0,0 +1,80 @@
+"""OcoManager fill and partial-fill handling, driven through the mock exchange's user data stream."""
+from __future__ import annotations
+import asyncio
+from decimal import Decimal
+from typing import Any, Callable, Tuple
+
+from mock_exchange import MockExchange
+from advanced.oco_manager import Bracket, BracketStore, OcoManager
+from src.user_stream import UserDataStream
+from src.utils import AsyncBinanceClient, Logger
+
+
+async def _until(cond: Callable[[], bool], timeout: float = 10.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not cond():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _set_mark(ex: MockExchange, price: str) -> None:
+    with ex.engine.lock:
+        ex.engine.books["BTCUSDT"].mark = Decimal(price)
+        ex.engine.on_mark("BTCUSDT")
+
+
+def _run(ex: MockExchange, tmp_path: Any, scenario: Callable[..., Any]) -> None:
+    async def main() -> None:
+        logger = Logger(str(tmp_path / "bot.log"))
+        async with AsyncBinanceClient("k", "s", False, logger) as client:
+            stream = UserDataStream(client)
+            task = asyncio.create_task(stream.run())
+            await _until(stream.connected.is_set)
+            m = OcoManager(client, stream, logger, BracketStore(str(tmp_path / "oco.db")))
+            try:
+                b = await m.open(symbol="BTCUSDT", side="SELL", quantity=0.003, take_profit=71000, stop=69000, stop_limit=68990)
+                assert {leg.status for leg in b.legs.values()} == {"NEW"}
+                await scenario(m, b)
+            finally:
+                await m.drain()
+                m.store.close()
+                await stream.close()
+                await task
+    asyncio.run(main())
+
+
+def test_take_profit_fill_cancels_stop(mock: Tuple[MockExchange, str], tmp_path: Any) -> None:
+    ex, _ = mock
+
+    async def scenario(m: OcoManager, b: Bracket) -> None:
+        sl = b.legs["sl"].order_id
+        _set_mark(ex, "71000.0")
+        await _until(lambda: b.state == "DONE")
+        assert b.filled == Decimal("0.003")
+        assert ex.engine.orders[sl].status == "CANCELED"
+        assert m.brackets == {}
+
+    _run(ex, tmp_path, scenario)
+
+
+def test_partial_fill_resizes_sibling(mock: Tuple[MockExchange, str], tmp_path: Any) -> None:
+    ex, _ = mock
+
+    async def scenario(m: OcoManager, b: Bracket) -> None:
+        old_sl = b.legs["sl"].order_id
+        # another buyer takes a third of the resting take-profit
+        ex.engine.place({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "price": "71000", "quantity": "0.001", "timeInForce": "GTC"})
+        await _until(lambda: b.legs["sl"].gen == 1 and b.legs["sl"].status == "NEW")
+        sl = b.legs["sl"]
+        assert ex.engine.orders[old_sl].status == "CANCELED"
+        assert sl.qty == Decimal("0.002")
+        assert ex.engine.orders[sl.order_id].qty == Decimal("0.002")
+        assert b.legs["tp"].status == "PARTIALLY_FILLED" and b.remaining == Decimal("0.002")
+
+        _set_mark(ex, "71000.0")
+        await _until(lambda: b.state == "DONE")
+        assert b.filled == Decimal("0.003")
+        assert ex.engine.orders[sl.order_id].status == "CANCELED"
+
+    _run(ex, tmp_path, scenario)
@@ -0,0 +1,822 @@
+"""Local stand-in for the Binance USDT-M Futures REST API, for offline load tests.
+
+    python tools/mock_exchange.py --port 8088 --latency-ms 20 --error-rate 0.01
+    BINANCE_FAPI_URL=http://127.0.0.1:8088 python -m src.cli grid ...
+
+Serves the ``/fapi/*`` endpoints BinanceClient uses. Signed requests are
+checked against ``--api-key``/``--api-secret`` and ``recvWindow`` (on a server
+clock that can be skewed with ``--clock-skew-ms``); request weight
+and order counts are limited per rolling window and reported in the usual
+``X-MBX-*`` headers. Orders go through a price-time-priority matching engine;
+a background random walk moves each symbol's mark price, and resting orders the
+mark trades through are filled against it, so strategies see realistic fills.
+Every order change is also pushed as ``ORDER_TRADE_UPDATE``/``ACCOUNT_UPDATE``
+on a user-data-stream WebSocket (``--port`` + 1), which also serves combined
+``bookTicker``/``markPrice``/``depth`` streams from a synthetic ladder around
+each mark.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import bisect
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import websockets
+from websockets.asyncio.server import serve
+
+# (method, path) -> request weight
+WEIGHTS = {
+    ("GET", "/fapi/v1/ping"): 1,
+    ("GET", "/fapi/v1/time"): 1,
+    ("GET", "/fapi/v1/exchangeInfo"): 1,
+    ("POST", "/fapi/v1/order"): 0,
+    ("GET", "/fapi/v1/order"): 1,
+    ("DELETE", "/fapi/v1/order"): 1,
+    ("PUT", "/fapi/v1/order"): 1,
+    ("POST", "/fapi/v1/batchOrders"): 5,
+    ("PUT", "/fapi/v1/batchOrders"): 5,
+    ("DELETE", "/fapi/v1/batchOrders"): 1,
+    ("GET", "/fapi/v1/openOrders"): 1,  # 40 without a symbol
+    ("DELETE", "/fapi/v1/allOpenOrders"): 1,
+    ("GET", "/fapi/v2/positionRisk"): 5,
+    ("POST", "/fapi/v1/leverage"): 1,
+    ("POST", "/fapi/v1/listenKey"): 1,
+    ("PUT", "/fapi/v1/listenKey"): 1,
+    ("DELETE", "/fapi/v1/listenKey"): 1,
+    ("GET", "/fapi/v1/depth"): 20,
+}
+# requests that count against the order-rate limits (amendments do too)
+ORDER_PATHS = {("POST", "/fapi/v1/order"), ("POST", "/fapi/v1/batchOrders"), ("PUT", "/fapi/v1/order"), ("PUT", "/fapi/v1/batchOrders")}
+# unsigned, but still require X-MBX-APIKEY
+KEYED_PATHS = {"/fapi/v1/listenKey"}
+LISTEN_KEY_TTL = 3600.0
+
+DEFAULT_SYMBOLS = {
+    # symbol: (mark price, tickSize, stepSize, minQty, minNotional)
+    "BTCUSDT": ("70000", "0.10", "0.001", "0.001", "100"),
+    "ETHUSDT": ("3500", "0.01", "0.001", "0.001", "20"),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, code: int, msg: str, headers: Optional[Dict[str, str]] = None) -> None:
+        super().__init__(msg)
+        self.status, self.code, self.msg, self.headers = status, code, msg, headers or {}
+
+
+class Order:
+    __slots__ = ("id", "client_id", "symbol", "side", "type", "tif", "price", "stop", "qty", "filled", "notional", "status", "reduce_only", "seq", "update_time")
+
+    def __init__(self, oid: int, p: Dict[str, str], seq: int) -> None:
+        self.id = oid
+        self.client_id = p.get("newClientOrderId") or f"mock_{oid}"
+        self.symbol = p["symbol"]
+        self.side = p["side"]
+        self.type = p["type"]
+        self.tif = p.get("timeInForce", "GTC")
+        self.price = Decimal(p.get("price", "0"))
+        self.stop = Decimal(p.get("stopPrice", "0"))
+        self.qty = Decimal(p["quantity"])
+        self.filled = Decimal(0)
+        self.notional = Decimal(0)
+        self.status = "NEW"
+        self.reduce_only = p.get("reduceOnly", "false").lower() == "true"
+        self.seq = seq
+        self.update_time = int(time.time() * 1000)
+
+    @property
+    def remaining(self) -> Decimal:
+        return self.qty - self.filled
+
+    def fill(self, qty: Decimal, price: Decimal) -> None:
+        self.filled += qty
+        self.notional += qty * price
+        self.status = "FILLED" if self.filled >= self.qty else "PARTIALLY_FILLED"
+        self.update_time = int(time.time() * 1000)
+
+    def to_json(self) -> Dict[str, Any]:
+        avg = self.notional / self.filled if self.filled else Decimal(0)
+        return {
+            "orderId": self.id, "clientOrderId": self.client_id, "symbol": self.symbol, "side": self.side,
+            "type": self.type, "timeInForce": self.tif, "status": self.status, "price": str(self.price),
+            "stopPrice": str(self.stop), "origQty": str(self.qty), "executedQty": str(self.filled),
+            "cumQuote": str(self.notional), "avgPrice": str(avg), "reduceOnly": self.reduce_only,
+            "updateTime": self.update_time,
+        }
+
+
+class Book:
+    """One symbol's resting orders; each side is a list sorted by (price priority, seq)."""
+
+    def __init__(self, mark: Decimal) -> None:
+        self.mark = mark
+        self.bids: List[Tuple[Tuple[Decimal, int], Order]] = []
+        self.asks: List[Tuple[Tuple[Decimal, int], Order]] = []
+        self.stops: List[Order] = []
+
+    def rest(self, o: Order) -> None:
+        if o.side == "BUY":
+            bisect.insort(self.bids, ((-o.price, o.seq), o), key=lambda e: e[0])
+        else:
+            bisect.insort(self.asks, ((o.price, o.seq), o), key=lambda e: e[0])
+
+    def remove(self, o: Order) -> bool:
+        side = self.bids if o.side == "BUY" else self.asks
+        for i, (_, r) in enumerate(side):
+            if r is o:
+                del side[i]
+                return True
+        if o in self.stops:
+            self.stops.remove(o)
+            return True
+        return False
+
+
+class MatchingEngine:
+    def __init__(self, symbols: Dict[str, Tuple[str, str, str, str, str]]) -> None:
+        self.symbols = symbols
+        self.books = {s: Book(Decimal(v[0])) for s, v in symbols.items()}
+        self.orders: Dict[int, Order] = {}
+        self.by_client_id: Dict[Tuple[str, str], Order] = {}
+        self._ids = itertools.count(1_000_000)
+        self._seq = itertools.count()
+        self.lock = threading.RLock()
+        self.positions: Dict[str, Decimal] = {s: Decimal(0) for s in symbols}
+        # called with every user-data-stream event, under the engine lock
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def _event(self, o: Order, exec_type: str, last_qty: Decimal = Decimal(0), last_px: Decimal = Decimal(0)) -> None:
+        if not self.listeners:
+            return
+        now = int(time.time() * 1000)
+        j = o.to_json()
+        ev = {"e": "ORDER_TRADE_UPDATE", "E": now, "T": now, "o": {
+            "s": o.symbol, "c": o.client_id, "S": o.side, "o": o.type, "f": o.tif, "q": j["origQty"], "p": j["price"],
+            "ap": j["avgPrice"], "sp": j["stopPrice"], "x": exec_type, "X": o.status, "i": o.id, "l": str(last_qty),
+            "z": j["executedQty"], "L": str(last_px), "T": o.update_time, "R": o.reduce_only,
+        }}
+        events = [ev]
+        if exec_type == "TRADE":
+            events.append({"e": "ACCOUNT_UPDATE", "E": now, "T": now, "a": {
+                "m": "ORDER", "B": [], "P": [{"s": o.symbol, "pa": str(self.positions[o.symbol]), "ps": "BOTH"}],
+            }})
+        for fn in self.listeners:
+            for e in events:
+                fn(e)
+
+    def _fill(self, o: Order, qty: Decimal, price: Decimal) -> None:
+        o.fill(qty, price)
+        self.positions[o.symbol] += qty if o.side == "BUY" else -qty
+        self._event(o, "TRADE", qty, price)
+
+    def _check_filters(self, p: Dict[str, str]) -> None:
+        sym = p.get("symbol")
+        if sym not in self.symbols:
+            raise ApiError(400, -1121, "Invalid symbol.")
+        _, tick, step, min_qty, _ = self.symbols[sym]
+        qty = Decimal(p.get("quantity", "0"))
+        if qty < Decimal(min_qty) or qty % Decimal(step):
+            raise ApiError(400, -1111, "Precision is over the maximum defined for this asset.")
+        for k in ("price", "stopPrice"):
+            if k in p and Decimal(p[k]) % Decimal(tick):
+                raise ApiError(400, -4014, "Price not increased by tick size.")
+
+    def place(self, p: Dict[str, str]) -> Dict[str, Any]:
+        self._check_filters(p)
+        typ = p.get("type")
+        if typ not in ("MARKET", "LIMIT", "STOP", "TAKE_PROFIT"):
+            raise ApiError(400, -1116, "Invalid orderType.")
+        if typ != "MARKET" and "price" not in p:
+            raise ApiError(400, -1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+        with self.lock:
+            if p.get("newClientOrderId") and (p["symbol"], p["newClientOrderId"]) in self.by_client_id:
+                raise ApiError(400, -4116, "ClientOrderId is duplicated.")
+            pos = self.positions[p["symbol"]]
+            reduce_only = typ == "MARKET" and p.get("reduceOnly", "false").lower() == "true"
+            if reduce_only and (not pos or (pos > 0) == (p["side"] == "BUY")):
+                raise ApiError(400, -2022, "ReduceOnly Order is rejected.")
+            o = Order(next(self._ids), p, next(self._seq))
+            if reduce_only:
+                # never more than the position it reduces
+                o.qty = min(o.qty, abs(pos))
+            self.orders[o.id] = o
+            self.by_client_id[(o.symbol, o.client_id)] = o
+            book = self.books[o.symbol]
+            self._event(o, "NEW")
+            if typ in ("STOP", "TAKE_PROFIT"):
+                book.stops.append(o)
+            else:
+                self._match(book, o)
+            return o.to_json()
+
+    def _match(self, book: Book, o: Order) -> None:
+        opposite = book.asks if o.side == "BUY" else book.bids
+        while o.remaining > 0 and opposite:
+            _, r = opposite[0]
+            if o.type != "MARKET" and (r.price > o.price if o.side == "BUY" else r.price < o.price):
+                break
+            q = min(o.remaining, r.remaining)
+            self._fill(o, q, r.price)
+            self._fill(r, q, r.price)
+            if r.remaining <= 0:
+                opposite.pop(0)
+        if o.remaining <= 0:
+            return
+        if o.type == "MARKET":
+            # synthetic liquidity at the mark for whatever the book could not fill
+            self._fill(o, o.remaining, book.mark)
+        elif o.tif == "GTC":
+            # a limit through the mark trades against the synthetic counterparty at once
+            if (o.side == "BUY" and o.price >= book.mark) or (o.side == "SELL" and o.price <= book.mark):
+                self._fill(o, o.remaining, book.mark)
+            else:
+                book.rest(o)
+        else:
+            o.status = "EXPIRED"
+            self._event(o, "EXPIRED")
+
+    def cancel(self, p: Dict[str, str]) -> Dict[str, Any]:
+        with self.lock:
+            o = self._lookup(p)
+            if o.status in ("FILLED", "CANCELED", "EXPIRED"):
+                raise ApiError(400, -2011, "Unknown order sent.")
+            self._cancel(o)
+            return o.to_json()
+
+    def _cancel(self, o: Order) -> None:
+        self.books[o.symbol].remove(o)
+        o.status = "CANCELED"
+        o.update_time = int(time.time() * 1000)
+        self._event(o, "CANCELED")
+
+    def _open(self, symbol: Optional[str]) -> List[Order]:
+        return [o for o in self.orders.values() if o.status in ("NEW", "PARTIALLY_FILLED") and symbol in (None, o.symbol)]
+
+    def open_orders(self, p: Dict[str, str]) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [o.to_json() for o in self._open(p.get("symbol"))]
+
+    def cancel_all(self, p: Dict[str, str]) -> Dict[str, Any]:
+        """DELETE /fapi/v1/allOpenOrders: every open order of one symbol, stops included."""
+        if p.get("symbol") not in self.symbols:
+            raise ApiError(400, -1121, "Invalid symbol.")
+        with self.lock:
+            for o in self._open(p["symbol"]):
+                self._cancel(o)
+        return {"code": 200, "msg": "The operation of cancel all open order is done."}
+
+    def modify(self, p: Dict[str, str]) -> Dict[str, Any]:
+        """PUT /fapi/v1/order: new price and/or quantity for a resting LIMIT order."""
+        self._check_filters(p)
+        if "price" not in p:
+            raise ApiError(400, -1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+        with self.lock:
+            o = self._lookup(p)
+            if o.status not in ("NEW", "PARTIALLY_FILLED") or o.type != "LIMIT":
+                raise ApiError(400, -2013, "Order does not exist.")
+            if p.get("side") != o.side:
+                raise ApiError(400, -1102, "Parameter 'side' does not match the order.")
+            price, qty = Decimal(p["price"]), Decimal(p["quantity"])
+            if price == o.price and qty == o.qty:
+                raise ApiError(400, -5027, "No need to modify the order.")
+            book = self.books[o.symbol]
+            book.remove(o)
+            if qty <= o.filled:
+                o.status = "CANCELED"
+                o.update_time = int(time.time() * 1000)
+                self._event(o, "CANCELED")
+                return o.to_json()
+            # like Binance, only a pure size reduction keeps queue priority
+            if price != o.price or qty > o.qty:
+                o.seq = next(self._seq)
+            o.price, o.qty = price, qty
+            o.update_time = int(time.time() * 1000)
+            self._event(o, "AMENDMENT")
+            self._match(book, o)
+            return o.to_json()
+
+    def get(self, p: Dict[str, str]) -> Dict[str, Any]:
+        with self.lock:
+            return self._lookup(p).to_json()
+
+    def _lookup(self, p: Dict[str, str]) -> Order:
+        o: Optional[Order] = None
+        if "orderId" in p:
+            o = self.orders.get(int(p["orderId"]))
+        elif "origClientOrderId" in p:
+            o = self.by_client_id.get((p.get("symbol", ""), p["origClientOrderId"]))
+        if o is None or o.symbol != p.get("symbol"):
+            raise ApiError(400, -2013, "Order does not exist.")
+        return o
+
+    def tick(self, vol: float = 0.0005) -> None:
+        """Random-walk every mark price, then trigger stops and fill resting orders it crossed."""
+        with self.lock:
+            for sym, book in self.books.items():
+                tick = Decimal(self.symbols[sym][1])
+                step = book.mark * Decimal(random.gauss(0, vol))
+                book.mark = max(tick, ((book.mark + step) / tick).to_integral_value() * tick)
+                self.on_mark(sym)
+
+    def on_mark(self, sym: str) -> None:
+        book = self.books[sym]
+        for o in list(book.stops):
+            hit = book.mark >= o.stop if o.side == "BUY" else book.mark <= o.stop
+            # STOP triggers against the trend, TAKE_PROFIT with it
+            if o.type == "TAKE_PROFIT":
+                hit = book.mark <= o.stop if o.side == "BUY" else book.mark >= o.stop
+            if hit:
+                book.stops.remove(o)
+                o.type = "LIMIT"
+                self._match(book, o)
+        while book.bids and book.bids[0][1].price >= book.mark:
+            _, o = book.bids.pop(0)
+            self._fill(o, o.remaining, o.price)
+        while book.asks and book.asks[0][1].price <= book.mark:
+            _, o = book.asks.pop(0)
+            self._fill(o, o.remaining, o.price)
+
+
+class RateLimiter:
+    """Rolling-window request-weight and order-count budgets."""
+
+    def __init__(self, weight_1m: int, orders_10s: int, orders_1m: int) -> None:
+        self.limits = {"weight_1m": (weight_1m, 60.0), "orders_10s": (orders_10s, 10.0), "orders_1m": (orders_1m, 60.0)}
+        self.events: Dict[str, Deque[Tuple[float, int]]] = {k: deque() for k in self.limits}
+        self.used = {k: 0 for k in self.limits}
+        self.lock = threading.Lock()
+
+    def _trim(self, key: str, now: float) -> None:
+        window = self.limits[key][1]
+        ev = self.events[key]
+        while ev and ev[0][0] <= now - window:
+            self.used[key] -= ev.popleft()[1]
+
+    def charge(self, weight: int, orders: int) -> Dict[str, str]:
+        now = time.monotonic()
+        with self.lock:
+            for key, n in (("weight_1m", weight), ("orders_10s", orders), ("orders_1m", orders)):
+                self._trim(key, now)
+                limit, window = self.limits[key]
+                if n and self.used[key] + n > limit:
+                    retry = max(1, int(self.events[key][0][0] + window - now + 1)) if self.events[key] else 1
+                    code = -1003 if key == "weight_1m" else -1015
+                    raise ApiError(429, code, f"Too many requests; {key} limit {limit}.", {"Retry-After": str(retry)})
+            for key, n in (("weight_1m", weight), ("orders_10s", orders), ("orders_1m", orders)):
+                if n:
+                    self.events[key].append((now, n))
+                    self.used[key] += n
+            return {
+                "X-MBX-USED-WEIGHT-1M": str(self.used["weight_1m"]),
+                "X-MBX-ORDER-COUNT-10S": str(self.used["orders_10s"]),
+                "X-MBX-ORDER-COUNT-1M": str(self.used["orders_1m"]),
+            }
+
+
+class MockExchange:
+    def __init__(
+        self,
+        api_key: str = "mock",
+        api_secret: str = "mock",
+        symbols: Optional[Dict[str, Tuple[str, str, str, str, str]]] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        weight_1m: int = 2400,
+        orders_10s: int = 300,
+        orders_1m: int = 1200,
+        recv_window_max: int = 60000,
+        clock_skew_ms: int = 0,
+        ack_delay_ms: float = 0.0,
+    ) -> None:
+        self.api_key = api_key
+        self.api_secret = api_secret.encode()
+        self.engine = MatchingEngine(symbols or DEFAULT_SYMBOLS)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.limiter = RateLimiter(weight_1m, orders_10s, orders_1m)
+        self.recv_window_max = recv_window_max
+        # server clock minus local clock, to exercise client time sync
+        self.clock_skew_ms = clock_skew_ms
+        # extra delay after an order is placed, before it is acknowledged, to exercise client timeouts
+        self.ack_delay_ms = ack_delay_ms
+        self.leverage: Dict[str, int] = {}
+        # listenKey -> expiry (monotonic); one account, so at most one live key
+        self.listen_keys: Dict[str, float] = {}
+        self.ws_url: Optional[str] = None
+        self.streams: Optional["StreamServer"] = None
+        self.feed = MarketFeed(self.engine)
+        self.routes = {
+            ("GET", "/fapi/v1/ping"): (False, lambda p: {}),
+            ("GET", "/fapi/v1/time"): (False, lambda p: {"serverTime": self.server_ms()}),
+            ("GET", "/fapi/v1/exchangeInfo"): (False, self.exchange_info),
+            ("GET", "/fapi/v1/depth"): (False, self.depth),
+            ("POST", "/fapi/v1/order"): (True, self.engine.place),
+            ("GET", "/fapi/v1/order"): (True, self.engine.get),
+            ("DELETE", "/fapi/v1/order"): (True, self.engine.cancel),
+            ("PUT", "/fapi/v1/order"): (True, self.engine.modify),
+            ("POST", "/fapi/v1/batchOrders"): (True, self.batch_orders),
+            ("PUT", "/fapi/v1/batchOrders"): (True, self.batch_modify),
+            ("DELETE", "/fapi/v1/batchOrders"): (True, self.batch_cancel),
+            ("GET", "/fapi/v1/openOrders"): (True, self.engine.open_orders),
+            ("DELETE", "/fapi/v1/allOpenOrders"): (True, self.engine.cancel_all),
+            ("GET", "/fapi/v2/positionRisk"): (True, self.position_risk),
+            ("POST", "/fapi/v1/leverage"): (True, self.set_leverage),
+            ("POST", "/fapi/v1/listenKey"): (False, self.new_listen_key),
+            ("PUT", "/fapi/v1/listenKey"): (False, self.keepalive_listen_key),
+            ("DELETE", "/fapi/v1/listenKey"): (False, self.close_listen_key),
+        }
+
+    def server_ms(self) -> int:
+        return int(time.time() * 1000) + self.clock_skew_ms
+
+    def exchange_info(self, p: Dict[str, str]) -> Dict[str, Any]:
+        syms = []
+        for s, (_, tick, step, min_qty, min_notional) in self.engine.symbols.items():
+            syms.append({
+                "symbol": s, "status": "TRADING", "pricePrecision": max(0, -Decimal(tick).normalize().as_tuple().exponent),
+                "quantityPrecision": max(0, -Decimal(step).normalize().as_tuple().exponent),
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": tick, "minPrice": tick, "maxPrice": "10000000"},
+                    {"filterType": "LOT_SIZE", "stepSize": step, "minQty": min_qty, "maxQty": "100000"},
+                    {"filterType": "MIN_NOTIONAL", "notional": min_notional},
+                ],
+            })
+        return {"timezone": "UTC", "serverTime": int(time.time() * 1000), "symbols": syms}
+
+    def depth(self, p: Dict[str, str]) -> Dict[str, Any]:
+        if p.get("symbol") not in self.engine.symbols:
+            raise ApiError(400, -1121, "Invalid symbol.")
+        return self.feed.snapshot(p["symbol"], int(p.get("limit", 500)))
+
+    def batch_orders(self, p: Dict[str, str]) -> List[Dict[str, Any]]:
+        orders = json.loads(p.get("batchOrders", "[]"))
+        if not 0 < len(orders) <= 5:
+            raise ApiError(400, -1130, "Data sent for parameter 'batchOrders' is not valid.")
+        out: List[Dict[str, Any]] = []
+        for o in orders:
+            try:
+                out.append(self.engine.place({k: str(v) for k, v in o.items()}))
+            except ApiError as e:
+                out.append({"code": e.code, "msg": e.msg})
+        return out
+
+    def batch_modify(self, p: Dict[str, str]) -> List[Dict[str, Any]]:
+        orders = json.loads(p.get("batchOrders", "[]"))
+        if not 0 < len(orders) <= 5:
+            raise ApiError(400, -1130, "Data sent for parameter 'batchOrders' is not valid.")
+        out: List[Dict[str, Any]] = []
+        for o in orders:
+            try:
+                out.append(self.engine.modify({k: str(v) for k, v in o.items()}))
+            except ApiError as e:
+                out.append({"code": e.code, "msg": e.msg})
+        return out
+
+    def batch_cancel(self, p: Dict[str, str]) -> List[Dict[str, Any]]:
+        if "orderIdList" in p:
+            keys = [("orderId", str(x)) for x in json.loads(p["orderIdList"])]
+        else:
+            keys = [("origClientOrderId", x) for x in json.loads(p.get("origClientOrderIdList", "[]"))]
+        if not 0 < len(keys) <= 10:
+            raise ApiError(400, -1130, "Data sent for parameter 'orderIdList' is not valid.")
+        out: List[Dict[str, Any]] = []
+        for k, v in keys:
+            try:
+                out.append(self.engine.cancel({"symbol": p.get("symbol", ""), k: v}))
+            except ApiError as e:
+                out.append({"code": e.code, "msg": e.msg})
+        return out
+
+    def position_risk(self, p: Dict[str, str]) -> List[Dict[str, Any]]:
+        # one-way mode: one BOTH position per symbol
+        with self.engine.lock:
+            return [
+                {"symbol": s, "positionAmt": str(amt), "markPrice": str(self.engine.books[s].mark), "positionSide": "BOTH", "leverage": str(self.leverage.get(s, 20))}
+                for s, amt in self.engine.positions.items() if p.get("symbol") in (None, s)
+            ]
+
+    def set_leverage(self, p: Dict[str, str]) -> Dict[str, Any]:
+        self.leverage[p["symbol"]] = int(p["leverage"])
+        return {"symbol": p["symbol"], "leverage": int(p["leverage"]), "maxNotionalValue": "1000000"}
+
+    def live_listen_key(self) -> Optional[str]:
+        now = time.monotonic()
+        for k, exp in list(self.listen_keys.items()):
+            if exp > now:
+                return k
+            del self.listen_keys[k]
+        return None
+
+    def new_listen_key(self, p: Dict[str, str]) -> Dict[str, Any]:
+        # like Binance, an existing live key is extended and returned
+        key = self.live_listen_key() or "".join(random.choices("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=64))
+        self.listen_keys[key] = time.monotonic() + LISTEN_KEY_TTL
+        return {"listenKey": key}
+
+    def keepalive_listen_key(self, p: Dict[str, str]) -> Dict[str, Any]:
+        key = self.live_listen_key()
+        if key is None:
+            raise ApiError(400, -1125, "This listenKey does not exist.")
+        self.listen_keys[key] = time.monotonic() + LISTEN_KEY_TTL
+        return {"listenKey": key}
+
+    def close_listen_key(self, p: Dict[str, str]) -> Dict[str, Any]:
+        self.listen_keys.clear()
+        return {}
+
+    def verify(self, query: str, headers: Dict[str, str]) -> None:
+        if headers.get("x-mbx-apikey") != self.api_key:
+            raise ApiError(401, -2015, "Invalid API-key, IP, or permissions for action.")
+        payload, sep, sig = query.rpartition("&signature=")
+        if not sep:
+            raise ApiError(400, -1102, "Mandatory parameter 'signature' was not sent, was empty/null, or malformed.")
+        expect = hmac.new(self.api_secret, payload.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expect, sig):
+            raise ApiError(400, -1022, "Signature for this request is not valid.")
+        p = dict(parse_qsl(payload))
+        now = self.server_ms()
+        ts, window = int(p.get("timestamp", 0)), int(p.get("recvWindow", 5000))
+        if window > self.recv_window_max or ts > now + 1000 or now - ts > window:
+            raise ApiError(400, -1021, "Timestamp for this request is outside of the recvWindow.")
+
+    def handle(self, method: str, url: str, headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        parts = urlsplit(url)
+        route = self.routes.get((method, parts.path))
+        if route is None:
+            return 404, {"code": -1000, "msg": "Not found."}, {}
+        signed, fn = route
+        if self.latency_ms or self.jitter_ms:
+            time.sleep(max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000)
+        try:
+            weight = WEIGHTS.get((method, parts.path), 1)
+            if parts.path == "/fapi/v1/openOrders" and "symbol=" not in parts.query:
+                weight = 40
+            orders = 0
+            if (method, parts.path) in ORDER_PATHS:
+                orders = 1 if parts.path == "/fapi/v1/order" else len(json.loads(dict(parse_qsl(parts.query)).get("batchOrders", "[]")))
+            rl_headers = self.limiter.charge(weight, orders)
+            if self.error_rate and random.random() < self.error_rate:
+                raise ApiError(503, -1001, "Internal error; unable to process your request. Please try again.")
+            if signed:
+                self.verify(parts.query, headers)
+            elif parts.path in KEYED_PATHS and headers.get("x-mbx-apikey") != self.api_key:
+                raise ApiError(401, -2015, "Invalid API-key, IP, or permissions for action.")
+            body = fn(dict(parse_qsl(parts.query)))
+            if self.ack_delay_ms and (method, parts.path) in ORDER_PATHS:
+                time.sleep(self.ack_delay_ms / 1000)
+            return 200, body, rl_headers
+        except ApiError as e:
+            return e.status, {"code": e.code, "msg": e.msg}, e.headers
+
+
+def make_server(exchange: MockExchange, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _serve(self) -> None:
+            n = int(self.headers.get("Content-Length") or 0)
+            if n:
+                self.rfile.read(n)
+            status, body, extra = exchange.handle(self.command, self.path, {k.lower(): v for k, v in self.headers.items()})
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in extra.items():
+                self.send_header(k, v)
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                # the client timed out and hung up; the request itself was handled
+                self.close_connection = True
+
+        do_GET = do_POST = do_DELETE = do_PUT = _serve
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        # the default backlog of 5 drops connects from concurrent clients (1s SYN retries)
+        request_queue_size = 512
+
+    return Server((host, port), Handler)
+
+
+class MarketFeed:
+    """Synthetic depth ladder around each mark, published as bookTicker/markPrice/depthUpdate events."""
+
+    LEVELS = 20
+
+    def __init__(self, engine: MatchingEngine) -> None:
+        self.engine = engine
+        self.update_id = {s: 1 for s in engine.symbols}
+        self.ladders = {s: self._ladder(s, ({}, {})) for s in engine.symbols}
+        # called with (symbol, stream kind, event), under the engine lock
+        self.listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
+        # tests: swallow the next depthUpdate to exercise client resyncs
+        self.drop_next_diff = False
+
+    def _ladder(self, sym: str, old: Tuple[Dict[Decimal, Decimal], Dict[Decimal, Decimal]]) -> Tuple[Dict[Decimal, Decimal], Dict[Decimal, Decimal]]:
+        mark = self.engine.books[sym].mark
+        _, tick, step, _, _ = self.engine.symbols[sym]
+        tick_d, step_d = Decimal(tick), Decimal(step)
+        sides = []
+        for sign, prev in ((-1, old[0]), (1, old[1])):
+            side = {}
+            for k in range(1, self.LEVELS + 1):
+                px = mark + sign * k * tick_d
+                # most levels keep their size from one tick to the next
+                side[px] = prev[px] if px in prev and random.random() < 0.7 else step_d * random.randint(1, 500)
+            sides.append(side)
+        return sides[0], sides[1]
+
+    def snapshot(self, sym: str, limit: int) -> Dict[str, Any]:
+        with self.engine.lock:
+            bids, asks = self.ladders[sym]
+            now = int(time.time() * 1000)
+            return {
+                "lastUpdateId": self.update_id[sym], "E": now, "T": now,
+                "bids": [[str(p), str(bids[p])] for p in sorted(bids, reverse=True)[:limit]],
+                "asks": [[str(p), str(asks[p])] for p in sorted(asks)[:limit]],
+            }
+
+    def tick(self) -> None:
+        with self.engine.lock:
+            now = int(time.time() * 1000)
+            for sym in self.engine.symbols:
+                old = self.ladders[sym]
+                new = self.ladders[sym] = self._ladder(sym, old)
+                diffs = []
+                for o, n in zip(old, new):
+                    diffs.append([[str(p), str(q)] for p, q in n.items() if o.get(p) != q] + [[str(p), "0"] for p in o if p not in n])
+                pu = self.update_id[sym]
+                u = self.update_id[sym] = pu + max(1, len(diffs[0]) + len(diffs[1]))
+                bid = max(new[0])
+                ask = min(new[1])
+                mark = self.engine.books[sym].mark
+                events = [
+                    ("bookTicker", {"e": "bookTicker", "u": u, "E": now, "T": now, "s": sym, "b": str(bid), "B": str(new[0][bid]), "a": str(ask), "A": str(new[1][ask])}),
+                    ("markPrice", {"e": "markPriceUpdate", "E": now, "s": sym, "p": str(mark), "i": str(mark), "P": str(mark), "r": "0.00010000", "T": (now // 28_800_000 + 1) * 28_800_000}),
+                ]
+                if self.drop_next_diff:
+                    self.drop_next_diff = False
+                else:
+                    events.append(("depth", {"e": "depthUpdate", "E": now, "T": now, "s": sym, "U": pu + 1, "u": u, "pu": pu, "b": diffs[0], "a": diffs[1]}))
+                for fn in self.listeners:
+                    for kind, ev in events:
+                        fn(sym, kind, ev)
+
+
+class StreamServer:
+    """WebSocket endpoints: ``/ws/<listenKey>`` for user data, ``/stream?streams=...`` for market data."""
+
+    def __init__(self, exchange: MockExchange, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.exchange = exchange
+        # ws -> (queue, {(symbol, kind): stream name}); user-data clients have no subscriptions
+        self.clients: Dict[Any, Tuple[asyncio.Queue, Optional[Dict[Tuple[str, str], str]]]] = {}
+        self.url = ""
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        threading.Thread(target=self._run, args=(host, port, ready), name="mock-streams", daemon=True).start()
+        ready.wait()
+        exchange.engine.listeners.append(self.publish)
+        exchange.feed.listeners.append(self.publish_market)
+
+    def _run(self, host: str, port: int, ready: threading.Event) -> None:
+        async def main() -> None:
+            server = await serve(self._handler, host, port)
+            h, p = server.sockets[0].getsockname()[:2]
+            self.url = f"ws://{h}:{p}"
+            ready.set()
+            await server.serve_forever()
+        self.loop.run_until_complete(main())
+
+    async def _handler(self, ws: Any) -> None:
+        parts = urlsplit(ws.request.path)
+        subs: Optional[Dict[Tuple[str, str], str]] = None
+        if parts.path == "/stream":
+            names = dict(parse_qsl(parts.query)).get("streams", "").split("/")
+            subs = {}
+            for name in names:
+                sym, _, rest = name.partition("@")
+                subs[(sym.upper(), rest.partition("@")[0])] = name
+        elif parts.path.rpartition("/")[2] != self.exchange.live_listen_key():
+            await ws.close(4000, "Invalid listenKey.")
+            return
+        q: asyncio.Queue = asyncio.Queue()
+        self.clients[ws] = (q, subs)
+
+        async def pump() -> None:
+            try:
+                while True:
+                    await ws.send(await q.get())
+            except websockets.ConnectionClosed:
+                pass
+        sender = asyncio.create_task(pump())
+        try:
+            await ws.wait_closed()
+        finally:
+            sender.cancel()
+            self.clients.pop(ws, None)
+
+    def _broadcast(self, data: str) -> None:
+        for q, subs in self.clients.values():
+            if subs is None:
+                q.put_nowait(data)
+
+    def _broadcast_market(self, sym: str, kind: str, ev: Dict[str, Any]) -> None:
+        for q, subs in self.clients.values():
+            name = subs.get((sym, kind)) if subs else None
+            if name:
+                q.put_nowait(json.dumps({"stream": name, "data": ev}))
+
+    def publish(self, ev: Dict[str, Any]) -> None:
+        # called from engine threads; call_soon_threadsafe keeps event order
+        self.loop.call_soon_threadsafe(self._broadcast, json.dumps(ev))
+
+    def publish_market(self, sym: str, kind: str, ev: Dict[str, Any]) -> None:
+        self.loop.call_soon_threadsafe(self._broadcast_market, sym, kind, ev)
+
+    def drop(self) -> None:
+        """Close every connection abruptly, to exercise client reconnects."""
+        for ws in list(self.clients):
+            self.loop.call_soon_threadsafe(ws.transport.abort)
+
+    def expire(self) -> None:
+        """Invalidate the listenKey and tell connected clients, as Binance does after 60 minutes."""
+        self.exchange.listen_keys.clear()
+        now = int(time.time() * 1000)
+        self.loop.call_soon_threadsafe(self._broadcast, json.dumps({"e": "listenKeyExpired", "E": now}))
+
+
+def start(port: int = 0, tick_interval: float = 0.2, streams: bool = True, **kw: Any) -> Tuple[ThreadingHTTPServer, MockExchange, str]:
+    """Run a mock exchange on background threads; returns (server, exchange, base_url).
+
+    With ``streams`` the WebSocket user-data and market-data streams are served
+    too; their base URL is ``exchange.ws_url`` and the server ``exchange.streams``.
+    """
+    exchange = MockExchange(**kw)
+    server = make_server(exchange, port=port)
+    if streams:
+        exchange.streams = StreamServer(exchange, port=port + 1 if port else 0)
+        exchange.ws_url = exchange.streams.url
+    threading.Thread(target=server.serve_forever, name="mock-exchange", daemon=True).start()
+    if tick_interval > 0:
+        def walk() -> None:
+            while True:
+                time.sleep(tick_interval)
+                exchange.engine.tick()
+                exchange.feed.tick()
+        threading.Thread(target=walk, name="mock-exchange-marks", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, exchange, f"http://{host}:{port}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Local mock Binance USDT-M Futures REST server")
+    ap.add_argument("--port", type=int, default=8088)
+    ap.add_argument("--api-key", default="mock")
+    ap.add_argument("--api-secret", default="mock")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    ap.add_argument("--weight-1m", type=int, default=2400)
+    ap.add_argument("--orders-10s", type=int, default=300)
+    ap.add_argument("--orders-1m", type=int, default=1200)
+    ap.add_argument("--clock-skew-ms", type=int, default=0, help="offset of the server clock from the local one")
+    ap.add_argument("--ack-delay-ms", type=float, default=0.0, help="hold order acknowledgements after the order is placed")
+    ap.add_argument("--tick-interval", type=float, default=0.2, help="seconds between mark price moves (0 = frozen)")
+    a = ap.parse_args()
+    server, exchange, url = start(
+        port=a.port, tick_interval=a.tick_interval, api_key=a.api_key, api_secret=a.api_secret,
+        latency_ms=a.latency_ms, jitter_ms=a.jitter_ms, error_rate=a.error_rate,
+        weight_1m=a.weight_1m, orders_10s=a.orders_10s, orders_1m=a.orders_1m, clock_skew_ms=a.clock_skew_ms,
+        ack_delay_ms=a.ack_delay_ms,
+    )
+    print(f"Mock exchange listening on {url}")
+    print(f"User data and market streams on {exchange.ws_url} (BINANCE_FSTREAM_URL)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,275 @@
-import json, sys
+"""Validate and query bot.log (JSON Lines).
+
+    python tools/validate_logs.py [bot.log] [--workers N]
+    python tools/validate_logs.py query [bot.log] [--req-id ID] [--action A] [--level L] [--since TS] [--until TS]
+    python tools/validate_logs.py compact [bot.log] [--archive DIR]
+    python tools/validate_logs.py stats [bot.log] [--archive DIR] [--since TS] [--until TS] [--every SECONDS] [--by endpoint|action|none]
+
+Validation memory-maps the file, splits it into newline-aligned byte ranges and
+checks them in a process pool. Queries go through a SQLite sidecar index
+(``<log>.idx``) mapping reqId/action/level/ts to byte offsets; the index is built
+on first use and extended incrementally as the log grows. ``compact`` moves the
+rotated ``<log>.N.gz`` segments into the day-partitioned columnar archive of
+:mod:`src.log_archive` (``<log>.archive`` by default); ``stats`` aggregates its
+per-minute rollups without touching the JSON.
+"""
+import argparse
+import mmap
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+import orjson
 
 REQUIRED_KEYS = {"ts", "level", "action"}
+# ranges smaller than this are not worth a worker process
+MIN_CHUNK = 4 * 1024 * 1024
+INDEX_BATCH = 50_000
+
+
+@contextmanager
+def _mapped(path: Any) -> Iterator[Any]:
+    """Read-only map of ``path``; an empty file (say, a freshly rotated log) cannot be mapped and reads as ``b""``."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
 
 
-def check_line(i: int, line: str):
+def check_line(i: int, line: bytes) -> Optional[str]:
     try:
-        obj = json.loads(line)
-    except Exception as e:
-        print(f"Line {i}: invalid JSON: {e}")
-        return 1
+        obj = orjson.loads(line)
+    except orjson.JSONDecodeError as e:
+        return f"Line {i}: invalid JSON: {e}"
+    if not isinstance(obj, dict):
+        return f"Line {i}: not a JSON object"
     missing = REQUIRED_KEYS - obj.keys()
     if missing:
-        print(f"Line {i}: missing keys: {missing}")
-        return 1
-    return 0
+        return f"Line {i}: missing keys: {missing}"
+    return None
+
 
+def iter_lines(mm: mmap.mmap, start: int, end: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, line)`` for each line starting in ``[start, end)``."""
+    pos = start
+    while pos < end:
+        nl = mm.find(b"\n", pos)
+        stop = len(mm) if nl == -1 else nl
+        yield pos, mm[pos:stop]
+        pos = stop + 1
 
-def main(path: str):
+
+def split_ranges(mm: mmap.mmap, parts: int) -> List[Tuple[int, int]]:
+    size = len(mm)
+    bounds = [0]
+    for k in range(1, parts):
+        nl = mm.find(b"\n", max(bounds[-1], size * k // parts))
+        if nl == -1:
+            break
+        bounds.append(nl + 1)
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def _check_range(path: str, start: int, end: int) -> Tuple[int, List[Tuple[int, str]]]:
+    """Return (line count, [(range-local line number, message)])."""
+    issues = []
+    n = 0
+    with _mapped(path) as mm:
+        for n, (_, line) in enumerate(iter_lines(mm, start, end), 1):
+            if not line.strip():
+                continue
+            msg = check_line(n, line)
+            if msg:
+                issues.append((n, msg))
+    return n, issues
+
+
+def main(path: str, workers: Optional[int] = None) -> int:
     p = Path(path)
     if not p.exists():
         print(f"No such file: {path}")
         return 1
+    size = p.stat().st_size
+    if size == 0:
+        print("Logs look good.")
+        return 0
+    workers = workers or os.cpu_count() or 1
+    with _mapped(p) as mm:
+        ranges = split_ranges(mm, max(1, min(workers, size // MIN_CHUNK)))
+    if len(ranges) <= 1:
+        # none when the log was emptied since the size check
+        results = [_check_range(path, *r) for r in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            results = list(pool.map(_check_range, [path] * len(ranges), *zip(*ranges)))
     errors = 0
-    for i, line in enumerate(p.read_text(encoding="utf-8").splitlines(), 1):
-        if not line.strip():
-            continue
-        errors += check_line(i, line)
+    base = 0
+    for count, issues in results:
+        for n, msg in issues:
+            # renumber range-local line numbers to file line numbers
+            print(msg.replace(f"Line {n}:", f"Line {base + n}:", 1))
+        errors += len(issues)
+        base += count
     if errors:
         print(f"Validation failed with {errors} issue(s)")
         return 1
     print("Logs look good.")
     return 0
 
+
+def _index_path(path: str) -> str:
+    return f"{path}.idx"
+
+
+def open_index(path: str) -> sqlite3.Connection:
+    """Open the sidecar index for ``path`` and bring it up to date with the log."""
+    db = sqlite3.connect(_index_path(path))
+    # the index is derived data; rebuildable, so skip fsyncs
+    db.execute("PRAGMA synchronous=OFF")
+    db.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v);
+        CREATE TABLE IF NOT EXISTS lines (off INTEGER PRIMARY KEY, len INTEGER, ts TEXT, level TEXT, action TEXT, reqId TEXT);
+        CREATE INDEX IF NOT EXISTS lines_req ON lines (reqId);
+        CREATE INDEX IF NOT EXISTS lines_action_ts ON lines (action, ts);
+        CREATE INDEX IF NOT EXISTS lines_level_ts ON lines (level, ts);
+        CREATE INDEX IF NOT EXISTS lines_ts ON lines (ts);
+        """
+    )
+    meta = dict(db.execute("SELECT k, v FROM meta"))
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(256)
+    indexed = int(meta.get("size", 0))
+    # a rotated or rewritten log starts over
+    if meta.get("head") != head[: min(len(head), indexed)] or size < indexed:
+        db.execute("DELETE FROM lines")
+        indexed = 0
+    if size > indexed:
+        with _mapped(path) as mm:
+            end = mm.rfind(b"\n", indexed) + 1
+            rows = []
+            for off, line in iter_lines(mm, indexed, end):
+                try:
+                    obj = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                if isinstance(obj, dict):
+                    rows.append((off, len(line), obj.get("ts"), obj.get("level"), obj.get("action"), obj.get("reqId")))
+                if len(rows) >= INDEX_BATCH:
+                    db.executemany("INSERT OR REPLACE INTO lines VALUES (?, ?, ?, ?, ?, ?)", rows)
+                    rows.clear()
+            db.executemany("INSERT OR REPLACE INTO lines VALUES (?, ?, ?, ?, ?, ?)", rows)
+            indexed = max(indexed, end)
+        db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [("size", indexed), ("head", head[: min(len(head), indexed)])])
+        db.commit()
+    return db
+
+
+def query(path: str, req_id: Optional[str] = None, action: Optional[str] = None, level: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[bytes]:
+    """Yield raw log lines matching every given filter, in file order.
+
+    ``since``/``until`` compare as ts prefixes, so ``--since 2025-09-29T10 --until 2025-09-29T10``
+    selects that whole hour.
+    """
+    where, args = [], []
+    for col, val in (("reqId", req_id), ("action", action), ("level", level)):
+        if val is not None:
+            where.append(f"{col} = ?")
+            args.append(val)
+    if since is not None:
+        where.append("ts >= ?")
+        args.append(since)
+    if until is not None:
+        # "\uffff" makes the bound inclusive of everything sharing the prefix
+        where.append("ts <= ?")
+        args.append(until + "\uffff")
+    sql = "SELECT off, len FROM lines" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY off"
+    db = open_index(path)
+    try:
+        with _mapped(path) as mm:
+            for off, n in db.execute(sql, args):
+                yield mm[off:off + n]
+    finally:
+        db.close()
+
+
+def _archive():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from src import log_archive
+    return log_archive
+
+
+def compact(path: str, archive: Optional[str] = None) -> int:
+    root = archive or f"{path}.archive"
+    done = _archive().compact_closed(path, root)
+    print(f"Compacted {len(done)} segment(s) into {root}")
+    return 0
+
+
+def stats(path: str, archive: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None, every: int = 3600, by: str = "endpoint") -> int:
+    keys = {"endpoint": ["method", "path"], "action": ["action"], "none": []}[by]
+    r = _archive().LogArchive(archive or f"{path}.archive").rollups(since, until, every, keys)
+    print(f"{'bucket':<17} {by:<40} {'count':>9} {'errors':>7} {'avg ms':>8} {'max ms':>8}")
+    for i in range(len(r["bucket"])):
+        bucket = str(r["bucket"][i].astype("datetime64[ms]").astype("datetime64[m]"))
+        key = " ".join(str(r[k][i]) for k in keys)
+        n = r["lat_n"][i]
+        avg, top = (f"{r['lat_sum'][i] / n:8.1f}", f"{r['lat_max'][i]:8.1f}") if n else (f"{'-':>8}", f"{'-':>8}")
+        print(f"{bucket:<17} {key:<40} {r['count'][i]:>9} {r['errors'][i]:>7} {avg} {top}")
+    return 0
+
+
+def _cli(argv: List[str]) -> int:
+    if argv and argv[0] == "compact":
+        ap = argparse.ArgumentParser(prog="validate_logs.py compact")
+        ap.add_argument("path", nargs="?", default="bot.log")
+        ap.add_argument("--archive", help="archive directory (default <log>.archive)")
+        a = ap.parse_args(argv[1:])
+        return compact(a.path, a.archive)
+    if argv and argv[0] == "stats":
+        ap = argparse.ArgumentParser(prog="validate_logs.py stats")
+        ap.add_argument("path", nargs="?", default="bot.log")
+        ap.add_argument("--archive", help="archive directory (default <log>.archive)")
+        ap.add_argument("--since", help="inclusive ts prefix, e.g. 2025-09-29T10")
+        ap.add_argument("--until", help="inclusive ts prefix")
+        ap.add_argument("--every", type=int, default=3600, help="bucket size in seconds, a multiple of 60")
+        ap.add_argument("--by", choices=("endpoint", "action", "none"), default="endpoint")
+        a = ap.parse_args(argv[1:])
+        try:
+            return stats(a.path, a.archive, a.since, a.until, a.every, a.by)
+        except ValueError as e:
+            print(e)
+            return 1
+    if argv and argv[0] == "query":
+        ap = argparse.ArgumentParser(prog="validate_logs.py query")
+        ap.add_argument("path", nargs="?", default="bot.log")
+        ap.add_argument("--req-id", dest="req_id")
+        ap.add_argument("--action")
+        ap.add_argument("--level")
+        ap.add_argument("--since", help="inclusive ts prefix, e.g. 2025-09-29T10")
+        ap.add_argument("--until", help="inclusive ts prefix")
+        a = ap.parse_args(argv[1:])
+        if not Path(a.path).exists():
+            print(f"No such file: {a.path}")
+            return 1
+        out = sys.stdout.buffer
+        for line in query(a.path, a.req_id, a.action, a.level, a.since, a.until):
+            out.write(line + b"\n")
+        return 0
+    ap = argparse.ArgumentParser(prog="validate_logs.py")
+    ap.add_argument("path", nargs="?", default="bot.log")
+    ap.add_argument("--workers", type=int, default=None)
+    a = ap.parse_args(argv)
+    return main(a.path, a.workers)
+
+
 if __name__ == "__main__":
-    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else "bot.log"))
+    sys.exit(_cli(sys.argv[1:]))